@@ -0,0 +1,108 @@
+# bench/array_trace_bench.py
+"""
+Overhead of the runtime array-access tracer.
+
+    cd Backend
+    python -m bench.array_trace_bench --repeat 3 --max-ratio 5
+
+Runs every snippet in the array trace worker with measure_baseline=True, so
+the plain and the instrumented module execute in the same process, and
+reports instrumented / plain time. Exits non-zero if the median ratio of the
+snippets that take at least --min-baseline-ms exceeds --max-ratio.
+"""
+import argparse
+import json
+import statistics
+import sys
+from typing import Any, Dict, List
+
+from bench.corpus import build_corpus
+from engines.array_runtime_tracer import trace_array_runtime
+
+# access-heavy shapes beyond the corpus' prefix sum
+EXTRA_SNIPPETS = {
+    "two_pointer": """
+arr = list(range(200000))
+lo, hi = 0, len(arr) - 1
+pairs = 0
+while lo < hi:
+    if arr[lo] + arr[hi] > 150000:
+        hi -= 1
+    else:
+        lo += 1
+        pairs += 1
+print(pairs)
+""",
+    "prefix_sums": """
+arr = [i % 7 for i in range(100000)]
+pre = [0] * (len(arr) + 1)
+for i in range(len(arr)):
+    pre[i + 1] = pre[i] + arr[i]
+print(pre[-1])
+""",
+    "grid_dp": """
+n = 250
+grid = [[(i * j) % 5 for j in range(n)] for i in range(n)]
+for i in range(1, n):
+    for j in range(1, n):
+        grid[i][j] += min(grid[i - 1][j], grid[i][j - 1])
+print(grid[-1][-1])
+""",
+    "mixed_work": """
+arr = list(range(50000))
+out = []
+for i in range(len(arr)):
+    x = arr[i]
+    out.append(str(x * x)[-3:])
+print(len(out))
+""",
+}
+
+
+def snippets() -> Dict[str, str]:
+    out = {f"corpus_{e['size']}": e["code"] for e in build_corpus(["array"])}
+    out.update(EXTRA_SNIPPETS)
+    return out
+
+
+def run(repeat: int) -> List[Dict[str, Any]]:
+    results = []
+    for name, code in snippets().items():
+        ratios, plain, traced = [], [], []
+        accesses = 0
+        for _ in range(repeat):
+            r = trace_array_runtime(code, measure_baseline=True, timeout=20)
+            if "error" in r:
+                raise RuntimeError(f"{name}: {r}")
+            plain.append(r["baseline_ms"])
+            traced.append(r["elapsed_ms"])
+            ratios.append(r["elapsed_ms"] / max(r["baseline_ms"], 1e-3))
+            accesses = r["accesses_total"]
+        results.append({
+            "snippet": name,
+            "accesses": accesses,
+            "plain_ms": round(statistics.median(plain), 3),
+            "traced_ms": round(statistics.median(traced), 3),
+            "ratio": round(statistics.median(ratios), 2),
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure array tracer overhead")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-ratio", type=float, default=5.0)
+    parser.add_argument("--min-baseline-ms", type=float, default=5.0,
+                        help="ignore snippets too short to time reliably")
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat)
+    timed = [r["ratio"] for r in results if r["plain_ms"] >= args.min_baseline_ms]
+    median_ratio = round(statistics.median(timed), 2) if timed else None
+    report = {"results": results, "median_ratio": median_ratio, "max_ratio": args.max_ratio}
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if median_ratio is not None and median_ratio > args.max_ratio else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# bench/asgi_client.py
+# Minimal in-process ASGI client: drives the FastAPI app without a
+# socket or any extra dependency (no httpx / TestClient needed).
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+async def asgi_request(
+    app,
+    method: str,
+    path: str,
+    body: Optional[Dict[str, Any]] = None,
+    headers: Optional[List[Tuple[str, str]]] = None,
+) -> Dict[str, Any]:
+    """
+    Send one HTTP request to `app`.
+    Returns status, headers, body bytes and arrival time of every body chunk
+    (seconds since the request started), which is what SSE timing needs.
+    """
+    raw_body = json.dumps(body).encode("utf-8") if body is not None else b""
+    raw_headers = [(b"content-type", b"application/json"), (b"content-length", str(len(raw_body)).encode())]
+    for name, value in headers or []:
+        raw_headers.append((name.lower().encode(), value.encode()))
+
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+
+    request_sent = False
+    response: Dict[str, Any] = {"status": None, "headers": [], "chunks": [], "body": b""}
+    start = time.perf_counter()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": raw_body, "more_body": False}
+        # keep the "connection" open until the app finishes
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = [(k.decode(), v.decode()) for k, v in message.get("headers", [])]
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            if chunk:
+                response["chunks"].append((time.perf_counter() - start, chunk))
+
+    await app(scope, receive, send)
+
+    response["body"] = b"".join(chunk for _, chunk in response["chunks"])
+    response["elapsed"] = time.perf_counter() - start
+    return response
+
+
+def parse_sse(chunks: List[Tuple[float, bytes]]) -> List[Dict[str, Any]]:
+    """Split timed SSE chunks into [{"t", "event", "data", "bytes"}]."""
+    events = []
+    buffer = b""
+    for t, chunk in chunks:
+        buffer += chunk
+        while b"\n\n" in buffer:
+            frame, buffer = buffer.split(b"\n\n", 1)
+            event = {"t": t, "event": "message", "data": None, "bytes": len(frame) + 2}
+            for line in frame.decode("utf-8").splitlines():
+                if line.startswith("event: "):
+                    event["event"] = line[len("event: "):]
+                elif line.startswith("data: "):
+                    try:
+                        event["data"] = json.loads(line[len("data: "):])
+                    except ValueError:
+                        event["data"] = line[len("data: "):]
+            events.append(event)
+    return events
@@ -0,0 +1,89 @@
+# bench/code_delivery_bench.py
+"""
+Per-request I/O of handing user code to the sandbox and recursion tracer.
+
+    cd Backend
+    python -m bench.code_delivery_bench --runs 50
+
+Runs the sandbox with DECAPSULE_CODE_DELIVERY=file (a temp .py per request,
+the old behaviour) and auto (memfd, else a pipe), then the recursion tracer
+(script piped on stdin). For each it reports the server process's own I/O per
+request from /proc/self/io, children excluded:
+- disk_write_bytes  bytes dirtied in the page cache for the filesystem
+- cancelled_bytes   of those, bytes dropped again because the file was deleted
+- write_calls       write syscalls (stdin and code pipes included)
+plus wall time, and how many new entries the temp directory gained.
+Linux only (/proc/self/io).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict
+
+from sandbox import sandbox_runner
+
+SNIPPET = """
+def fib(n):
+    return n if n < 2 else fib(n - 1) + fib(n - 2)
+
+print(fib(12))
+"""
+
+
+def _io() -> Dict[str, int]:
+    with open("/proc/self/io", "r") as f:
+        return {k: int(v) for k, v in (line.split(": ") for line in f)}
+
+
+def _measure(fn, runs: int) -> Dict[str, Any]:
+    tmp_dir = tempfile.gettempdir()
+    before_files = set(os.listdir(tmp_dir))
+    start_io = _io()
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    wall = time.perf_counter() - start
+    end_io = _io()
+    new_files = set(os.listdir(tmp_dir)) - before_files
+    return {
+        "runs": runs,
+        "wall_ms_per_run": round(wall / runs * 1000, 2),
+        "disk_write_bytes_per_run": round((end_io["write_bytes"] - start_io["write_bytes"]) / runs, 1),
+        "cancelled_bytes_per_run": round(
+            (end_io["cancelled_write_bytes"] - start_io["cancelled_write_bytes"]) / runs, 1
+        ),
+        "write_calls_per_run": round((end_io["syscw"] - start_io["syscw"]) / runs, 1),
+        "temp_dir_new_entries": len(new_files),
+    }
+
+
+def run(runs: int) -> Dict[str, Any]:
+    from engines.recursion_engine import trace_recursion_runtime
+
+    results = {}
+    for mode in ("file", "auto"):
+        sandbox_runner.CODE_DELIVERY = mode
+        results[f"sandbox_{mode}"] = _measure(lambda: sandbox_runner.run_in_sandbox(SNIPPET, ""), runs)
+    sandbox_runner.CODE_DELIVERY = "auto"
+    results["recursion_tracer"] = _measure(lambda: trace_recursion_runtime(SNIPPET, "fib", [12]), runs)
+    return {
+        "python": sys.version.split()[0],
+        "memfd": hasattr(os, "memfd_create"),
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-request I/O of code delivery to child processes")
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args(argv)
+    if not os.path.exists("/proc/self/io"):
+        sys.exit("needs /proc/self/io (Linux)")
+    print(json.dumps(run(args.runs), indent=2))
+
+
+if __name__ == "__main__":
+    main()
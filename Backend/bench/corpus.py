@@ -0,0 +1,126 @@
+# bench/corpus.py
+# Curated benchmark snippets, one generator per topic.
+# Each entry: {"topic", "size", "code", "input", "entry", "args"}
+from typing import Any, Dict, List
+
+SIZES = {"small": 0, "medium": 1, "large": 2}
+
+
+def _recursion(level: int) -> Dict[str, Any]:
+    n = (8, 14, 18)[level]
+    code = f"""def fib(n):
+    if n < 2:
+        return n
+    return fib(n - 1) + fib(n - 2)
+
+fib({n})
+"""
+    return {"code": code, "entry": "fib", "args": [n]}
+
+
+def _dp_topdown(level: int) -> Dict[str, Any]:
+    n = (10, 100, 400)[level]
+    code = f"""memo = {{}}
+
+def climb(n):
+    if n <= 1:
+        return 1
+    if n in memo:
+        return memo[n]
+    memo[n] = climb(n - 1) + climb(n - 2)
+    return memo[n]
+
+climb({n})
+"""
+    return {"code": code, "entry": "climb", "args": [n]}
+
+
+def _dp_bottomup(level: int) -> Dict[str, Any]:
+    n = (10, 60, 200)[level]
+    code = f"""n = {n}
+dp = [[0] * (n + 1) for _ in range(n + 1)]
+for i in range(n + 1):
+    for j in range(n + 1):
+        if i == 0 or j == 0:
+            dp[i][j] = 1
+        else:
+            dp[i][j] = dp[i - 1][j] + dp[i][j - 1]
+"""
+    return {"code": code, "entry": None, "args": []}
+
+
+def _graph(level: int, algo: str) -> Dict[str, Any]:
+    n = (8, 1000, 50000)[level]
+    if algo == "bfs":
+        code = f"""from collections import deque
+
+graph = {{i: [(i * 7 + 1) % {n}, (i + 1) % {n}] for i in range({n})}}
+
+def bfs(start):
+    seen = {{start}}
+    q = deque([start])
+    while q:
+        node = q.popleft()
+        for nei in graph[node]:
+            if nei not in seen:
+                seen.add(nei)
+                q.append(nei)
+
+bfs(0)
+"""
+    else:
+        code = f"""graph = {{i: [(i * 7 + 1) % {n}, (i + 1) % {n}] for i in range({n})}}
+visited = set()
+
+def dfs(node):
+    visited.add(node)
+    for nei in graph[node]:
+        if nei not in visited:
+            dfs(nei)
+"""
+    return {"code": code, "entry": algo, "args": [0]}
+
+
+def _array(level: int) -> Dict[str, Any]:
+    n = (10, 1000, 100000)[level]
+    code = f"""arr = list(range({n}))
+total = 0
+for i in range(len(arr)):
+    total += arr[i]
+print(total)
+"""
+    return {"code": code, "entry": None, "args": []}
+
+
+def _string(level: int) -> Dict[str, Any]:
+    n = (10, 1000, 20000)[level]
+    code = f"""s = "ab" * {n}
+out = ""
+for i in range(len(s)):
+    if s[i] == "a":
+        out += s[i].upper()
+print(len(out))
+"""
+    return {"code": code, "entry": None, "args": []}
+
+
+_GENERATORS = {
+    "recursion": _recursion,
+    "dp_topdown": _dp_topdown,
+    "dp_bottomup": _dp_bottomup,
+    "graph_bfs": lambda level: _graph(level, "bfs"),
+    "graph_dfs": lambda level: _graph(level, "dfs"),
+    "array": _array,
+    "string": _string,
+}
+
+TOPICS = tuple(_GENERATORS)
+
+
+def build_corpus(topics=TOPICS, sizes=tuple(SIZES)) -> List[Dict[str, Any]]:
+    corpus = []
+    for topic in topics:
+        for size in sizes:
+            entry = _GENERATORS[topic](SIZES[size])
+            corpus.append({"topic": topic, "size": size, "input": "", **entry})
+    return corpus
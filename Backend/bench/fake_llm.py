@@ -0,0 +1,37 @@
+# bench/fake_llm.py
+import time
+from typing import Callable
+
+FAKE_EXPLANATION = "1) Summary: benchmark stub explanation.\n2) Line-by-line: skipped.\n"
+
+
+def make_fake_llm(latency: float = 0.0) -> Callable[..., str]:
+    """Drop-in for call_groq: sleeps `latency` seconds and returns canned text."""
+    def fake_llm(prompt: str, json_mode: bool = False) -> str:
+        if latency > 0:
+            time.sleep(latency)
+        if json_mode:
+            return '{"ok": true}'
+        return FAKE_EXPLANATION
+
+    fake_llm.prompt_sizes = []
+    return fake_llm
+
+
+def install_fake_llm(latency: float = 0.0) -> Callable[..., str]:
+    """
+    Patch the Groq client; every route reaches it through services.stages.call_llm,
+    so LLM calls still go through the admission pool.
+    Returns the fake so callers can inspect recorded prompt sizes.
+    """
+    import ml.groq_client
+
+    base = make_fake_llm(latency)
+
+    def recording_llm(prompt: str, json_mode: bool = False) -> str:
+        recording_llm.prompt_sizes.append(len(prompt))
+        return base(prompt, json_mode)
+
+    recording_llm.prompt_sizes = []
+    ml.groq_client.call_groq = recording_llm
+    return recording_llm
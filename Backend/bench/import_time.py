@@ -0,0 +1,118 @@
+# bench/import_time.py
+"""
+Import-time budget check for cold starts.
+
+    cd Backend
+    python -m bench.import_time --budget-ms 1000 --own-budget-ms 60 --startup
+
+Runs `python -X importtime -c "import main"` in fresh interpreters (best of
+--runs) and exits non-zero when:
+- the cumulative import time of main exceeds --budget-ms,
+- the self time of our own packages exceeds --own-budget-ms, or
+- a module that must stay lazy (Groq SDK, NumPy, requests) is imported eagerly.
+With --startup it also spawns uvicorn on main:app and reports the time to
+the first successful response.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+# modules that may only be imported on first use
+LAZY_MODULES = ("groq", "numpy", "requests")
+
+OWN_PACKAGES = ("main", "routes", "services", "engines", "ml", "sandbox")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|").split("|")]
+        rows.append({"module": name, "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+    return rows
+
+
+def measure_once() -> Dict[str, Any]:
+    probe = "import sys, json, main; print(json.dumps(sorted(sys.modules)))"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = parse_importtime(proc.stderr)
+    loaded = json.loads(proc.stdout.strip().splitlines()[-1])
+    main_row = next((r for r in rows if r["module"] == "main"), {"cumulative_us": 0})
+    own = [r for r in rows if r["module"].split(".")[0] in OWN_PACKAGES]
+    return {
+        "total_ms": main_row["cumulative_us"] / 1000,
+        "own_ms": sum(r["self_us"] for r in own) / 1000,
+        "eager_lazy_modules": [m for m in LAZY_MODULES if m in loaded],
+        "slowest": sorted(rows, key=lambda r: r["self_us"], reverse=True)[:15],
+        "slowest_own": sorted(own, key=lambda r: r["cumulative_us"], reverse=True)[:10],
+    }
+
+
+def measure_startup(timeout: float = 30.0) -> float:
+    """Seconds from spawning uvicorn on main:app to the first 200 from GET /."""
+    from bench.load_test import _free_port, start_server, wait_ready
+
+    port = _free_port()
+    started = time.perf_counter()
+    proc = start_server(port, {}, app="main:app")
+    try:
+        asyncio.run(wait_ready("127.0.0.1", port, timeout))
+        return time.perf_counter() - started
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the import-time budget of main.py")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("DECAPSULE_IMPORT_BUDGET_MS", "1000")))
+    parser.add_argument("--own-budget-ms", type=float, default=float(os.getenv("DECAPSULE_OWN_IMPORT_BUDGET_MS", "60")))
+    parser.add_argument("--startup", action="store_true", help="also measure time to first response")
+    args = parser.parse_args(argv)
+
+    measure_once()  # warm the .pyc cache so compilation isn't counted
+    runs = [measure_once() for _ in range(args.runs)]
+    best = min(runs, key=lambda r: r["total_ms"])
+
+    report = {
+        "total_ms": round(best["total_ms"], 2),
+        "own_ms": round(min(r["own_ms"] for r in runs), 2),
+        "budget_ms": args.budget_ms,
+        "own_budget_ms": args.own_budget_ms,
+        "eager_lazy_modules": best["eager_lazy_modules"],
+        "slowest": best["slowest"],
+        "slowest_own": best["slowest_own"],
+    }
+    if args.startup:
+        report["time_to_first_response_s"] = round(measure_startup(), 3)
+
+    failures = []
+    if report["total_ms"] > args.budget_ms:
+        failures.append(f"import main took {report['total_ms']} ms (budget {args.budget_ms} ms)")
+    if report["own_ms"] > args.own_budget_ms:
+        failures.append(f"own modules took {report['own_ms']} ms (budget {args.own_budget_ms} ms)")
+    if report["eager_lazy_modules"]:
+        failures.append(f"imported eagerly: {', '.join(report['eager_lazy_modules'])}")
+    report["failures"] = failures
+
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# bench/lis_bench.py
+"""
+LIS engine scaling benchmark.
+
+    cd Backend
+    python -m bench.lis_bench --sizes 100 1000 10000 100000 --out lis.json
+
+For random, ascending and descending arrays of each size it times:
+- quadratic:  simulate_lis_dp(arr)            full snapshots (skipped above --quadratic-max)
+- bounded:    simulate_lis_dp(arr, max_snapshots, max_rows)
+- patience:   simulate_lis_patience(arr)
+and reports wall time, JSON payload size, and that all modes agree on the LIS length.
+"""
+import argparse
+import json
+import random
+import time
+from typing import Any, Callable, Dict, List
+
+from engines.dp_engine import LIS_MAX_ROWS, LIS_MAX_SNAPSHOTS, simulate_lis_dp, simulate_lis_patience
+
+SIZES = [100, 1000, 10000, 100000]
+SHAPES = ("random", "ascending", "descending")
+
+
+def make_array(shape: str, n: int, seed: int = 0) -> List[int]:
+    if shape == "ascending":
+        return list(range(n))
+    if shape == "descending":
+        return list(range(n, 0, -1))
+    rng = random.Random(seed)
+    return [rng.randint(0, n) for _ in range(n)]
+
+
+def _lis_length(mode: str, out: Dict[str, Any]) -> int:
+    if mode == "patience":
+        return out["length"]
+    return max(out["final_dp"], default=0)
+
+
+def _measure(fn: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - start
+    return {"out": out, "ms": round(elapsed * 1000, 2), "payload_bytes": len(json.dumps(out))}
+
+
+def run(sizes: List[int], quadratic_max: int) -> List[Dict[str, Any]]:
+    results = []
+    for shape in SHAPES:
+        for n in sizes:
+            arr = make_array(shape, n)
+            modes = {
+                "bounded": lambda: simulate_lis_dp(arr, max_snapshots=LIS_MAX_SNAPSHOTS, max_rows=LIS_MAX_ROWS),
+                "patience": lambda: simulate_lis_patience(arr),
+            }
+            if n <= quadratic_max:
+                modes["quadratic"] = lambda: simulate_lis_dp(arr)
+
+            lengths = set()
+            for mode, fn in modes.items():
+                m = _measure(fn)
+                length = _lis_length(mode, m["out"])
+                lengths.add(length)
+                results.append({
+                    "shape": shape,
+                    "n": n,
+                    "mode": mode,
+                    "ms": m["ms"],
+                    "payload_bytes": m["payload_bytes"],
+                    "lis_length": length,
+                })
+            if len(lengths) != 1:
+                raise AssertionError(f"LIS modes disagree for {shape} n={n}: {lengths}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the LIS engines up to 10^5 elements")
+    parser.add_argument("--sizes", type=int, nargs="*", default=SIZES)
+    parser.add_argument("--quadratic-max", type=int, default=300,
+                        help="largest n for the unbounded O(n^2) mode (its payload is O(n^2))")
+    parser.add_argument("--out", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {
+        "max_snapshots": LIS_MAX_SNAPSHOTS,
+        "max_rows": LIS_MAX_ROWS,
+        "results": run(args.sizes, args.quadratic_max),
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+# bench/load_test.py
+"""
+Concurrency load test against a local uvicorn running bench.stub_app.
+
+    cd Backend
+    python -m bench.load_test --levels 1 2 4 8 16 32 --duration 10 --out capacity.json
+
+For every route and concurrency level it records throughput, latency
+percentiles, time to first byte / first SSE event, status codes, and the
+server-side saturation signals (event-loop lag, sandbox in-flight depth)
+from /__bench/stats. The report marks the level where saturation begins:
+throughput stops growing while latency keeps climbing.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from bench.corpus import build_corpus
+from bench.run_bench import percentile
+
+ROUTES = {
+    "run": "/run/",
+    "process": "/process/",
+    "process_stream": "/process_stream/stream",
+}
+
+# topic of the snippet each route is driven with
+ROUTE_TOPIC = {"run": "array", "process": "recursion", "process_stream": "recursion"}
+
+# saturation: next level adds < 10% throughput while p95 grows > 50%
+SATURATION_GAIN = 0.10
+SATURATION_LATENCY_GROWTH = 0.50
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def http_request(host: str, port: int, method: str, path: str, body: Optional[dict] = None) -> Dict[str, Any]:
+    """
+    One HTTP/1.1 request over a fresh connection (Connection: close).
+    Timestamps: ttfb = first response byte, ttfe = first complete SSE frame.
+    """
+    start = time.perf_counter()
+    payload = json.dumps(body).encode() if body is not None else b""
+    reader, writer = await asyncio.open_connection(host, port)
+    head = (
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n"
+    ).encode()
+    writer.write(head + payload)
+    await writer.drain()
+
+    ttfb = ttfe = None
+    data = b""
+    while True:
+        chunk = await reader.read(65536)
+        if not chunk:
+            break
+        now = time.perf_counter() - start
+        if ttfb is None:
+            ttfb = now
+        data += chunk
+        if ttfe is None:
+            _, _, rest = data.partition(b"\r\n\r\n")
+            if b"data: " in rest and b"\n\n" in rest[rest.find(b"data: "):]:
+                ttfe = now
+
+    writer.close()
+    head, _, raw_body = data.partition(b"\r\n\r\n")
+    status_line = head.split(b"\r\n", 1)[0].decode(errors="replace")
+    parts = status_line.split(" ")
+    status = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
+    return {
+        "status": status,
+        "latency": time.perf_counter() - start,
+        "ttfb": ttfb,
+        "ttfe": ttfe,
+        "bytes": len(data),
+        "body": _dechunk(raw_body) if b"transfer-encoding: chunked" in head.lower() else raw_body,
+    }
+
+
+def _dechunk(raw: bytes) -> bytes:
+    out = b""
+    while raw:
+        size_line, _, raw = raw.partition(b"\r\n")
+        size = int(size_line.split(b";")[0] or b"0", 16)
+        if size == 0:
+            break
+        out += raw[:size]
+        raw = raw[size + 2:]
+    return out
+
+
+async def _worker(host, port, path, make_body, deadline, results):
+    while time.perf_counter() < deadline:
+        try:
+            results.append(await http_request(host, port, "POST", path, make_body()))
+        except (OSError, asyncio.IncompleteReadError) as e:
+            results.append({"status": 0, "latency": 0.0, "ttfb": None, "ttfe": None, "bytes": 0, "body": b"", "error": str(e)})
+
+
+async def _get_json(host, port, path) -> Dict[str, Any]:
+    resp = await http_request(host, port, "GET", path)
+    try:
+        return json.loads(resp["body"])
+    except ValueError:
+        return {}
+
+
+def _ms(values: List[float], pct: float) -> float:
+    return round(percentile(values, pct) * 1000, 2)
+
+
+async def run_level(host, port, route: str, concurrency: int, duration: float, unique: bool) -> Dict[str, Any]:
+    entry = next(e for e in build_corpus([ROUTE_TOPIC[route]], ["small"]))
+    counter = {"n": 0}
+
+    def make_body():
+        code = entry["code"]
+        if unique:
+            # defeat single-flight and the stage cache
+            counter["n"] += 1
+            code += f"\n# load-test request {counter['n']}\n"
+        return {"code": code, "input": entry["input"]}
+
+    await _get_json(host, port, "/__bench/stats?reset=true")
+
+    results: List[Dict[str, Any]] = []
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*[
+        _worker(host, port, ROUTES[route], make_body, deadline, results)
+        for _ in range(concurrency)
+    ])
+    elapsed = time.perf_counter() - started
+
+    server = await _get_json(host, port, "/__bench/stats")
+
+    ok = [r for r in results if 200 <= r["status"] < 300]
+    latencies = [r["latency"] for r in ok]
+    return {
+        "route": route,
+        "concurrency": concurrency,
+        "requests": len(results),
+        "ok": len(ok),
+        "status_codes": dict(Counter(r["status"] for r in results)),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {"p50": _ms(latencies, 50), "p95": _ms(latencies, 95), "p99": _ms(latencies, 99)},
+        "ttfb_ms": {"p50": _ms([r["ttfb"] for r in ok if r["ttfb"]], 50), "p95": _ms([r["ttfb"] for r in ok if r["ttfb"]], 95)},
+        "ttfe_ms": {"p50": _ms([r["ttfe"] for r in ok if r["ttfe"]], 50), "p95": _ms([r["ttfe"] for r in ok if r["ttfe"]], 95)},
+        "server": server,
+    }
+
+
+def find_saturation(levels: List[Dict[str, Any]]) -> Optional[int]:
+    for prev, cur in zip(levels, levels[1:]):
+        if not prev["throughput_rps"] or not prev["latency_ms"]["p95"]:
+            continue
+        gain = cur["throughput_rps"] / prev["throughput_rps"] - 1
+        growth = cur["latency_ms"]["p95"] / prev["latency_ms"]["p95"] - 1
+        if gain < SATURATION_GAIN and growth > SATURATION_LATENCY_GROWTH:
+            return prev["concurrency"]
+    return None
+
+
+def start_server(port: int, env: Dict[str, str], app: str = "bench.stub_app:app") -> subprocess.Popen:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=backend_dir,
+        env={**os.environ, **env},
+    )
+
+
+async def wait_ready(host: str, port: int, timeout: float = 30.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            resp = await http_request(host, port, "GET", "/")
+            if resp["status"] == 200:
+                return
+        except OSError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+async def _main(args) -> Dict[str, Any]:
+    host = "127.0.0.1"
+    port = args.port or _free_port()
+    proc = None
+    if not args.port:
+        env = {
+            "DECAPSULE_BENCH_LLM_LATENCY": str(args.llm_latency),
+            "DECAPSULE_BENCH_SANDBOX_STUB": "1" if args.stub_sandbox else "0",
+            "DECAPSULE_BENCH_SANDBOX_LATENCY": str(args.sandbox_latency),
+            # every request comes from 127.0.0.1: per-client limits would cap the test
+            "DECAPSULE_RATE_LIMIT": "0",
+        }
+        proc = start_server(port, env)
+
+    try:
+        startup = time.perf_counter()
+        await wait_ready(host, port)
+        report: Dict[str, Any] = {
+            "meta": {
+                "levels": args.levels,
+                "duration": args.duration,
+                "llm_latency": args.llm_latency,
+                "stub_sandbox": args.stub_sandbox,
+                "unique_requests": args.unique,
+                "time_to_ready_s": round(time.perf_counter() - startup, 3),
+            },
+            "routes": {},
+        }
+        for route in args.routes:
+            levels = []
+            for concurrency in args.levels:
+                levels.append(await run_level(host, port, route, concurrency, args.duration, args.unique))
+            report["routes"][route] = {"levels": levels, "saturation_concurrency": find_saturation(levels)}
+        return report
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the Decapsule FastAPI app")
+    parser.add_argument("--routes", nargs="*", default=list(ROUTES), choices=list(ROUTES))
+    parser.add_argument("--levels", nargs="*", type=int, default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per concurrency level")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--stub-sandbox", action="store_true", help="replace subprocess sandbox with a sleep")
+    parser.add_argument("--sandbox-latency", type=float, default=0.05)
+    parser.add_argument("--unique", action="store_true", help="make every request body distinct")
+    parser.add_argument("--port", type=int, help="use an already running server instead of spawning one")
+    parser.add_argument("--out", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(_main(args))
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# bench/rules_bench.py
+"""
+Static rule engine scaling benchmark.
+
+    cd Backend
+    python -m bench.rules_bench --lines 200 2000 20000 --rule-copies 1 4 16
+
+Builds snippets of increasing size from the benchmark corpus (functions
+renamed per copy) and times debug_code_static with the registry repeated
+1x / 4x / 16x (copies are subclasses with their own ids), so the cost of
+adding rules shows up next to the cost of growing the code. Every run is a
+single AST pass, so µs per line should stay flat as the code grows.
+Exits non-zero if, for any rule count, µs/line at the largest size exceeds
+--max-growth times the value at the smallest.
+"""
+import argparse
+import ast
+import json
+import re
+import sys
+import time
+from typing import Any, Dict, List, Type
+
+from bench.corpus import build_corpus
+from engines.debugger import find_issues
+from engines.static_rules import RULES, Rule
+
+LINES = [200, 2000, 20000]
+RULE_COPIES = [1, 4, 16]
+
+
+def make_code(target_lines: int) -> str:
+    blocks = [entry["code"] for entry in build_corpus(sizes=["small"])]
+    names = sorted({n for b in blocks for n in re.findall(r"^def (\w+)", b, re.M)}, key=len, reverse=True)
+    out: List[str] = []
+    lines = 0
+    copy = 0
+    while lines < target_lines:
+        for block in blocks:
+            for name in names:
+                block = re.sub(rf"\b{name}\b", f"{name}_{copy}", block)
+            out.append(block)
+            lines += block.count("\n") + 1
+        copy += 1
+    return "\n".join(out)
+
+
+def rule_set(copies: int) -> List[Type[Rule]]:
+    rules = list(RULES)
+    for k in range(1, copies):
+        rules.extend(type(f"{cls.__name__}_{k}", (cls,), {"id": f"{cls.id}-{k}"}) for cls in RULES)
+    return rules
+
+
+def _best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(lines: List[int], copies: List[int], repeat: int) -> List[Dict[str, Any]]:
+    results = []
+    for target in lines:
+        code = make_code(target)
+        n_lines = code.count("\n") + 1
+        parse_ms = _best_ms(lambda: ast.parse(code), repeat)
+        for c in copies:
+            rules = rule_set(c)
+            issues = find_issues(code, rules)
+            ms = _best_ms(lambda: find_issues(code, rules), repeat)
+            results.append({
+                "lines": n_lines,
+                "rules": len(rules),
+                "ms": round(ms, 3),
+                "parse_ms": round(parse_ms, 3),
+                "us_per_line": round(ms * 1000 / n_lines, 3),
+                "issues": len(issues),
+            })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the static rule engine")
+    parser.add_argument("--lines", type=int, nargs="*", default=LINES)
+    parser.add_argument("--rule-copies", type=int, nargs="*", default=RULE_COPIES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-growth", type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    results = run(args.lines, args.rule_copies, args.repeat)
+    failures = []
+    for n_rules in sorted({r["rules"] for r in results}):
+        rows = sorted((r for r in results if r["rules"] == n_rules), key=lambda r: r["lines"])
+        growth = rows[-1]["us_per_line"] / max(rows[0]["us_per_line"], 1e-9)
+        if growth > args.max_growth:
+            failures.append({"rules": n_rules, "growth": round(growth, 2)})
+
+    print(json.dumps({"results": results, "nonlinear": failures}, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
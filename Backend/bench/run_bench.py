@@ -0,0 +1,223 @@
+# bench/run_bench.py
+"""
+End-to-end benchmark for the analysis pipeline.
+
+    cd Backend
+    python -m bench.run_bench --repeat 5 --llm-latency 0.2 --out bench.json
+
+Times every engine in isolation on the corpus in bench/corpus.py, then the
+full /process_stream/stream route through an in-process ASGI client with a
+fake LLM. Output is JSON: per-stage p50/p95, events emitted, bytes streamed
+and peak RSS, so two runs can be diffed to spot regressions.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from bench.corpus import SIZES, TOPICS, build_corpus
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """samples in seconds -> milliseconds summary."""
+    return {
+        "n": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3) if samples else 0.0,
+    }
+
+
+def peak_rss_kb() -> Dict[str, int]:
+    if resource is None:
+        return {}
+    scale = 1 if sys.platform != "darwin" else 1024  # macOS reports bytes
+    return {
+        "self_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale,
+        "children_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // scale,
+    }
+
+
+# ---------- engines in isolation ----------
+
+def _engine_stages(entry: Dict[str, Any]) -> Dict[str, Callable[[], Any]]:
+    from engines.classifier import classify_code
+    from engines.debugger import debug_code_static
+    from engines.recursion_engine import trace_recursion_runtime
+    from engines.dp_runtime_tracer import trace_dp_runtime
+    from engines.dp_bottomup_runtime_tracer import trace_dp_bottomup_runtime
+    from engines.graph_runtime_tracer import trace_graph_runtime
+    from engines.graph_dfs_runtime_tracer import trace_dfs_runtime
+    from engines.array_engine import analyze_array_code
+    from engines.string_engine import analyze_string_code
+    from sandbox.sandbox_runner import run_in_sandbox
+
+    code = entry["code"]
+    stages = {
+        "classify_code": lambda: classify_code(code),
+        "debug_code_static": lambda: debug_code_static(code),
+    }
+
+    topic = entry["topic"]
+    if topic == "recursion":
+        stages["trace_recursion_runtime"] = lambda: trace_recursion_runtime(code, entry["entry"], entry["args"])
+    elif topic == "dp_topdown":
+        stages["trace_dp_runtime"] = lambda: trace_dp_runtime(code, entry["entry"], entry["args"])
+    elif topic == "dp_bottomup":
+        stages["trace_dp_bottomup_runtime"] = lambda: trace_dp_bottomup_runtime(code)
+    elif topic == "graph_bfs":
+        stages["trace_graph_runtime"] = lambda: trace_graph_runtime(code)
+    elif topic == "graph_dfs":
+        stages["trace_dfs_runtime"] = lambda: trace_dfs_runtime(code)
+    elif topic == "array":
+        stages["run_in_sandbox"] = lambda: run_in_sandbox(code, entry["input"])
+        stages["analyze_array_code"] = lambda: analyze_array_code(code)
+    elif topic == "string":
+        stages["run_in_sandbox"] = lambda: run_in_sandbox(code, entry["input"])
+        stages["analyze_string_code"] = lambda: analyze_string_code(code)
+    return stages
+
+
+def bench_engines(corpus: List[Dict[str, Any]], repeat: int) -> List[Dict[str, Any]]:
+    results = []
+    for entry in corpus:
+        for stage, fn in _engine_stages(entry).items():
+            samples = []
+            out_bytes = 0
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                out = fn()
+                samples.append(time.perf_counter() - t0)
+            try:
+                out_bytes = len(json.dumps(out, default=str))
+            except (TypeError, ValueError):
+                out_bytes = -1
+            results.append({
+                "topic": entry["topic"],
+                "size": entry["size"],
+                "stage": stage,
+                "output_bytes": out_bytes,
+                **summarize(samples),
+            })
+    return results
+
+
+# ---------- full pipeline through ASGI ----------
+
+async def _bench_pipeline_entry(app, entry: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    from bench.asgi_client import asgi_request, parse_sse
+
+    totals, first_event = [], []
+    per_stage: Dict[str, List[float]] = defaultdict(list)
+    events_emitted = bytes_streamed = 0
+
+    for _ in range(repeat):
+        resp = await asgi_request(app, "POST", "/process_stream/stream", {"code": entry["code"], "input": entry["input"]})
+        events = parse_sse(resp["chunks"])
+        totals.append(resp["elapsed"])
+        if events:
+            first_event.append(events[0]["t"])
+
+        # time between consecutive events is charged to the later event's stage
+        run_stage: Dict[str, float] = defaultdict(float)
+        prev = 0.0
+        for ev in events:
+            stage = ev["data"].get("stage", ev["event"]) if isinstance(ev["data"], dict) else ev["event"]
+            run_stage[stage] += ev["t"] - prev
+            prev = ev["t"]
+        for stage, spent in run_stage.items():
+            per_stage[stage].append(spent)
+
+        events_emitted = len(events)
+        bytes_streamed = len(resp["body"])
+
+    return {
+        "topic": entry["topic"],
+        "size": entry["size"],
+        "total": summarize(totals),
+        "time_to_first_event": summarize(first_event),
+        "stages": {stage: summarize(samples) for stage, samples in sorted(per_stage.items())},
+        "events_emitted": events_emitted,
+        "bytes_streamed": bytes_streamed,
+    }
+
+
+def bench_pipeline(corpus: List[Dict[str, Any]], repeat: int, llm_latency: float) -> Dict[str, Any]:
+    from main import app
+    from bench.fake_llm import install_fake_llm
+
+    fake = install_fake_llm(llm_latency)
+
+    async def run_all():
+        return [await _bench_pipeline_entry(app, entry, repeat) for entry in corpus]
+
+    results = asyncio.run(run_all())
+    sizes = fake.prompt_sizes
+    return {
+        "results": results,
+        "llm_prompt_chars": {"max": max(sizes, default=0), "mean": round(sum(sizes) / len(sizes), 1) if sizes else 0},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Decapsule analysis pipeline")
+    parser.add_argument("--topics", nargs="*", default=list(TOPICS), choices=TOPICS)
+    parser.add_argument("--sizes", nargs="*", default=list(SIZES), choices=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="fake LLM latency in seconds")
+    parser.add_argument("--skip-engines", action="store_true")
+    parser.add_argument("--skip-pipeline", action="store_true")
+    parser.add_argument("--out", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    # measure the real work: no memoization, no request coalescing
+    # (set before the engines / app are imported below)
+    os.environ.setdefault("DECAPSULE_STAGE_CACHE_SIZE", "0")
+    os.environ.setdefault("DECAPSULE_SINGLE_FLIGHT", "0")
+
+    corpus = build_corpus(args.topics, args.sizes)
+    report: Dict[str, Any] = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "llm_latency": args.llm_latency,
+            "started_at": time.time(),
+        }
+    }
+
+    if not args.skip_engines:
+        report["engines"] = bench_engines(corpus, args.repeat)
+    if not args.skip_pipeline:
+        report["pipeline"] = bench_pipeline(corpus, args.repeat, args.llm_latency)
+    report["peak_rss"] = peak_rss_kb()
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
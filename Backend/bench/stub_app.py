@@ -0,0 +1,94 @@
+# bench/stub_app.py
+"""
+The real app from main.py with the expensive externals swapped for stubs,
+plus a /__bench/stats endpoint exposing saturation signals.
+
+    DECAPSULE_BENCH_LLM_LATENCY=0.3 uvicorn bench.stub_app:app
+
+Env:
+- DECAPSULE_BENCH_LLM_LATENCY: fake LLM latency in seconds (default 0.2)
+- DECAPSULE_BENCH_SANDBOX_STUB: "1" replaces run_in_sandbox with a sleep
+- DECAPSULE_BENCH_SANDBOX_LATENCY: stub sandbox latency in seconds (default 0.05)
+"""
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+from main import app
+from bench.fake_llm import install_fake_llm
+from sandbox.sandbox_runner import sandbox_stats, _track
+from services.admission import pools
+from services.job_runner import job_stats
+
+LLM_LATENCY = float(os.getenv("DECAPSULE_BENCH_LLM_LATENCY", "0.2"))
+SANDBOX_STUB = os.getenv("DECAPSULE_BENCH_SANDBOX_STUB", "0") == "1"
+SANDBOX_LATENCY = float(os.getenv("DECAPSULE_BENCH_SANDBOX_LATENCY", "0.05"))
+
+# how often the loop-lag probe wakes up
+LAG_PROBE_INTERVAL = 0.05
+
+install_fake_llm(LLM_LATENCY)
+
+
+def _stub_sandbox(code: str, stdin: str, watchdog: bool = None, profile: bool = False):
+    _track(1)
+    try:
+        time.sleep(SANDBOX_LATENCY)
+        return {"stdout": "", "stderr": "", "exit_code": 0}
+    finally:
+        _track(-1)
+
+
+if SANDBOX_STUB:
+    # services.stages looks this up per call, behind the sandbox pool
+    import sandbox.sandbox_runner
+    sandbox.sandbox_runner.run_in_sandbox = _stub_sandbox
+
+
+_lag = {"max_ms": 0.0, "samples": []}
+
+
+async def _probe_loop_lag():
+    # a sleep that wakes up late means something blocked the event loop
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_PROBE_INTERVAL)
+        lag_ms = (time.perf_counter() - start - LAG_PROBE_INTERVAL) * 1000
+        _lag["max_ms"] = max(_lag["max_ms"], lag_ms)
+        _lag["samples"].append(lag_ms)
+        del _lag["samples"][:-2000]
+
+
+_app_lifespan = app.router.lifespan_context
+
+
+@asynccontextmanager
+async def bench_lifespan(app_):
+    # keep the real warm-up, then start the lag probe
+    async with _app_lifespan(app_) as state:
+        probe = asyncio.get_running_loop().create_task(_probe_loop_lag())
+        try:
+            yield state
+        finally:
+            probe.cancel()
+
+
+app.router.lifespan_context = bench_lifespan
+
+
+@app.get("/__bench/stats")
+def bench_stats(reset: bool = False):
+    samples = sorted(_lag["samples"])
+    p99 = samples[int(len(samples) * 0.99) - 1] if samples else 0.0
+    out = {
+        "loop_lag": {"max_ms": round(_lag["max_ms"], 3), "p99_ms": round(p99, 3), "samples": len(samples)},
+        "sandbox": sandbox_stats(reset_peak=reset),
+        "pools": {name: pool.stats() for name, pool in pools.items()},
+        "jobs": job_stats(),
+        "warmup": getattr(app.state, "warmup", None),
+    }
+    if reset:
+        _lag["max_ms"] = 0.0
+        _lag["samples"].clear()
+    return out
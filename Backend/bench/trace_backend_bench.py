@@ -0,0 +1,146 @@
+# bench/trace_backend_bench.py
+"""
+Tracing backend benchmark: settrace vs sys.monitoring.
+
+    cd Backend
+    python -m bench.trace_backend_bench --repeat 5
+
+Runs the execution tracer, the DP memo tracer and the recursion tracer script
+once with each backend, and checks that both produce the same events. The
+snippets spend their time where settrace pays and monitoring does not:
+pure-Python library code (fractions), work after the traced entry call, and
+loop lines inside a recursion that only needs call/return events. On
+Python < 3.12 only the settrace row is printed. Exits non-zero if the
+backends disagree.
+"""
+import argparse
+import io
+import json
+import os
+import re
+import sys
+import time
+from contextlib import redirect_stdout
+from typing import Any, Dict, List
+
+from engines import trace_backend
+from engines.dp_runtime_tracer import trace_dp_runtime
+from engines.execution_tracer import trace_execution
+from engines.recursion_engine import _make_tracer_script
+
+EXEC_CODE = """
+from fractions import Fraction
+
+def harmonic(n):
+    return sum(map(Fraction, [1] * n, range(1, n + 1)))
+
+total = 0
+for n in (200, 400, 800):
+    total += harmonic(n)
+print(total > 0)
+"""
+
+DP_CODE = """
+from fractions import Fraction
+
+memo = {}
+def ways(n):
+    if n <= 1:
+        return 1
+    if n in memo:
+        return memo[n]
+    memo[n] = ways(n - 1) + ways(n - 2)
+    return memo[n]
+
+print(ways(60))
+# library work after the traced entry call
+print(sum(map(Fraction, [1] * 1500, range(1, 1501))) > 0)
+"""
+
+RECURSION_CODE = """
+def digits(n):
+    if n == 0:
+        return 0
+    total = 0
+    k = n
+    while k:
+        total += k % 10
+        k //= 10
+    return total + digits(n - 1)
+
+print(digits(300))
+"""
+
+_ADDRESS = re.compile(r" at 0x[0-9a-f]+")
+
+
+def _normalize(value):
+    return _ADDRESS.sub("", json.dumps(value, sort_keys=True, default=str))
+
+
+def _best(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def _recursion(backend: str):
+    # the tracer script runs in-process here: a subprocess would mostly time interpreter startup
+    script = _make_tracer_script(RECURSION_CODE, "digits", [300])
+    os.environ["DECAPSULE_TRACE_BACKEND"] = backend
+    stdout = io.StringIO()
+    try:
+        with redirect_stdout(stdout):
+            exec(compile(script, "<recursion_tracer>", "exec"), {"__name__": "__main__"})
+    finally:
+        os.environ.pop("DECAPSULE_TRACE_BACKEND", None)
+    out = json.loads(stdout.getvalue())
+    out.pop("backend", None)
+    return out
+
+
+def run(repeat: int) -> List[Dict[str, Any]]:
+    backends = ["settrace"]
+    if trace_backend.monitoring_available():
+        backends.append("monitoring")
+    tracers = {
+        "execution_tracer": lambda: trace_execution(EXEC_CODE)["events"],
+        "dp_runtime_tracer": lambda: trace_dp_runtime(DP_CODE, "ways", [60]),
+        # no line events with monitoring: calls and returns only
+        "recursion_tracer": None,
+    }
+    rows = []
+    for name, fn in tracers.items():
+        row = {"tracer": name}
+        outputs = {}
+        for backend in backends:
+            if fn is None:
+                ms, out = _best(lambda: _recursion(backend), repeat)
+            else:
+                trace_backend.TRACE_BACKEND = backend
+                ms, out = _best(fn, repeat)
+            row[f"{backend}_ms"] = round(ms, 2)
+            outputs[backend] = _normalize(out)
+        trace_backend.TRACE_BACKEND = "auto"
+        if "monitoring" in outputs:
+            row["speedup"] = round(row["settrace_ms"] / max(row["monitoring_ms"], 1e-9), 2)
+            row["same_events"] = outputs["monitoring"] == outputs["settrace"]
+        rows.append(row)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the settrace and sys.monitoring tracing backends")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rows = run(args.repeat)
+    print(json.dumps({"python": sys.version.split()[0], "results": rows}, indent=2))
+    sys.exit(1 if any(r.get("same_events") is False for r in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# bench/wire_bench.py
+"""
+Wire format benchmark: bytes on the wire and encode CPU per topic.
+
+    cd Backend
+    python -m bench.wire_bench --sizes small medium --repeat 3 --out wire.json
+
+Runs the pipeline once per corpus snippet (fake LLM, no complexity stage),
+then encodes what the routes would send:
+- stream: every SSE frame of /process_stream/stream, json or columnar,
+  uncompressed or compressed per frame (gzip, and br when brotli is installed)
+- final:  the "done" payload as a non-streaming response, json, columnar or
+  msgpack (when installed), uncompressed or gzip/br
+Each row has the bytes and the best-of-repeat CPU time (ms) to produce them.
+Exits non-zero if a columnar payload does not decode back to the original.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+# the complexity stage only adds timing noise here
+os.environ.setdefault("DECAPSULE_COMPLEXITY", "0")
+
+from bench.corpus import SIZES, TOPICS, build_corpus  # noqa: E402
+from bench.fake_llm import install_fake_llm  # noqa: E402
+
+
+def _cpu_ms(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.process_time()
+        result = fn()
+        best = min(best, time.process_time() - start)
+    return round(best * 1000, 3), result
+
+
+def _stream_bytes(events: List[Dict[str, Any]], encoding: str, coding: str) -> int:
+    from routes.process_stream import sse_event
+    from services.wire import FrameCompressor, to_columnar
+
+    compressor = FrameCompressor(coding) if coding != "identity" else None
+    total = 0
+    for event in events:
+        frame = sse_event(to_columnar(event) if encoding == "columnar" else event).encode("utf-8")
+        total += len(compressor.frame(frame)) if compressor else len(frame)
+    if compressor:
+        total += len(compressor.finish())
+    return total
+
+
+def _final_bytes(payload: Any, encoding: str, coding: str) -> int:
+    from services.wire import compress, encode_body
+
+    body = encode_body(payload, encoding)
+    if coding != "identity":
+        body = compress(body, coding)
+    return len(body)
+
+
+def _roundtrip_ok(payload: Any) -> bool:
+    from services.wire import from_columnar, to_columnar
+
+    plain = json.loads(json.dumps(payload, default=str))
+    return from_columnar(json.loads(json.dumps(to_columnar(plain)))) == plain
+
+
+def run(sizes: List[str], topics: List[str], repeat: int) -> Dict[str, Any]:
+    from services.pipeline import iter_pipeline
+    from services.wire import available_codings, available_encodings
+
+    install_fake_llm(0.0)
+    codings = ["identity"] + available_codings()
+    rows = []
+    roundtrip_failures = []
+    for entry in build_corpus(topics, sizes):
+        events = list(iter_pipeline(entry["code"], entry["input"]))
+        final = next((e["payload"] for e in events if e["stage"] == "done"), None)
+        row = {"topic": entry["topic"], "size": entry["size"], "events": len(events), "stream": {}, "final": {}}
+        for encoding in ("json", "columnar"):
+            for coding in codings:
+                ms, size = _cpu_ms(lambda: _stream_bytes(events, encoding, coding), repeat)
+                row["stream"][f"{encoding}+{coding}"] = {"bytes": size, "cpu_ms": ms}
+        if final is not None:
+            for encoding in available_encodings():
+                for coding in codings:
+                    ms, size = _cpu_ms(lambda: _final_bytes(final, encoding, coding), repeat)
+                    row["final"][f"{encoding}+{coding}"] = {"bytes": size, "cpu_ms": ms}
+            if not _roundtrip_ok(final):
+                roundtrip_failures.append(f"{entry['topic']}/{entry['size']}")
+        rows.append(row)
+    return {
+        "python": sys.version.split()[0],
+        "encodings": available_encodings(),
+        "codings": codings,
+        "results": rows,
+        "roundtrip_failures": roundtrip_failures,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bytes on the wire and encode CPU per topic and format")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small", "medium"])
+    parser.add_argument("--topics", nargs="+", choices=list(TOPICS), default=list(TOPICS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", help="also write the JSON report here")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.topics, args.repeat)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    sys.exit(1 if report["roundtrip_failures"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@
 from typing import List, Dict, Any
 import re
 
+from engines.array_runtime_tracer import trace_array_runtime
+
 def detect_dict_variables(code: str) -> List[str]:
     """
     Detect dictionary declarations like:
@@ -75,16 +77,44 @@ def simulate_array_operations(code: str, input_array: List[int]) -> Dict[str, An
         "dict_vars": dict_vars
     }
 
-def analyze_array_code(code: str, sample_input: List[int] = None) -> Dict[str, Any]:
+def analyze_array_code(code: str, sample_input: List[int] = None, stdin: str = "") -> Dict[str, Any]:
     """
     Wrapper for /process endpoint.
-    If frontend does not provide actual array input,
-    we simulate with a placeholder array of size 10.
+    Runs the code once with list index accesses instrumented
+    (engines/array_runtime_tracer.py): real indices, lengths, values and
+    out-of-bounds accesses with line numbers.
+    If the code cannot run (syntax error, timeout), falls back to the static
+    simulation with a placeholder array of size 10.
     """
-    if sample_input is None:
-        sample_input = list(range(10))
+    trace = trace_array_runtime(code, stdin)
+    if "error" in trace:
+        if sample_input is None:
+            sample_input = list(range(10))
+        static = simulate_array_operations(code, sample_input)
+        static["mode"] = "static"
+        static["runtime_error"] = trace
+        return static
+
+    timeline = []
+    for event in trace["events"]:
+        where = event.get("slice", event.get("index"))
+        timeline.append({
+            **event,
+            "note": f"{event['op'].capitalize()} {event['variable']}[{where}] (len {event['length']}) at line {event['line']}",
+        })
 
-    return simulate_array_operations(code, sample_input)
+    return {
+        "mode": "runtime",
+        "timeline": timeline,
+        "boundary_issues": trace["issues"],
+        "var_names": trace["var_names"],
+        "dict_vars": detect_dict_variables(code),
+        "accesses_total": trace["accesses_total"],
+        "events_truncated": trace["events_truncated"],
+        "exception": trace["exception"],
+        "stdout": trace["stdout"],
+        "elapsed_ms": trace["elapsed_ms"],
+    }
 
 
 
@@ -0,0 +1,68 @@
+# backend/engines/array_runtime_tracer.py
+import json
+import os
+import subprocess
+from typing import Any, Dict
+
+# accesses recorded per run; later accesses are only counted and bounds-checked
+ARRAY_TRACE_MAX_EVENTS = int(os.getenv("DECAPSULE_ARRAY_TRACE_MAX_EVENTS", "500"))
+
+_WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "array_trace_worker.py")
+_worker_source = None
+
+
+def _get_worker_source() -> str:
+    global _worker_source
+    if _worker_source is None:
+        with open(_WORKER_PATH, "r", encoding="utf-8") as f:
+            _worker_source = f.read()
+    return _worker_source
+
+
+def trace_array_runtime(
+    code: str,
+    stdin: str = "",
+    max_events: int = ARRAY_TRACE_MAX_EVENTS,
+    timeout: int = 3,
+    measure_baseline: bool = False,
+) -> Dict[str, Any]:
+    """
+    Run the code once in an isolated worker with every `name[index]` on a
+    list instrumented. Returns dict:
+    {
+      "events": [{"op", "variable", "index" | "slice", "length", "line", "value" | "old"}],
+      "issues": [{"variable", "index", "length", "line", "op", "error"}],   # real OOB accesses
+      "accesses_total", "events_truncated", "var_names", "stdout",
+      "exception": {"type", "message", "line"} | None,
+      "elapsed_ms", "baseline_ms" (measure_baseline only)
+    }
+    or {"error": ...} when the worker could not run the code.
+    """
+    payload = json.dumps({
+        "code": code,
+        "stdin": stdin,
+        "max_events": max_events,
+        "baseline": measure_baseline,
+    })
+    try:
+        proc = subprocess.run(
+            # -I: no user site / PYTHONPATH / cwd on sys.path; code comes in on stdin
+            ["python", "-I", "-c", _get_worker_source()],
+            input=payload,
+            capture_output=True,
+            timeout=timeout * (2 if measure_baseline else 1),
+            check=False,
+            text=True
+        )
+    except subprocess.TimeoutExpired:
+        return {"error": "timeout", "message": "Execution timed out (possible infinite loop)"}
+    except Exception as e:
+        return {"error": "execution_failed", "message": str(e)}
+
+    lines = proc.stdout.strip().splitlines()
+    if not lines:
+        return {"error": "no output", "stderr": proc.stderr.strip()[-2000:]}
+    try:
+        return json.loads(lines[-1])
+    except Exception as e:
+        return {"error": f"json-parse-failed: {e}", "raw_stdout": proc.stdout[-2000:]}
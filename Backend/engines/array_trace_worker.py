@@ -0,0 +1,197 @@
+# backend/engines/array_trace_worker.py
+# Isolated worker for engines/array_runtime_tracer.py.
+# Runs as `python -I -c <this source>` and never imports the backend:
+# - reads {"code", "stdin", "max_events", "baseline"} as JSON on stdin
+# - rewrites every `name[index]` so the index goes through _decap_index_
+#   (one leading underscore: dunder names would be mangled inside classes)
+# - runs the module once and prints a single JSON result on the real stdout
+import ast
+import builtins
+import io
+import json
+import sys
+import time
+import traceback
+
+USER_FILE = "<user_code>"
+MAX_ISSUES = 50
+MAX_VALUE_CHARS = 80
+MAX_STDOUT = 10000
+
+
+class SubscriptRewriter(ast.NodeTransformer):
+    """
+    a[i]      -> a[_decap_index_(a, i, "a", line, "load")]
+    a[i] = v  -> a[_decap_index_(a, i, "a", line, "store")] = v
+    a[i:j]    -> a[_decap_index_(a, slice(i, j, None), "a", line, "load")]
+    Only plain names are rewritten: evaluating them twice has no side effects.
+    """
+
+    def visit_Subscript(self, node):
+        self.generic_visit(node)
+        if not isinstance(node.value, ast.Name):
+            return node
+
+        index = node.slice
+        if isinstance(index, ast.Slice):
+            index = ast.Call(
+                func=ast.Name("slice", ast.Load()),
+                args=[part or ast.Constant(None) for part in (index.lower, index.upper, index.step)],
+                keywords=[],
+            )
+        elif isinstance(index, ast.Tuple) and any(isinstance(e, ast.Slice) for e in index.elts):
+            return node  # multi-dimensional slicing is not a list access
+
+        if isinstance(node.ctx, ast.Load):
+            op = "load"
+        elif isinstance(node.ctx, ast.Store):
+            op = "store"
+        else:
+            op = "del"
+
+        node.slice = ast.Call(
+            func=ast.Name("_decap_index_", ast.Load()),
+            args=[
+                ast.Name(node.value.id, ast.Load()),
+                index,
+                ast.Constant(node.value.id),
+                ast.Constant(node.lineno),
+                ast.Constant(op),
+            ],
+            keywords=[],
+        )
+        return node
+
+
+def _short_repr(value):
+    try:
+        text = repr(value)
+    except Exception:
+        return "<unreprable>"
+    return text if len(text) <= MAX_VALUE_CHARS else text[:MAX_VALUE_CHARS] + "…"
+
+
+def make_hook(max_events):
+    events = []
+    issues = []
+    var_names = set()
+    total = 0
+    recording = max_events > 0
+
+    def record(event):
+        nonlocal recording
+        var_names.add(event["variable"])
+        events.append(event)
+        recording = len(events) < max_events
+
+    def _decap_index_(container, index, name, line, op):
+        nonlocal total
+        if type(container) is not list:
+            return index
+        total += 1
+
+        if type(index) is int:
+            n = len(container)
+            if -n <= index < n:
+                # hot path once the event budget is spent: count and return
+                if recording:
+                    event = {"op": op, "variable": name, "index": index, "length": n, "line": line}
+                    if index < 0:
+                        event["negative"] = True
+                    if op != "del":
+                        # for stores this is the value being overwritten
+                        event["value" if op == "load" else "old"] = _short_repr(container[index])
+                    record(event)
+                return index
+
+            if len(issues) < MAX_ISSUES:
+                issues.append({
+                    "variable": name,
+                    "index": index,
+                    "length": n,
+                    "line": line,
+                    "op": op,
+                    "error": "Index out of bounds",
+                })
+            if recording:
+                record({"op": op, "variable": name, "index": index, "length": n, "line": line, "out_of_bounds": True})
+        elif type(index) is slice and recording:
+            record({
+                "op": op,
+                "variable": name,
+                "slice": [index.start, index.stop, index.step],
+                "length": len(container),
+                "line": line,
+            })
+        return index
+
+    def summary():
+        return {
+            "events": events,
+            "issues": issues,
+            "accesses_total": total,
+            "events_truncated": total > len(events),
+            "var_names": sorted(var_names),
+        }
+
+    return _decap_index_, summary
+
+
+def _user_exception(exc):
+    line = None
+    for frame in traceback.extract_tb(exc.__traceback__):
+        if frame.filename == USER_FILE:
+            line = frame.lineno
+    return {"type": type(exc).__name__, "message": str(exc), "line": line}
+
+
+def _run(code_obj, extra_globals, stdin):
+    user_globals = {"__name__": "__main__", "__builtins__": builtins}
+    user_globals.update(extra_globals)
+    user_stdout = io.StringIO()
+    sys.stdin = io.StringIO(stdin)
+    sys.stdout = user_stdout
+    exception = None
+    start = time.perf_counter()
+    try:
+        exec(code_obj, user_globals)
+    except BaseException as e:  # SystemExit / KeyboardInterrupt from user code too
+        exception = _user_exception(e)
+    finally:
+        elapsed = time.perf_counter() - start
+        sys.stdout = sys.__stdout__
+    return exception, elapsed, user_stdout.getvalue()
+
+
+def main():
+    payload = json.loads(sys.stdin.read())
+    code = payload["code"]
+
+    try:
+        tree = ast.parse(code, USER_FILE)
+    except SyntaxError as e:
+        print(json.dumps({"error": f"syntax error: {e.msg} (line {e.lineno})"}))
+        return
+
+    result = {}
+    if payload.get("baseline"):
+        # same module without instrumentation, for the overhead measurement
+        _, plain_elapsed, _ = _run(compile(tree, USER_FILE, "exec"), {}, payload.get("stdin", ""))
+        result["baseline_ms"] = round(plain_elapsed * 1000, 3)
+
+    tree = ast.fix_missing_locations(SubscriptRewriter().visit(tree))
+    hook, summary = make_hook(payload.get("max_events", 500))
+    exception, elapsed, stdout = _run(
+        compile(tree, USER_FILE, "exec"), {"_decap_index_": hook}, payload.get("stdin", "")
+    )
+
+    result.update(summary())
+    result.update({
+        "stdout": stdout[:MAX_STDOUT],
+        "exception": exception,
+        "elapsed_ms": round(elapsed * 1000, 3),
+    })
+    print(json.dumps(result, default=repr))
+
+
+main()
@@ -0,0 +1,249 @@
+# backend/engines/complexity_engine.py
+# Empirical time complexity of the entry function: the isolated worker
+# (engines/complexity_worker.py) times it on inputs scaled from the literal
+# call args, and the timings are fitted against O(1) ... O(2^n) here.
+import json
+import math
+import os
+import subprocess
+from typing import Any, Dict, List, Optional
+
+from engines.entry_extractor import extract_entry_points
+
+# "1" runs the `complexity` stage for requests that don't say; it costs up to the
+# budget below (holding a sandbox slot), so it is opt-in: `"complexity": true`
+COMPLEXITY_ENABLED = os.getenv("DECAPSULE_COMPLEXITY", "0") == "1"
+# total seconds the worker may spend timing one function (the subprocess gets a little more)
+COMPLEXITY_BUDGET_S = float(os.getenv("DECAPSULE_COMPLEXITY_BUDGET_S", "2.0"))
+# largest input size tried
+COMPLEXITY_MAX_N = int(os.getenv("DECAPSULE_COMPLEXITY_MAX_N", "65536"))
+
+def complexity_requested(flag: Optional[bool]) -> bool:
+    """A request's `complexity` field, or the server default when it is unset."""
+    return COMPLEXITY_ENABLED if flag is None else flag
+
+
+# fewer points than this is reported as "insufficient data"
+MIN_POINTS = 4
+# a more complex model must beat a simpler one by this factor (plus the
+# absolute timing noise allowance) to be chosen
+SIMPLER_MODEL_SLACK = 1.25
+NOISE_ALLOWANCE = 0.1
+# points faster than this multiple of the fastest one are call overhead
+NOISE_FLOOR_FACTOR = 3
+
+# simplest first
+MODELS = [
+    ("O(1)", lambda n: 0.0),
+    ("O(log n)", lambda n: math.log2(n)),
+    ("O(n)", lambda n: float(n)),
+    ("O(n log n)", lambda n: n * math.log2(n)),
+    ("O(n^2)", lambda n: float(n) ** 2),
+    ("O(n^3)", lambda n: float(n) ** 3),
+]
+# fitted separately as t ~ k * c^n, reported with its base c
+EXPONENTIAL = "O(2^n)"
+
+_WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "complexity_worker.py")
+_worker_source = None
+
+
+def _get_worker_source() -> str:
+    global _worker_source
+    if _worker_source is None:
+        with open(_WORKER_PATH, "r", encoding="utf-8") as f:
+            _worker_source = f.read()
+    return _worker_source
+
+
+def _fit(ns: List[int], ts: List[float], f) -> Optional[float]:
+    """
+    Weighted least squares for t ~ a * f(n) + b (a, b >= 0), weights 1/t^2 so
+    every point counts by its relative error. Returns the RMS relative error,
+    or None when the model does not apply (overflow, negative slope).
+    """
+    try:
+        xs = [f(n) for n in ns]
+    except OverflowError:
+        return None
+    if any(math.isinf(x) for x in xs):
+        return None
+    ws = [1.0 / (t * t) for t in ts]
+
+    sw = sum(ws)
+    sx = sum(w * x for w, x in zip(ws, xs))
+    sy = sum(w * t for w, t in zip(ws, ts))
+    sxx = sum(w * x * x for w, x in zip(ws, xs))
+    sxy = sum(w * x * t for w, x, t in zip(ws, xs, ts))
+    det = sw * sxx - sx * sx
+    if det <= 0 or all(x == 0 for x in xs):
+        a, b = 0.0, sy / sw
+    else:
+        a = (sw * sxy - sx * sy) / det
+        b = (sy - a * sx) / sw
+        if a < 0:
+            return None
+        if b < 0:
+            # through the origin
+            a, b = sxy / sxx, 0.0
+    errors = [((a * x + b) - t) / t for x, t in zip(xs, ts)]
+    return math.sqrt(sum(e * e for e in errors) / len(errors))
+
+
+def _fit_exponential(ns: List[int], ts: List[float]):
+    """(RMS relative error, base c) for t ~ k * c^n, from a line through (n, ln t)."""
+    ys = [math.log(t) for t in ts]
+    mx, my = sum(ns) / len(ns), sum(ys) / len(ys)
+    var = sum((n - mx) ** 2 for n in ns)
+    if var == 0:
+        return None, None
+    slope = sum((n - mx) * (y - my) for n, y in zip(ns, ys)) / var
+    if slope <= 0:
+        return None, None
+    intercept = my - slope * mx
+    try:
+        errors = [(math.exp(intercept + slope * n) - t) / t for n, t in zip(ns, ts)]
+    except OverflowError:
+        return None, None
+    return math.sqrt(sum(e * e for e in errors) / len(errors)), math.exp(slope)
+
+
+def _loglog_exponent(ns: List[int], ts: List[float]) -> Optional[float]:
+    """Slope of log t over log n on the larger half of the points."""
+    half = len(ns) // 2
+    xs = [math.log(n) for n in ns[half:]]
+    ys = [math.log(t) for t in ts[half:]]
+    if len(xs) < 2:
+        return None
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    var = sum((x - mx) ** 2 for x in xs)
+    if var == 0:
+        return None
+    return round(sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / var, 2)
+
+
+def fit_complexity(points: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    points: [{"n", "seconds"}] -> {"best", "confidence", "confidence_label", "models", "exponent"}
+    """
+    usable = [p for p in points if p["seconds"] > 0]
+    if usable:
+        # tiny inputs only measure call overhead: fit above that floor when
+        # enough points are left (an O(1) function never leaves it)
+        floor = min(p["seconds"] for p in usable)
+        above = [p for p in usable if p["seconds"] >= NOISE_FLOOR_FACTOR * floor]
+        if len(above) >= MIN_POINTS:
+            usable = above
+    ns = [p["n"] for p in usable]
+    ts = [p["seconds"] for p in usable]
+    if len(usable) < MIN_POINTS:
+        return {
+            "best": None,
+            "confidence": 0.0,
+            "confidence_label": "insufficient data",
+            "models": [],
+            "exponent": None,
+            "fitted_points": len(usable),
+        }
+
+    models = []
+    for name, f in MODELS:
+        error = _fit(ns, ts, f)
+        if error is not None:
+            models.append({"model": name, "error": round(error, 4)})
+    error, base = _fit_exponential(ns, ts)
+    if error is not None:
+        models.append({"model": EXPONENTIAL, "error": round(error, 4), "base": round(base, 3)})
+
+    lowest = min(m["error"] for m in models)
+    # simplest model that is about as good as the best one
+    chosen = next(m for m in models if m["error"] <= lowest * SIMPLER_MODEL_SLACK + NOISE_ALLOWANCE)
+    others = [m["error"] for m in models if m is not chosen]
+    runner_up = min(others) if others else 1.0
+
+    separation = max(0.0, 1.0 - chosen["error"] / runner_up) if runner_up > 0 else 0.0
+    coverage = min(1.0, len(usable) / 8)
+    goodness = max(0.0, 1.0 - chosen["error"])
+    confidence = round(separation * coverage * goodness, 2)
+    label = "high" if confidence >= 0.5 else "medium" if confidence >= 0.2 else "low"
+
+    return {
+        "best": chosen["model"],
+        "confidence": confidence,
+        "confidence_label": label,
+        "models": models,
+        "exponent": _loglog_exponent(ns, ts),
+        "fitted_points": len(usable),
+    }
+
+
+def analyze_complexity(
+    code: str,
+    stdin: str = "",
+    budget_s: float = COMPLEXITY_BUDGET_S,
+    max_n: int = COMPLEXITY_MAX_N,
+) -> Dict[str, Any]:
+    """
+    Returns dict:
+    {
+      "entry": "fib", "metric": "time",
+      "points": [{"n", "seconds", "calls"}], "scaled_args": [0], "arg_kinds": ["n"],
+      "best": "O(2^n)", "confidence": 0.83, "confidence_label": "high",
+      "models": [{"model", "error", "base" (exponential only)}], "exponent": 1.9, "fitted_points",
+      "stop_reason": "budget" | "point_cap" | "max_n" | "<exception> at n=...",
+      "budget_s", "elapsed_ms"
+    }
+    or {"error": ...} when there is nothing to measure.
+    """
+    info = extract_entry_points(code)
+    entry = info["entry"]
+    if "error" in info:
+        return {"error": "syntax_error", "message": info["error"]}
+    if entry is None or info["entry_args"] is None:
+        return {"error": "no_literal_call", "message": "No top-level call with literal arguments to scale."}
+
+    payload = json.dumps({
+        "code": code,
+        "stdin": stdin,
+        "entry": entry,
+        "args": repr(info["entry_args"]),
+        "budget_s": budget_s,
+        "point_cap_s": budget_s / 4,
+        "max_n": max_n,
+    })
+    try:
+        proc = subprocess.run(
+            # -I: no user site / PYTHONPATH / cwd on sys.path; code comes in on stdin
+            ["python", "-I", "-c", _get_worker_source()],
+            input=payload,
+            capture_output=True,
+            # module run + the last point may overshoot the budget a little
+            timeout=budget_s * 1.5 + 1,
+            check=False,
+            text=True
+        )
+    except subprocess.TimeoutExpired:
+        return {"error": "timeout", "message": f"Complexity run exceeded its {budget_s}s budget"}
+    except Exception as e:
+        return {"error": "execution_failed", "message": str(e)}
+
+    lines = proc.stdout.strip().splitlines()
+    if not lines:
+        return {"error": "no output", "stderr": proc.stderr.strip()[-2000:]}
+    try:
+        result = json.loads(lines[-1])
+    except Exception as e:
+        return {"error": f"json-parse-failed: {e}", "raw_stdout": proc.stdout[-2000:]}
+    if "error" in result:
+        return result
+    if not result["scaled_args"]:
+        return {"error": "nothing_to_scale", "entry": entry, "message": "No argument grows with the input size."}
+
+    fit = fit_complexity(result["points"])
+    return {
+        "entry": entry,
+        "metric": "time",
+        **result,
+        **fit,
+        "budget_s": budget_s,
+    }
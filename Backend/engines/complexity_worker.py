@@ -0,0 +1,272 @@
+# backend/engines/complexity_worker.py
+# Isolated worker for engines/complexity_engine.py.
+# Runs as `python -I -c <this source>` and never imports the backend:
+# - reads {"code", "entry", "args" (repr of the literal call args), "budget_s",
+#   "point_cap_s", "max_n"} as JSON on stdin
+# - runs the module once (its own output is discarded), then calls the entry
+#   function on inputs scaled from the literal args, doubling n each round
+#   (small steps once the growth looks exponential),
+#   until a point takes longer than point_cap_s or the budget is spent
+# - prints a single JSON result on the real stdout
+import ast
+import copy
+import io
+import json
+import random
+import sys
+import time
+
+USER_FILE = "<user_code>"
+START_N = 2
+# a timing batch runs until it takes at least this long
+MIN_BATCH_S = 0.002
+BATCHES = 3
+# t(2n) / t(n) above this switches from doubling n to small additive steps
+SUPERPOLY_RATIO = 16
+
+
+def _is_number_list(value):
+    return isinstance(value, list) and value and all(type(v) in (int, float) for v in value)
+
+
+def _scaler(value):
+    """
+    (kind, build(n, rng)) for an arg that grows with n, or None to keep it constant.
+    """
+    if type(value) is list:
+        if not value:
+            return "list", lambda n, rng: list(range(n))
+        if all(isinstance(row, list) for row in value):
+            width = len(value[0]) if value[0] else 0
+            square = width == len(value)
+            cells = [c for row in value for c in row] or [0]
+
+            def grid(n, rng):
+                cols = n if square else width
+                return [[rng.choice(cells) for _ in range(cols)] for _ in range(n)]
+            return "grid", grid
+        if _is_number_list(value):
+            lo, hi = min(value), max(value)
+            ordered = value == sorted(value)
+            if all(type(v) is int for v in value):
+                span = max(hi - lo, 1)
+
+                def ints(n, rng):
+                    # keep the value range proportional to n (duplicates stay as rare as in the sample)
+                    scale = max(1, n // max(len(value), 1))
+                    out = [rng.randint(lo, lo + span * scale) for _ in range(n)]
+                    return sorted(out) if ordered else out
+                return "list", ints
+
+            def floats(n, rng):
+                out = [rng.uniform(lo, hi) for _ in range(n)]
+                return sorted(out) if ordered else out
+            return "list", floats
+        items = list(value)
+        return "list", lambda n, rng: [copy.deepcopy(rng.choice(items)) for _ in range(n)]
+    if type(value) is str:
+        alphabet = sorted(set(value)) or ["a"]
+        return "str", lambda n, rng: "".join(rng.choice(alphabet) for _ in range(n))
+    return None
+
+
+def build_plan(args):
+    """Per arg: ("const", value) | ("len", index of the sequence) | ("n", ratio) | (kind, builder)."""
+    plan = []
+    sequences = []
+    for i, value in enumerate(args):
+        scaler = _scaler(value)
+        if scaler is not None:
+            sequences.append(i)
+        plan.append(scaler)
+
+    out = []
+    if sequences:
+        lengths = {len(args[i]): i for i in sequences}
+        for i, value in enumerate(args):
+            if plan[i] is not None:
+                out.append(plan[i])
+            elif type(value) is int and value in lengths and value > 0:
+                # f(arr, len(arr)): the length follows its sequence
+                out.append(("len", lengths[value]))
+            elif type(value) is int and lengths and value == max(lengths) - 1:
+                # f(arr, 0, len(arr) - 1): last index of the sequence
+                out.append(("last", lengths[value + 1]))
+            else:
+                out.append(("const", value))
+        return out
+
+    ints = [v for v in args if type(v) is int and v > 0]
+    top = max(ints) if ints else 0
+    for value in args:
+        if type(value) is int and value > 0:
+            out.append(("n", value / top))
+        else:
+            out.append(("const", value))
+    return out
+
+
+def make_args(plan, n, rng):
+    args = [None] * len(plan)
+    for i, (kind, spec) in enumerate(plan):
+        if kind in ("list", "grid", "str"):
+            args[i] = spec(n, rng)
+    for i, (kind, spec) in enumerate(plan):
+        if kind == "const":
+            args[i] = copy.deepcopy(spec)
+        elif kind == "n":
+            args[i] = max(1, round(n * spec))
+        elif kind == "len":
+            args[i] = len(args[spec])
+        elif kind == "last":
+            args[i] = len(args[spec]) - 1
+    return args
+
+
+def module_state(tree):
+    """
+    Module-level names bound to literal containers (memo = {}, dp = []):
+    restored before every call so a memo filled by one call cannot make the
+    next one look O(1).
+    """
+    state = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            try:
+                value = ast.literal_eval(node.value)
+            except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+                continue
+            if isinstance(value, (dict, list, set)):
+                state[node.targets[0].id] = value
+    return state
+
+
+def _reset(user_globals, state, caches):
+    for name, value in state.items():
+        user_globals[name] = copy.deepcopy(value)
+    for cached in caches:
+        cached.cache_clear()
+
+
+def _time_point(func, plan, n, point_cap_s, user_globals, state, caches):
+    """
+    Best per-call time over a few batches. Inputs are rebuilt and module
+    state reset outside the timed region of every call; the wall time of
+    the whole point (building included) is capped by point_cap_s.
+    """
+    rng = random.Random(n)
+    sys.stdout = io.StringIO()  # drop what the previous point printed
+    point_start = time.perf_counter()
+    best = None
+    calls = 0
+    number = 1
+    for _ in range(BATCHES):
+        elapsed = 0.0
+        done = 0
+        for _ in range(number):
+            args = make_args(plan, n, rng)
+            _reset(user_globals, state, caches)
+            start = time.perf_counter()
+            func(*args)
+            elapsed += time.perf_counter() - start
+            done += 1
+            if time.perf_counter() - point_start > point_cap_s:
+                break
+        calls += done
+        per_call = elapsed / done
+        best = per_call if best is None else min(best, per_call)
+        if time.perf_counter() - point_start > point_cap_s / 2:
+            break
+        if elapsed < MIN_BATCH_S:
+            # too fast to time in one call: batch more calls next round
+            number = min(number * max(2, int(MIN_BATCH_S / max(elapsed, 1e-7))), 2000)
+    return best, calls, time.perf_counter() - point_start
+
+
+def main():
+    payload = json.loads(sys.stdin.read())
+    budget = payload["budget_s"]
+    point_cap = payload["point_cap_s"]
+    max_n = payload["max_n"]
+    started = time.perf_counter()
+
+    user_globals = {"__name__": "__main__"}
+    sys.stdin = io.StringIO(payload.get("stdin", ""))
+    sys.stdout = io.StringIO()
+    try:
+        tree = ast.parse(payload["code"], USER_FILE)
+        exec(compile(tree, USER_FILE, "exec"), user_globals)
+    except BaseException as e:
+        sys.stdout = sys.__stdout__
+        print(json.dumps({"error": "module_failed", "message": f"{type(e).__name__}: {e}"}))
+        return
+
+    func = user_globals.get(payload["entry"])
+    if not callable(func):
+        sys.stdout = sys.__stdout__
+        print(json.dumps({"error": "entry_not_found", "entry": payload["entry"]}))
+        return
+
+    args = ast.literal_eval(payload["args"])
+    plan = build_plan(args)
+    state = module_state(tree)
+    caches = [v for v in user_globals.values() if callable(getattr(v, "cache_clear", None))]
+    scaled = [i for i, (kind, _) in enumerate(plan) if kind != "const"]
+    points = []
+    stop_reason = "max_n"
+    n = START_N
+    step = 0
+    limit = sys.getrecursionlimit()
+    while n <= max_n:
+        if time.perf_counter() - started > budget:
+            stop_reason = "budget"
+            break
+        try:
+            seconds, calls, spent = _time_point(func, plan, n, point_cap, user_globals, state, caches)
+        except RecursionError:
+            stop_reason = f"recursion limit ({limit}) at n={n}"
+            break
+        except Exception as e:
+            stop_reason = f"{type(e).__name__} at n={n}: {e}"
+            break
+        point = {"n": n, "seconds": seconds, "calls": calls}
+        points.append(point)
+        points.sort(key=lambda p: p["n"])
+        below = points[points.index(point) - 1] if points[0] is not point else None
+        ratio = None
+        if below is not None and below["seconds"] > 0:
+            ratio = seconds / below["seconds"]
+        if not step and ratio is not None and ratio > SUPERPOLY_RATIO:
+            # faster than n^4 per doubling: probably exponential, so fill in the
+            # last doubling with small additive steps and carry on with them
+            step = max(1, below["n"] // 8)
+            next_n = below["n"] + step
+        else:
+            next_n = n + step if step else n * 2
+        while any(p["n"] == next_n for p in points):
+            next_n += step
+
+        # predict the next point from the last growth rate (per unit of n)
+        # and stop before it would break the budget
+        growth = 2.0
+        if ratio is not None:
+            growth = max(growth, ratio ** ((next_n - n) / (n - below["n"])))
+        # a point stops batching at point_cap, so only its single call grows unbounded
+        predicted = min(spent * growth, point_cap + seconds * growth)
+        remaining = budget - (time.perf_counter() - started)
+        if spent > point_cap or predicted > remaining:
+            stop_reason = "point_cap" if spent > point_cap else "budget"
+            break
+        n = next_n
+
+    sys.stdout = sys.__stdout__
+    print(json.dumps({
+        "points": points,
+        "scaled_args": scaled,
+        "arg_kinds": [kind for kind, _ in plan],
+        "stop_reason": stop_reason,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }))
+
+
+main()
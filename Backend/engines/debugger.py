@@ -1,62 +1,43 @@
 # engines/debugger.py
+import ast
+from typing import Any, Dict, List, Optional, Sequence, Type
 
-def analyze_code_for_issues(code: str):
-    """
-    OLD FUNCTION — your original static analysis logic.
-    Returns JUST a list.
-    """
-    issues = []
+from engines.static_rules import Rule, run_rules
 
-    if "return" in code and "if" not in code and "for" not in code:
-        issues.append("Suspicious return statement without flow control.")
 
-    if "arr[" in code and "len(" not in code:
-        issues.append("Possible array index out of range.")
-
-    if "while" in code and "break" not in code:
-        issues.append("Possible infinite loop: while loop without break.")
+def find_issues(code: str, rules: Optional[Sequence[Type[Rule]]] = None) -> List[Dict[str, Any]]:
+    """
+    Run the static rule registry (engines/static_rules.py) over the code in
+    one AST pass. Each issue: {"rule", "type", "severity", "detail", "line", "end_line"}.
+    Code that does not parse yields a single syntax_error issue.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return [{
+            "rule": "syntax",
+            "type": "syntax_error",
+            "severity": "critical",
+            "detail": f"Syntax error: {e.msg}",
+            "line": e.lineno,
+            "end_line": getattr(e, "end_lineno", None) or e.lineno,
+        }]
+    return run_rules(tree, rules)
 
-    if "fact(" in code and "n == 0" not in code:
-        issues.append("Recursion missing base case (n == 0).")
 
-    return issues
+def analyze_code_for_issues(code: str):
+    """
+    OLD FUNCTION — kept for /fix.
+    Returns JUST a list of messages.
+    """
+    return [issue["detail"] for issue in find_issues(code)]
 
 
 def debug_code_static(code: str):
     """
     NEW WRAPPER — ensures /process gets clean JSON.
-    Converts simple strings into structured issue objects.
+    Structured issue objects with severity, type and line span.
     """
-    raw = analyze_code_for_issues(code)
-    
-    structured = []
-
-    for issue in raw:
-        if "infinite loop" in issue:
-            structured.append({
-                "type": "infinite_loop",
-                "detail": issue,
-                "severity": "high"
-            })
-        elif "array index" in issue:
-            structured.append({
-                "type": "index_error",
-                "detail": issue,
-                "severity": "medium"
-            })
-        elif "base case" in issue:
-            structured.append({
-                "type": "missing_base_case",
-                "detail": issue,
-                "severity": "critical"
-            })
-        else:
-            structured.append({
-                "type": "general_warning",
-                "detail": issue,
-                "severity": "low"
-            })
-
     return {
-        "issues": structured
+        "issues": find_issues(code)
     }
@@ -1,6 +1,12 @@
 # backend/engines/debugger_rules.py
 from typing import Dict, List, Any
 
+from engines.debugger import find_issues
+from engines.static_rules import IndexAtLenRule, InfiniteWhileRule, LenComparisonRule, UncheckedIndexRule
+
+# static rules that matter for array code (see engines/static_rules.py)
+ARRAY_RULES = (LenComparisonRule, IndexAtLenRule, UncheckedIndexRule, InfiniteWhileRule)
+
 def detect_common_array_bugs(code: str, analysis: Dict[str, Any]) -> List[Dict[str, Any]]:
     issues = []
 
@@ -9,24 +15,12 @@ def detect_common_array_bugs(code: str, analysis: Dict[str, Any]) -> List[Dict[s
         issues.append({
             "type": "index_error",
             "detail": f"{b['variable']}[{b['index']}] is out of bounds for length {b.get('length','?')}.",
-            "severity": "high"
+            "severity": "high",
+            "line": b.get("line"),
         })
 
-    # 2. Suspicious patterns like i <= len(arr)
-    if "len(" in code and "<=" in code:
-        issues.append({
-            "type": "boundary_condition",
-            "detail": "Possible off-by-one error: using <= with len(array). Use < instead.",
-            "severity": "medium"
-        })
-
-    # 3. Missing base conditions in loops
-    if "while" in code and "break" not in code:
-        issues.append({
-            "type": "potential_infinite_loop",
-            "detail": "While loop has no break condition.",
-            "severity": "low"
-        })
+    # 2. Off-by-one bounds, a[len(a)], indices never checked against len(), while loops without an exit
+    issues.extend(find_issues(code, ARRAY_RULES))
 
     return issues
 
@@ -39,7 +33,17 @@ def detect_common_string_bugs(code: str, analysis: Dict[str, Any]) -> List[Dict[
         issues.append({
             "type": "string_index_error",
             "detail": f"String index {b.get('index')} is out of bounds.",
-            "severity": "medium"
+            "severity": "medium",
+            "line": b.get("line"),
+        })
+
+    # quadratic string building measured by the runtime tracer
+    for p in analysis.get("performance_issues", []):
+        issues.append({
+            "type": "quadratic_concat",
+            "detail": p["hint"],
+            "severity": "medium",
+            "line": p["line"],
         })
 
     return issues
@@ -55,4 +59,6 @@ def detect_common_string_bugs(code: str, analysis: Dict[str, Any]) -> List[Dict[
 
 # Potential infinite loops
 
-# String index errors
\ No newline at end of file
+# String index errors
+
+# Quadratic string building (runtime tracer)
\ No newline at end of file
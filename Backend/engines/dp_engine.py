@@ -46,40 +46,136 @@
 # backend/engines/dp_engine.py
 
 
-from typing import List, Dict, Any
+from bisect import bisect_left
+from typing import List, Dict, Any, Optional
 import ast
+import os
+
+# bounded-snapshot mode: full dp copies kept for the first N improvements,
+# and the quadratic visualization covers at most this many rows
+LIS_MAX_SNAPSHOTS = int(os.getenv("DECAPSULE_LIS_MAX_SNAPSHOTS", "200"))
+LIS_MAX_ROWS = int(os.getenv("DECAPSULE_LIS_MAX_ROWS", "1000"))
+
+# patience mode: tails deltas emitted before the event list is cut
+LIS_MAX_EVENTS = int(os.getenv("DECAPSULE_LIS_MAX_EVENTS", "2000"))
 
 # ------------------------------
 # 1) DP SIMULATION (LIS EXAMPLE)
 # ------------------------------
 
-def simulate_lis_dp(arr: List[int]) -> Dict[str, Any]:
+def simulate_lis_dp(
+    arr: List[int],
+    max_snapshots: Optional[int] = None,
+    max_rows: Optional[int] = None,
+) -> Dict[str, Any]:
     """
     Simulate the classic O(n^2) LIS DP.
+    With max_snapshots / max_rows (bounded-snapshot mode) only the first
+    improvements / rows are visualized; the remaining dp[i] come from the
+    O(n log n) tails recurrence, which yields the same values.
     """
     n = len(arr)
-    if n == 0:
-        return {"final_dp": [], "snapshots": []}
+    bounded = max_snapshots is not None or max_rows is not None
+    rows = n if max_rows is None else min(n, max_rows)
 
     dp = [1] * n
     snapshots: List[Dict[str, Any]] = []
+    tails: List[int] = []  # smallest tail value of an increasing run of length k+1
+    visualizing = True
+    visualized_rows = 0
+    dropped = 0
 
     for i in range(n):
-        for j in range(i):
-            if arr[j] < arr[i]:
-                old_value = dp[i]
-                candidate = dp[j] + 1
-                if candidate > dp[i]:
-                    dp[i] = candidate
-                    snapshots.append({
-                        "i": i,
-                        "j": j,
-                        "old": old_value,
-                        "new": dp[i],
-                        "dp": dp[:],
-                        "reason": f"arr[{j}] < arr[{i}] ({arr[j]} < {arr[i]}) => dp[{i}] = dp[{j}] + 1"
-                    })
-    return {"final_dp": dp, "snapshots": snapshots}
+        if i >= rows:
+            visualizing = False
+
+        if visualizing:
+            for j in range(i):
+                if arr[j] < arr[i]:
+                    old_value = dp[i]
+                    candidate = dp[j] + 1
+                    if candidate > dp[i]:
+                        dp[i] = candidate
+                        if max_snapshots is not None and len(snapshots) >= max_snapshots:
+                            dropped += 1
+                            continue
+                        snapshots.append({
+                            "i": i,
+                            "j": j,
+                            "old": old_value,
+                            "new": dp[i],
+                            # entries past the visualized rows are never shown
+                            "dp": dp[:rows],
+                            "reason": f"arr[{j}] < arr[{i}] ({arr[j]} < {arr[i]}) => dp[{i}] = dp[{j}] + 1"
+                        })
+            visualized_rows = i + 1
+            # finish the row that used up the snapshot budget, then go fast
+            if max_snapshots is not None and len(snapshots) >= max_snapshots:
+                visualizing = False
+        else:
+            # same value the inner loop would find: 1 + longest run ending below arr[i]
+            dp[i] = bisect_left(tails, arr[i]) + 1
+
+        if bounded:
+            pos = dp[i] - 1
+            if pos == len(tails):
+                tails.append(arr[i])
+            elif arr[i] < tails[pos]:
+                tails[pos] = arr[i]
+
+    out = {"final_dp": dp, "snapshots": snapshots}
+    if bounded:
+        out["lis_length"] = len(tails)
+        out["visualized_rows"] = visualized_rows
+        out["snapshots_truncated"] = dropped > 0 or visualized_rows < n
+    return out
+
+
+def simulate_lis_patience(arr: List[int], max_events: Optional[int] = LIS_MAX_EVENTS) -> Dict[str, Any]:
+    """
+    O(n log n) LIS by patience sorting.
+    Each element either extends the tails array or replaces one tail; the
+    events are those deltas ({"i", "value", "pos", "op", "old"}), not copies.
+    The subsequence is rebuilt from predecessor links.
+    """
+    n = len(arr)
+    tail_values: List[int] = []
+    tail_index: List[int] = []
+    parent = [-1] * n
+    events: List[Dict[str, Any]] = []
+
+    for i, value in enumerate(arr):
+        pos = bisect_left(tail_values, value)
+        parent[i] = tail_index[pos - 1] if pos > 0 else -1
+
+        if pos == len(tail_values):
+            op, old = "append", None
+            tail_values.append(value)
+            tail_index.append(i)
+        else:
+            op, old = "replace", tail_values[pos]
+            tail_values[pos] = value
+            tail_index[pos] = i
+
+        if max_events is None or len(events) < max_events:
+            events.append({"i": i, "value": value, "pos": pos, "op": op, "old": old})
+
+    indices: List[int] = []
+    k = tail_index[-1] if tail_index else -1
+    while k != -1:
+        indices.append(k)
+        k = parent[k]
+    indices.reverse()
+
+    return {
+        "mode": "patience",
+        "length": len(indices),
+        "subsequence": [arr[k] for k in indices],
+        "indices": indices,
+        "final_tails": tail_values,
+        "events": events,
+        "events_truncated": max_events is not None and n > max_events,
+    }
 
 
 
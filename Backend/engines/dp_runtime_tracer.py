@@ -52,56 +52,109 @@
 
 # engines/dp_runtime_tracer.py
 # engines/dp_runtime_tracer.py
-import sys
 import copy
 
+from engines.trace_backend import DISABLE, tracing
+
+USER_FILE = "<dp_user_code>"
+
+
+def _discard_print(*args, file=None, **kwargs):
+    """
+    The user's print while tracing: output meant for stdout is dropped. Only
+    this module's globals see it, so traces running in parallel tracer
+    threads never swap the process-wide sys.stdout.
+    """
+    if file is not None:
+        print(*args, file=file, **kwargs)
+
+
+def _is_table(val) -> bool:
+    # STRICT FILTER
+    return (
+        isinstance(val, dict)
+        and bool(val)
+        and all(isinstance(k, (int, str)) and isinstance(v, (int, float)) for k, v in val.items())
+    )
+
+
 def trace_dp_runtime(code: str, entry_func: str, args: list):
+    """
+    Run the module once and trace memo tables only inside the user's own
+    first top-level call of entry_func. entry_func(*args) is called (traced)
+    only when the module never calls it. User prints to stdout are discarded.
+    """
     events = []
     last_snapshot = None
+    runtime_env = {"__name__": "__main__", "print": _discard_print}
+    state = {"active": False, "captured": False, "direct": False, "entry_frame": None}
 
-    def tracer(frame, event, arg):
+    try:
+        module_code = compile(code, USER_FILE, "exec")
+    except SyntaxError as e:
+        return [{"type": "dp_error", "error": str(e)}]
+
+    def on_line(frame):
         nonlocal last_snapshot
 
-        if event == "line":
-            for name, val in frame.f_locals.items():
-                # STRICT FILTER
-                if (
-                    isinstance(val, dict)
-                    and val
-                    and all(isinstance(k, (int, str)) and isinstance(v, (int, float)) for k, v in val.items())
-                ):
-                    snapshot = dict(sorted(val.items()))
-                    if snapshot != last_snapshot:
-                        last_snapshot = copy.deepcopy(snapshot)
-                        events.append({
-                            "type": "dp_update",
-                            "memo_name": str(name),
-                            "table": snapshot
-                        })
-        return tracer
-
-    runtime_env = {}
-
-    sys.settrace(tracer)
+        # memo tables live in locals (memo={} params) or in module globals
+        candidates = list(frame.f_locals.items())
+        local_ids = {id(v) for _, v in candidates}
+        candidates += [
+            (k, v) for k, v in runtime_env.items()
+            if not k.startswith("__") and isinstance(v, dict) and id(v) not in local_ids
+        ]
+        for name, val in candidates:
+            if _is_table(val):
+                snapshot = dict(sorted(val.items()))
+                if snapshot != last_snapshot:
+                    last_snapshot = copy.deepcopy(snapshot)
+                    events.append({
+                        "type": "dp_update",
+                        "memo_name": str(name),
+                        "table": snapshot
+                    })
+
+    def on_return(frame, value, raised):
+        if frame is state["entry_frame"]:
+            # the rest of the module runs untraced
+            state["active"] = False
+            state["captured"] = True
+            state["entry_frame"] = None
+
+    def on_call(frame):
+        if state["active"]:
+            return True
+        if state["captured"]:
+            return DISABLE  # only the first entry call is traced
+        caller = frame.f_back
+        top_level = caller is not None and caller.f_code is module_code
+        if frame.f_code.co_name != entry_func or not (top_level or state["direct"]):
+            return False
+        state["active"] = True
+        state["entry_frame"] = frame
+        return True
+
     try:
-        # CRITICAL: shared globals/locals
-        exec(code, runtime_env, runtime_env)
+        with tracing(USER_FILE, on_call=on_call, on_line=on_line, on_return=on_return):
+            exec(module_code, runtime_env)
 
-        if entry_func not in runtime_env:
-            events.append({
-                "type": "dp_error",
-                "error": f"Entry function '{entry_func}' not found"
-            })
-            return events
+            if not state["captured"]:
+                if entry_func not in runtime_env:
+                    events.append({
+                        "type": "dp_error",
+                        "error": f"Entry function '{entry_func}' not found"
+                    })
+                    return events
 
-        runtime_env[entry_func](*args)
+                # the module never called the entry function itself
+                state["direct"] = True
+                runtime_env[entry_func](*args)
 
     except Exception as e:
         events.append({
             "type": "dp_error",
             "error": str(e)
         })
-    finally:
-        sys.settrace(None)
 
     return events
@@ -0,0 +1,185 @@
+# backend/engines/entry_extractor.py
+# Static (AST-only) discovery of what a snippet runs:
+# top-level function definitions, the calls made at module level, and
+# their arguments as Python literals. Nothing is executed.
+import ast
+from typing import Any, Dict, List, Optional, Tuple
+
+_UNRESOLVED = object()
+
+
+def _is_main_guard(node: ast.stmt) -> bool:
+    """if __name__ == "__main__": ..."""
+    if not isinstance(node, ast.If) or not isinstance(node.test, ast.Compare):
+        return False
+    test = node.test
+    return (
+        isinstance(test.left, ast.Name)
+        and test.left.id == "__name__"
+        and len(test.comparators) == 1
+        and isinstance(test.comparators[0], ast.Constant)
+        and test.comparators[0].value == "__main__"
+    )
+
+
+def _module_statements(tree: ast.Module) -> List[ast.stmt]:
+    """Module-level statements, with the body of a __main__ guard inlined."""
+    out = []
+    for node in tree.body:
+        if _is_main_guard(node):
+            out.extend(node.body)
+        else:
+            out.append(node)
+    return out
+
+
+def _resolve(node: ast.expr, constants: Dict[str, Any]) -> Any:
+    """literal_eval, plus names bound to literals at module level."""
+    if isinstance(node, ast.Name) and node.id in constants:
+        return constants[node.id]
+    if isinstance(node, ast.Starred):
+        return _UNRESOLVED
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return _UNRESOLVED
+
+
+def _assigned_name(node: ast.stmt) -> Optional[Tuple[str, ast.expr]]:
+    if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+        return node.targets[0].id, node.value
+    if isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name) and node.value is not None:
+        return node.target.id, node.value
+    return None
+
+
+def _calls_in(node: ast.AST) -> List[ast.Call]:
+    """Calls inside a module-level statement, in source order (not inside nested defs)."""
+    calls = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            continue
+        if isinstance(current, ast.Call):
+            calls.append(current)
+        stack.extend(reversed(list(ast.iter_child_nodes(current))))
+    return calls
+
+
+def _called_names(func: ast.AST) -> List[str]:
+    return [
+        n.func.id for n in ast.walk(func)
+        if isinstance(n, ast.Call) and isinstance(n.func, ast.Name)
+    ]
+
+
+def extract_entry_points(code: str) -> Dict[str, Any]:
+    """
+    Return dict:
+    {
+      "functions": ["fib", ...],            # top-level defs, in order
+      "calls": [                            # module-level calls of those defs
+        {"func": "fib", "args": [10], "kwargs": {}, "line": 7, "literal": True}, ...
+      ],
+      "constants": {"arr": [3, 1, 5]},      # module-level names bound to literals
+      "entry": "fib" | None,
+      "entry_args": [10] | None,            # None when no literal call was found
+      "error": str                          # only on syntax errors
+    }
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return {
+            "functions": [], "calls": [], "constants": {},
+            "entry": None, "entry_args": None,
+            "error": f"syntax error: {e.msg} (line {e.lineno})",
+        }
+
+    defs = {
+        node.name: node for node in tree.body
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+    }
+    functions = list(defs)
+
+    constants: Dict[str, Any] = {}
+    calls: List[Dict[str, Any]] = []
+    for stmt in _module_statements(tree):
+        if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+
+        for call in _calls_in(stmt):
+            if not (isinstance(call.func, ast.Name) and call.func.id in defs):
+                continue
+            args = [_resolve(a, constants) for a in call.args]
+            kwargs = {k.arg: _resolve(k.value, constants) for k in call.keywords if k.arg}
+            literal = (
+                all(a is not _UNRESOLVED for a in args)
+                and all(v is not _UNRESOLVED for v in kwargs.values())
+                and len(kwargs) == len(call.keywords)
+            )
+            calls.append({
+                "func": call.func.id,
+                "args": [a for a in args if a is not _UNRESOLVED],
+                "kwargs": {k: v for k, v in kwargs.items() if v is not _UNRESOLVED},
+                "line": call.lineno,
+                "literal": literal,
+            })
+
+        # bind after the statement's own calls: `x = f(x)` uses the old x
+        assigned = _assigned_name(stmt)
+        if assigned is not None:
+            name, value = assigned
+            resolved = _resolve(value, constants)
+            if resolved is _UNRESOLVED:
+                constants.pop(name, None)
+            else:
+                constants[name] = resolved
+
+    entry, entry_args = _pick_entry(functions, defs, calls)
+    return {
+        "functions": functions,
+        "calls": calls,
+        "constants": constants,
+        "entry": entry,
+        "entry_args": entry_args,
+    }
+
+
+def _pick_entry(functions: List[str], defs: Dict[str, ast.AST], calls: List[Dict[str, Any]]):
+    # 1) the first function called at module level with literal, positional-only args
+    for call in calls:
+        if call["literal"] and not call["kwargs"]:
+            return call["func"], call["args"]
+    # 2) a function called at module level (args unknown)
+    if calls:
+        return calls[0]["func"], None
+    # 3) a root function: not called by any other top-level function
+    called_elsewhere = set()
+    for name, node in defs.items():
+        called_elsewhere.update(n for n in _called_names(node) if n != name)
+    for name in functions:
+        if name not in called_elsewhere:
+            return name, None
+    return (functions[0] if functions else None), None
+
+
+def find_entry_call(code: str, default_args: Optional[List[Any]] = None) -> Tuple[Optional[str], List[Any]]:
+    """
+    (entry function, args) for the tracers.
+    default_args is used only when no literal top-level call was found.
+    """
+    info = extract_entry_points(code)
+    args = info["entry_args"]
+    if args is None:
+        args = list(default_args or [])
+    return info["entry"], args
+
+
+def call_args_for(code: str, func_name: str) -> List[Any]:
+    """Literal positional args of the first top-level call of func_name ([] if none)."""
+    for call in extract_entry_points(code)["calls"]:
+        if call["func"] == func_name and call["literal"]:
+            return call["args"]
+    return []
@@ -1,6 +1,9 @@
-import sys
 import traceback
 
+from engines.trace_backend import tracing
+
+USER_FILE = "<user_code>"
+
 
 def safe_value(v):
     """Convert any Python value to JSON-safe."""
@@ -30,48 +33,38 @@ def trace_execution(code: str):
     
     frame_history = {}
 
-    def tracer(frame, event, arg):
+    def on_line(frame):
         frame_id = id(frame)
-
-        if event == 'return':
-            if frame_id in frame_history:
-                del frame_history[frame_id]
-            return tracer
-
-        if event != 'line':
-            return tracer
-
         last_locals = frame_history.get(frame_id, {})
 
-        if event == "line":
-            raw_locals = {
-                name: safe_value(value)
-                for name, value in frame.f_locals.items()
-                if name != "__builtins__"
-            }
+        raw_locals = {
+            name: safe_value(value)
+            for name, value in frame.f_locals.items()
+            if name != "__builtins__"
+        }
 
-            changed = diff_locals(last_locals, raw_locals)
+        changed = diff_locals(last_locals, raw_locals)
 
-            events.append({
-                "line_no": frame.f_lineno,
-                "locals_changed": changed,
-                "locals_all": raw_locals
-            })
+        events.append({
+            "line_no": frame.f_lineno,
+            "locals_changed": changed,
+            "locals_all": raw_locals
+        })
 
-            frame_history[frame_id] = raw_locals
+        frame_history[frame_id] = raw_locals
 
-        return tracer
+    def on_return(frame, value, raised):
+        frame_history.pop(id(frame), None)
 
     try:
-        compiled = compile(code, "<user_code>", "exec")
-        sys.settrace(tracer)
-        exec(compiled, {})
-        sys.settrace(None)
+        compiled = compile(code, USER_FILE, "exec")
+        # lines of the user's code only: library frames are never reported
+        with tracing(USER_FILE, on_line=on_line, on_return=on_return) as backend:
+            exec(compiled, {})
 
-        return {"ok": True, "events": events}
+        return {"ok": True, "events": events, "backend": backend}
 
     except Exception as e:
-        sys.settrace(None)
         return {
             "ok": False,
             "error": str(e),
@@ -0,0 +1,232 @@
+# engines/graph_csr.py
+import ast
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+# NumPy is optional (stdlib arrays work everywhere) and slow to import,
+# so it is only loaded when the first graph is built
+_np = None
+
+
+# variable names the graph tracers look for, in priority order
+GRAPH_VARIABLE_NAMES = ("graph", "adj", "edges")
+
+
+class CSRGraph:
+    """
+    Compressed sparse row graph with interned node ids.
+    - labels: index -> original node id (as written by the user)
+    - index: original node id -> index
+    - offsets: neighbors of node i live in neighbors[offsets[i]:offsets[i + 1]]
+    """
+
+    def __init__(self, labels: List[Any], index: Dict[Any, int], offsets, neighbors):
+        self.labels = labels
+        self.index = index
+        self.offsets = offsets
+        self.neighbors = neighbors
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.labels)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.neighbors)
+
+    def neighbors_of(self, node: int) -> List[int]:
+        return self.neighbors[self.offsets[node]:self.offsets[node + 1]].tolist()
+
+    def label_list(self, nodes) -> List[Any]:
+        labels = self.labels
+        return [labels[i] for i in nodes]
+
+
+def _numpy():
+    global _np
+    if _np is None:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:
+            _np = False
+    return _np or None
+
+
+def _to_int_array(values: List[int]):
+    """Offsets or neighbor ids as a compact int array; the dtype fits the largest value stored."""
+    np = _numpy()
+    if np is not None:
+        dtype = np.int32 if max(values, default=0) < 2**31 else np.int64
+        return np.asarray(values, dtype=dtype)
+    return array("q", values)
+
+
+def _intern(node: Any, labels: List[Any], index: Dict[Any, int]) -> int:
+    idx = index.get(node)
+    if idx is None:
+        idx = len(labels)
+        index[node] = idx
+        labels.append(node)
+    return idx
+
+
+def _from_adjacency(items) -> CSRGraph:
+    """items: iterable of (node, neighbors) pairs, keys interned first."""
+    labels: List[Any] = []
+    index: Dict[Any, int] = {}
+
+    items = list(items)
+    for node, _ in items:
+        _intern(node, labels, index)
+
+    rows: Dict[int, List[int]] = {}
+    for node, neis in items:
+        rows[index[node]] = [_intern(nei, labels, index) for nei in neis]
+
+    offsets = [0] * (len(labels) + 1)
+    flat: List[int] = []
+    for i in range(len(labels)):
+        flat.extend(rows.get(i, ()))
+        offsets[i + 1] = len(flat)
+
+    return CSRGraph(labels, index, _to_int_array(offsets), _to_int_array(flat))
+
+
+def _from_edges(edges, directed: bool) -> CSRGraph:
+    labels: List[Any] = []
+    index: Dict[Any, int] = {}
+
+    src: List[int] = []
+    dst: List[int] = []
+    for edge in edges:
+        u = _intern(edge[0], labels, index)
+        v = _intern(edge[1], labels, index)
+        src.append(u)
+        dst.append(v)
+        if not directed:
+            src.append(v)
+            dst.append(u)
+
+    # counting sort by source keeps the input order of each node's edges
+    n = len(labels)
+    offsets = [0] * (n + 1)
+    for u in src:
+        offsets[u + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+
+    cursor = offsets[:-1]
+    flat = [0] * len(src)
+    for u, v in zip(src, dst):
+        flat[cursor[u]] = v
+        cursor[u] += 1
+
+    return CSRGraph(labels, index, _to_int_array(offsets), _to_int_array(flat))
+
+
+def _looks_like_edge_list(graph: list, hint: Optional[str] = None) -> bool:
+    if not graph or not all(isinstance(e, (list, tuple)) and len(e) in (2, 3) for e in graph):
+        return False
+    if any(isinstance(e, tuple) for e in graph):
+        return True
+    # [[1, 2], [0], ...] style adjacency only references valid positions
+    n = len(graph)
+    if any(not isinstance(v, int) or v < 0 or v >= n for e in graph for v in e[:2]):
+        return True
+    # in range either way: how the user's code reads the list decides
+    if hint is not None:
+        return hint == "edges"
+    lengths = {len(e) for e in graph}
+    if lengths == {2}:
+        # every row a pair: [[0, 1], [1, 2], [2, 0]] is three edges
+        return True
+    if lengths == {3}:
+        # triples are weighted edges unless every entry is a node id and
+        # together they name every row, as in a 4-clique's adjacency rows
+        values = {v for e in graph for v in e}
+        return not (all(isinstance(v, int) and 0 <= v < n for v in values) and len(values) == n)
+    # rows of different lengths are neighbor lists
+    return False
+
+
+def representation_hint(code: str, name: str) -> Optional[str]:
+    """
+    "edges" if the code unpacks rows of `name` (for u, v in graph), "adjacency"
+    if it indexes it by a variable (graph[node]), None when it does neither.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+    indexed = False
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, (ast.For, ast.comprehension))
+            and isinstance(node.target, ast.Tuple)
+            and isinstance(node.iter, ast.Name)
+            and node.iter.id == name
+        ):
+            return "edges"
+        if (
+            isinstance(node, ast.Subscript)
+            and isinstance(node.value, ast.Name)
+            and node.value.id == name
+            and not isinstance(node.slice, (ast.Constant, ast.Slice))
+        ):
+            indexed = True
+    return "adjacency" if indexed else None
+
+
+def build_csr(
+    graph: Any, kind: Optional[str] = None, directed: bool = False, hint: Optional[str] = None
+) -> CSRGraph:
+    """
+    Convert user graph data into a CSRGraph.
+    Accepts:
+      - dict adjacency: {"A": ["B", "C"], ...}
+      - list-of-lists adjacency: [[1, 2], [0], [0]]
+      - edge lists: [(0, 1), (1, 2)] or [(u, v, w), ...]
+    kind: "adjacency" | "edges" | None (auto-detect)
+    hint: representation_hint() of the user's code, for lists that fit both
+    directed: only used for edge lists (adjacency is always taken as written)
+    """
+    if isinstance(graph, dict):
+        return _from_adjacency(graph.items())
+
+    if not isinstance(graph, (list, tuple)):
+        raise ValueError(f"Unsupported graph type: {type(graph).__name__}")
+
+    if kind is None:
+        kind = "edges" if _looks_like_edge_list(graph, hint) else "adjacency"
+
+    if kind == "edges":
+        return _from_edges(graph, directed)
+
+    if not all(isinstance(row, (list, tuple, set)) for row in graph):
+        raise ValueError("Adjacency list must be a list of neighbor lists")
+    return _from_adjacency(enumerate(graph))
+
+
+def graph_from_env(
+    runtime_env: Dict[str, Any], code: Optional[str] = None
+) -> Tuple[Optional[CSRGraph], Optional[str]]:
+    """
+    Locate the user's graph variable after exec and convert it.
+    code: the user's source, used to tell edge lists from adjacency lists
+    when the values alone fit both.
+    Returns (graph, None) on success or (None, error message).
+    """
+    for name in GRAPH_VARIABLE_NAMES:
+        if name not in runtime_env:
+            continue
+        hint = representation_hint(code, name) if code is not None else None
+        try:
+            csr = build_csr(runtime_env[name], kind="edges" if name == "edges" else None, hint=hint)
+        except Exception as e:
+            return None, f"Graph is empty or invalid: {e}"
+        if csr.num_nodes == 0:
+            return None, "Graph is empty or invalid"
+        return csr, None
+
+    return None, "Variable 'graph' not found"
@@ -1,3 +1,6 @@
+from engines.graph_csr import graph_from_env
+
+
 def trace_dfs_runtime(code: str, max_events: int = 200):
     events = []
 
@@ -10,31 +13,51 @@ def trace_dfs_runtime(code: str, max_events: int = 200):
 
     exec(code, runtime_env, runtime_env)
 
-    graph = runtime_env.get("graph")
-    if not isinstance(graph, dict) or not graph:
-        return [{"type": "graph_error", "error": "Invalid graph"}]
+    graph, error = graph_from_env(runtime_env, code)
+    if graph is None:
+        return [{"type": "graph_error", "error": error}]
 
-    runtime_env.pop("dfs", None)  # 🔥 KEY FIX
+    offsets = graph.offsets
+    neighbors = graph.neighbors
+    labels = graph.labels
+    seen = bytearray(graph.num_nodes)
 
-    visited = set()
+    # explicit stack of [node, next neighbor position] so deep graphs
+    # don't hit the interpreter recursion limit
     call_stack = []
-    start = next(iter(graph))
+    truncated = False
 
-    def _trace_dfs(node):
-        if len(events) >= max_events:
-            return
-        visited.add(node)
-        call_stack.append(node)
+    def _enter(node):
+        seen[node] = 1
+        call_stack.append([node, int(offsets[node])])
+        events.append({"type": "dfs_call", "node": labels[node], "depth": len(call_stack)})
 
-        events.append({"type": "dfs_call", "node": node, "depth": len(call_stack)})
+    _enter(0)
 
-        for nei in graph.get(node, []):
-            events.append({"type": "dfs_edge", "from": node, "to": nei})
-            if nei not in visited:
-                _trace_dfs(nei)
-
-        call_stack.pop()
-        events.append({"type": "dfs_return", "node": node, "depth": len(call_stack)})
+    while call_stack:
+        if len(events) >= max_events:
+            truncated = True
+            break
+
+        frame = call_stack[-1]
+        node, pos = frame
+
+        if pos < offsets[node + 1]:
+            nei = int(neighbors[pos])
+            frame[1] = pos + 1
+            events.append({"type": "dfs_edge", "from": labels[node], "to": labels[nei]})
+            if not seen[nei]:
+                _enter(nei)
+        else:
+            call_stack.pop()
+            events.append({"type": "dfs_return", "node": labels[node], "depth": len(call_stack)})
+
+    if truncated:
+        events.append({
+            "type": "graph_truncated",
+            "message": "DFS visualization truncated to avoid excessive output",
+            "nodes": graph.num_nodes,
+            "edges": graph.num_edges
+        })
 
-    _trace_dfs(start)
     return events
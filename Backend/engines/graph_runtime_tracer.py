@@ -1,7 +1,23 @@
 # engines/graph_runtime_tracer.py
 from collections import deque
 
-def trace_graph_runtime(code: str):
+from engines.graph_csr import graph_from_env
+
+# opt-in delta form of the steps (`deltas` on /process_stream/stream and
+# /trace): "visit" pops its node off the queue, "edge" pushes its "to" onto the
+# queue and the visited order. The first step and every KEYFRAME_EVERY-th one
+# keep the full "queue" / "visited" lists, so a client can start anywhere.
+KEYFRAME_EVERY = 50
+
+
+def as_delta(step, position: int):
+    """The BFS step without its queue/visited lists, unless `position` is a keyframe."""
+    if position % KEYFRAME_EVERY == 0 or step.get("type") not in ("visit", "edge"):
+        return step
+    return {k: v for k, v in step.items() if k not in ("queue", "visited")}
+
+
+def trace_graph_runtime(code: str, max_events: int = 500):
     events = []
 
     runtime_env = {
@@ -13,60 +29,77 @@ def trace_graph_runtime(code: str):
         # 1️⃣ Execute user code safely
         exec(code, runtime_env, runtime_env)
 
-        # 2️⃣ Validate graph
-        if "graph" not in runtime_env:
+        # 2️⃣ Validate graph (dict / list-of-lists / edge list -> CSR)
+        graph, error = graph_from_env(runtime_env, code)
+        if graph is None:
             return [{
                 "type": "graph_error",
-                "error": "Variable 'graph' not found"
-            }]
-
-        graph = runtime_env["graph"]
-
-        if not isinstance(graph, dict) or not graph:
-            return [{
-                "type": "graph_error",
-                "error": "Graph is empty or invalid"
+                "error": error
             }]
 
         # 3️⃣ ABSOLUTE FIX: choose deterministic start node
-        # This NEVER fails
-        start = next(iter(graph.keys()))
+        # interned index 0 is the first key / first node the user wrote
+        start = 0
 
-        visited = set()
-        q = deque([start])
-        visited.add(start)
+        # BFS discovery order doubles as the queue:
+        # order[:] == visited, order[head:] == queue
+        offsets = graph.offsets
+        neighbors = graph.neighbors
+        seen = bytearray(graph.num_nodes)
+        order = [start]
+        seen[start] = 1
+        head = 0
+        truncated = False
 
         events.append({
             "type": "init",
-            "start": start,
-            "queue": list(q),
-            "visited": list(visited)
+            "start": graph.labels[start],
+            "queue": graph.label_list(order[head:]),
+            "visited": graph.label_list(order)
         })
 
         # 4️⃣ BFS with LIVE GRAPH MAP EVENTS
-        while q:
-            node = q.popleft()
+        while head < len(order):
+            if len(events) >= max_events:
+                truncated = True
+                break
+
+            node = order[head]
+            head += 1
 
             events.append({
                 "type": "visit",
-                "node": node,
-                "queue": list(q),
-                "visited": list(visited)
+                "node": graph.labels[node],
+                "queue": graph.label_list(order[head:]),
+                "visited": graph.label_list(order)
             })
 
-            for nei in graph.get(node, []):
-                if nei not in visited:
-                    visited.add(nei)
-                    q.append(nei)
+            for nei in neighbors[offsets[node]:offsets[node + 1]].tolist():
+                if not seen[nei]:
+                    seen[nei] = 1
+                    order.append(nei)
+
+                    if len(events) >= max_events:
+                        truncated = True
+                        continue
 
                     events.append({
                         "type": "edge",
-                        "from": node,
-                        "to": nei,
-                        "queue": list(q),
-                        "visited": list(visited)
+                        "from": graph.labels[node],
+                        "to": graph.labels[nei],
+                        "queue": graph.label_list(order[head:]),
+                        "visited": graph.label_list(order)
                     })
 
+        # 5️⃣ Truncation notice
+        if truncated:
+            events.append({
+                "type": "graph_truncated",
+                "message": "BFS visualization truncated to avoid excessive output",
+                "nodes": graph.num_nodes,
+                "edges": graph.num_edges
+            })
+
     except Exception as e:
         return [{
             "type": "graph_error",
@@ -1,29 +1,44 @@
 # backend/engines/recursion_engine.py
 import json
-import uuid
-import os
 import subprocess
 import textwrap
 from typing import Any, Dict, List, Optional
 
-TMP_DIR = "/tmp" if os.name != "nt" else os.getenv("TEMP", "C:\\Temp")
+from engines import trace_backend
+
+_backend_source = None
+
+
+def _get_backend_source() -> str:
+    global _backend_source
+    if _backend_source is None:
+        with open(trace_backend.__file__, "r", encoding="utf-8") as f:
+            _backend_source = f.read()
+    return _backend_source
 
 
 def _make_tracer_script(user_code: str, entry_func: str, entry_args: List[Any]) -> str:
     """
     Build a python script that:
-      - defines a tracer via sys.settrace
-      - executes user's code
-      - calls entry_func(*entry_args)
+      - starts with the source of engines/trace_backend.py (the script runs
+        as a separate interpreter and cannot import the backend)
+      - runs the user's module exactly once, with stdout captured
+      - traces only the user's own first top-level call of entry_func
+      - calls entry_func(*entry_args) traced only if the module never called it
       - prints JSON trace to stdout
     """
-    # safe-ish JSON encoding of args for literal insertion
-    args_repr = ", ".join(repr(a) for a in entry_args)
-
     tracer_py = f"""
-import sys, json, traceback
+import sys, json, traceback, io
+
+USER_CODE = {user_code!r}
+ENTRY_FUNC = {entry_func!r}
+ENTRY_ARGS = {entry_args!r}
+USER_FILE = "<user_code>"
+MAX_STDOUT = 10000
 
 trace_events = []
+state = {{"active": False, "captured": False, "direct": False, "entry_frame": None, "result": None,
+         "entry_raised": False, "backend": None}}
 
 def safe_snapshot(frame):
     # capture selected locals (stringified) to avoid unserializable objects
@@ -36,60 +51,97 @@ def safe_snapshot(frame):
         locs = {{}}
     return locs
 
-def tracer(frame, event, arg):
-    # only handle function calls and returns
-    if event == 'call':
-        code = frame.f_code
-        trace_events.append({{
-            "event": "call",
-            "func_name": code.co_name,
-            "filename": code.co_filename,
-            "lineno": frame.f_lineno,
-            "locals": safe_snapshot(frame)
-        }})
-    elif event == 'return':
-        try:
-            ret = repr(arg)
-        except Exception:
-            ret = "<unreprable>"
-        trace_events.append({{
-            "event": "return",
-            "func_name": frame.f_code.co_name,
-            "filename": frame.f_code.co_filename,
-            "lineno": frame.f_lineno,
-            "return_value": ret,
-            "locals": safe_snapshot(frame)
-        }})
-    return tracer
-
-# USER CODE START
-{user_code}
-# USER CODE END
+def on_return(frame, value, raised):
+    try:
+        ret = repr(value)
+    except Exception:
+        ret = "<unreprable>"
+    trace_events.append({{
+        "event": "return",
+        "func_name": frame.f_code.co_name,
+        "filename": frame.f_code.co_filename,
+        "lineno": frame.f_lineno,
+        "return_value": ret,
+        "locals": safe_snapshot(frame)
+    }})
+    if frame is state["entry_frame"]:
+        # the traced call is over: the rest of the module runs untraced
+        state["active"] = False
+        state["captured"] = True
+        state["entry_frame"] = None
+        state["result"] = ret
+        state["entry_raised"] = raised
+
+def on_call(frame):
+    # only function calls and returns, inside the entry call: no line events
+    code = frame.f_code
+    if not state["active"]:
+        if state["captured"]:
+            return DISABLE
+        caller = frame.f_back
+        top_level = caller is not None and caller.f_code is module_code
+        if code.co_name != ENTRY_FUNC or not (top_level or state["direct"]):
+            return False
+        state["active"] = True
+        state["entry_frame"] = frame
+    trace_events.append({{
+        "event": "call",
+        "func_name": code.co_name,
+        "filename": code.co_filename,
+        "lineno": frame.f_lineno,
+        "locals": safe_snapshot(frame)
+    }})
+    return True
+
+module_code = compile(USER_CODE, USER_FILE, "exec")
 
 def _run_and_trace():
-    sys.settrace(tracer)
+    real_stdout = sys.stdout
+    user_stdout = io.StringIO()
+    user_globals = {{"__name__": "__main__"}}
+    error = None
+
+    sys.stdout = user_stdout
     try:
-        result = {entry_func}({args_repr})
-    except Exception as e:
+        with tracing(USER_FILE, on_call=on_call, on_return=on_return) as backend:
+            state["backend"] = backend
+            exec(module_code, user_globals)
+            if not state["captured"] and callable(user_globals.get(ENTRY_FUNC)):
+                # the module never called the entry function itself
+                state["direct"] = True
+                user_globals[ENTRY_FUNC](*ENTRY_ARGS)
+    except BaseException:
         # capture exception stack for debugging
-        tb = traceback.format_exc()
-        sys.settrace(None)
-        print(json.dumps({{"error": "runtime exception", "traceback": tb, "events": trace_events}}))
-        return
-    sys.settrace(None)
-    # final output
-    print(json.dumps({{"result_repr": repr(result), "events": trace_events}}))
+        error = traceback.format_exc()
+    finally:
+        sys.stdout = real_stdout
+
+    out = {{
+        "events": trace_events,
+        "entry_call": "fallback" if state["direct"] else ("module" if state["captured"] else None),
+        "stdout": user_stdout.getvalue()[:MAX_STDOUT],
+        "backend": state["backend"],
+    }}
+    if error is not None and (not state["captured"] or state["entry_raised"]):
+        out["error"] = "runtime exception"
+        out["traceback"] = error
+    else:
+        out["result_repr"] = state["result"]
+        if error is not None:
+            out["module_error"] = error
+    print(json.dumps(out))
 
 if __name__ == '__main__':
     _run_and_trace()
 """
     # Dedent for neatness and return
-    return textwrap.dedent(tracer_py)
+    return _get_backend_source() + "\n" + textwrap.dedent(tracer_py)
 
 
 def trace_recursion_runtime(code: str, entry_func: str, entry_args: Optional[List[Any]] = None, timeout: int = 3) -> Dict:
     """
-    Executes the user's code inside a traced temporary script and returns the JSON trace.
+    Executes the user's code inside a traced script and returns the JSON trace.
+    The script is piped to `python -` on stdin, so nothing is written to disk.
     - code: full python code string (must include entry_func)
     - entry_func: the function name to call (string)
     - entry_args: list of python-serializable arguments (e.g., [4] for fact(4))
@@ -98,17 +150,12 @@ def trace_recursion_runtime(code: str, entry_func: str, entry_args: Optional[Lis
     if entry_args is None:
         entry_args = []
 
-    file_id = str(uuid.uuid4()).replace("-", "")[:16]
-    tmp_file = os.path.join(TMP_DIR, f"decap_trace_{file_id}.py")
-
     script = _make_tracer_script(code, entry_func, entry_args)
 
-    with open(tmp_file, "w", encoding="utf-8") as f:
-        f.write(script)
-
     try:
         proc = subprocess.run(
-            ["python", tmp_file],
+            ["python", "-"],
+            input=script,
             capture_output=True,
             timeout=timeout,
             check=False,
@@ -130,9 +177,3 @@ def trace_recursion_runtime(code: str, entry_func: str, entry_args: Optional[Lis
         return {"error": "timeout", "message": "Execution timed out (possible infinite recursion)"}
     except Exception as e:
         return {"error": "execution_failed", "message": str(e)}
-    finally:
-        # try to remove temp file
-        try:
-            os.remove(tmp_file)
-        except Exception:
-            pass
@@ -0,0 +1,450 @@
+# backend/engines/static_rules.py
+# Pluggable static-analysis rules, all run by a single AST walk.
+#
+# A rule is a Rule subclass registered with @register. It declares its
+# metadata (id, type, severity) and implements enter_<NodeType>(node) /
+# leave_<NodeType>(node) for the node types it cares about, exactly like
+# ast.NodeVisitor method names. The walker builds a dispatch table once per
+# rule set, so a node only reaches the rules that subscribe to its type and
+# the cost of a run is O(nodes + matching hooks). Rules keep their own state
+# (a fresh instance per run) and report findings with self.report(node, ...).
+import ast
+import builtins
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type
+
+SEVERITIES = ("low", "medium", "high", "critical")
+
+_BUILTIN_NAMES = frozenset(dir(builtins))
+
+
+class Rule:
+    id = ""
+    type = "general_warning"
+    severity = "low"
+    description = ""
+
+    def __init__(self):
+        self.findings: List[Dict[str, Any]] = []
+
+    def report(self, node: ast.AST, detail: str, severity: Optional[str] = None):
+        self.findings.append({
+            "rule": self.id,
+            "type": self.type,
+            "severity": severity or self.severity,
+            "detail": detail,
+            "line": getattr(node, "lineno", None),
+            "end_line": getattr(node, "end_lineno", None),
+        })
+
+
+RULES: List[Type[Rule]] = []
+
+
+def register(rule_cls: Type[Rule]) -> Type[Rule]:
+    """Class decorator: add a rule to the default registry."""
+    if rule_cls.severity not in SEVERITIES:
+        raise ValueError(f"{rule_cls.__name__}: unknown severity {rule_cls.severity!r}")
+    RULES.append(rule_cls)
+    return rule_cls
+
+
+Hook = Callable[[ast.AST], None]
+_Dispatch = Dict[type, Tuple[List[Tuple[int, str]], List[Tuple[int, str]]]]
+_dispatch_cache: Dict[Tuple[Type[Rule], ...], _Dispatch] = {}
+
+
+def _dispatch_for(rule_classes: Tuple[Type[Rule], ...]) -> _Dispatch:
+    """node class -> ([(rule index, enter method)], [(rule index, leave method)])"""
+    table = _dispatch_cache.get(rule_classes)
+    if table is not None:
+        return table
+    table = {}
+    for node_cls in (c for c in vars(ast).values() if isinstance(c, type) and issubclass(c, ast.AST)):
+        enter = [(i, f"enter_{node_cls.__name__}") for i, r in enumerate(rule_classes)
+                 if hasattr(r, f"enter_{node_cls.__name__}")]
+        leave = [(i, f"leave_{node_cls.__name__}") for i, r in enumerate(rule_classes)
+                 if hasattr(r, f"leave_{node_cls.__name__}")]
+        if enter or leave:
+            table[node_cls] = (enter, leave)
+    _dispatch_cache[rule_classes] = table
+    return table
+
+
+def run_rules(tree: ast.AST, rules: Optional[Sequence[Type[Rule]]] = None) -> List[Dict[str, Any]]:
+    """
+    Walk the tree once (pre-order, children in source order) and return the
+    findings of every rule, sorted by line.
+    """
+    rule_classes = tuple(RULES if rules is None else rules)
+    dispatch = _dispatch_for(rule_classes)
+    instances = [cls() for cls in rule_classes]
+    hooks: Dict[type, Tuple[List[Hook], List[Hook]]] = {
+        node_cls: (
+            [getattr(instances[i], name) for i, name in enter],
+            [getattr(instances[i], name) for i, name in leave],
+        )
+        for node_cls, (enter, leave) in dispatch.items()
+    }
+
+    # iterative: deeply nested user code must not hit the recursion limit
+    stack: List[Tuple[ast.AST, bool]] = [(tree, False)]
+    while stack:
+        node, leaving = stack.pop()
+        node_hooks = hooks.get(type(node))
+        if leaving:
+            for hook in node_hooks[1]:
+                hook(node)
+            continue
+        if node_hooks is not None:
+            for hook in node_hooks[0]:
+                hook(node)
+            if node_hooks[1]:
+                stack.append((node, True))
+        children = list(ast.iter_child_nodes(node))
+        for child in reversed(children):
+            stack.append((child, False))
+
+    findings = [f for rule in instances for f in rule.findings]
+    findings.sort(key=lambda f: (f["line"] or 0, f["rule"]))
+    return findings
+
+
+def _names_loaded(node: ast.AST) -> Iterable[str]:
+    return (n.id for n in ast.walk(node) if isinstance(n, ast.Name))
+
+
+def _is_len_call(node: ast.AST) -> bool:
+    return (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id == "len"
+        and len(node.args) == 1
+    )
+
+
+# ---------------------------------------------------------------------------
+# Rules
+# ---------------------------------------------------------------------------
+
+@register
+class InfiniteWhileRule(Rule):
+    """
+    A while loop that can never stop: no break/return/raise/exit inside, and
+    either a constant-true test or a test whose names the body never changes.
+    """
+    id = "infinite-while"
+    type = "infinite_loop"
+    severity = "high"
+    description = "while loop without an exit"
+
+    def __init__(self):
+        super().__init__()
+        # innermost last; "scope" frames stop break/return propagation
+        self.frames: List[Dict[str, Any]] = []
+
+    def _loop_frame(self, kind: str, node: ast.AST, names=()):
+        self.frames.append({
+            "kind": kind, "node": node, "names": set(names),
+            "exits": False, "mutated": False, "opaque_calls": False,
+        })
+
+    def enter_While(self, node):
+        test = node.test
+        # a test with calls may read state the body changes indirectly
+        if any(isinstance(n, ast.Call) for n in ast.walk(test)):
+            self._loop_frame("skip", node)
+            return
+        self._loop_frame("while", node, _names_loaded(test))
+
+    def leave_While(self, node):
+        frame = self.frames.pop()
+        if frame["kind"] != "while" or frame["exits"]:
+            return
+        test = node.test
+        if isinstance(test, ast.Constant):
+            if test.value:
+                self.report(node, f"while {test.value!r}: loop has no break, return or raise (line {node.lineno}).")
+            return
+        if frame["names"] and not frame["mutated"] and not frame["opaque_calls"]:
+            names = ", ".join(sorted(frame["names"]))
+            self.report(
+                node,
+                f"while loop condition uses {names}, but the loop body never changes "
+                f"{'it' if len(frame['names']) == 1 else 'them'} and has no break (line {node.lineno}).",
+            )
+
+    def enter_For(self, node):
+        self._loop_frame("for", node)
+
+    def leave_For(self, node):
+        self.frames.pop()
+
+    enter_AsyncFor = enter_For
+    leave_AsyncFor = leave_For
+
+    def _enter_scope(self, node):
+        self._loop_frame("scope", node)
+
+    def _leave_scope(self, node):
+        self.frames.pop()
+
+    enter_FunctionDef = enter_AsyncFunctionDef = enter_Lambda = enter_ClassDef = _enter_scope
+    leave_FunctionDef = leave_AsyncFunctionDef = leave_Lambda = leave_ClassDef = _leave_scope
+
+    def _exit_innermost_loop(self):
+        for frame in reversed(self.frames):
+            if frame["kind"] == "scope":
+                return
+            if frame["kind"] in ("while", "for", "skip"):
+                frame["exits"] = True
+                return
+
+    def _exit_all_loops(self):
+        for frame in reversed(self.frames):
+            if frame["kind"] == "scope":
+                return
+            frame["exits"] = True
+
+    def enter_Break(self, node):
+        self._exit_innermost_loop()
+
+    def enter_Return(self, node):
+        self._exit_all_loops()
+
+    # raise ends the loop; yield hands control to a consumer that can stop iterating
+    enter_Raise = enter_Yield = enter_YieldFrom = enter_Return
+
+    def _mutates(self, name: str):
+        for frame in self.frames:
+            if name in frame["names"]:
+                frame["mutated"] = True
+
+    def enter_Name(self, node):
+        if isinstance(node.ctx, (ast.Store, ast.Del)) and self.frames:
+            self._mutates(node.id)
+
+    def enter_Call(self, node):
+        if not self.frames:
+            return
+        func = node.func
+        if isinstance(func, ast.Name):
+            if func.id in ("exit", "quit"):
+                self._exit_all_loops()
+            elif func.id not in _BUILTIN_NAMES:
+                # a user function may change globals the test reads
+                for frame in self.frames:
+                    frame["opaque_calls"] = True
+        elif isinstance(func, ast.Attribute):
+            if isinstance(func.value, ast.Name):
+                if func.value.id == "sys" and func.attr == "exit":
+                    self._exit_all_loops()
+                else:
+                    # stack.pop(), q.append(...), node.advance()
+                    self._mutates(func.value.id)
+            else:
+                for frame in self.frames:
+                    frame["opaque_calls"] = True
+
+    def enter_Subscript(self, node):
+        if isinstance(node.ctx, (ast.Store, ast.Del)) and isinstance(node.value, ast.Name) and self.frames:
+            self._mutates(node.value.id)
+
+    def enter_Attribute(self, node):
+        if isinstance(node.ctx, (ast.Store, ast.Del)) and isinstance(node.value, ast.Name) and self.frames:
+            self._mutates(node.value.id)
+
+    def enter_Global(self, node):
+        # state shared through globals/nonlocals is out of reach of this rule
+        for frame in self.frames:
+            frame["opaque_calls"] = True
+
+    enter_Nonlocal = enter_Global
+
+
+@register
+class MissingBaseCaseRule(Rule):
+    """A function that calls itself with no conditional anywhere in its body."""
+    id = "missing-base-case"
+    type = "missing_base_case"
+    severity = "critical"
+    description = "recursive function without a base case"
+
+    def __init__(self):
+        super().__init__()
+        self.functions: List[Dict[str, Any]] = []
+
+    def enter_FunctionDef(self, node):
+        self.functions.append({"name": node.name, "recursive_call": None, "guarded": False})
+
+    def leave_FunctionDef(self, node):
+        frame = self.functions.pop()
+        if frame["recursive_call"] is not None and not frame["guarded"]:
+            self.report(
+                node,
+                f"Recursive function '{node.name}' calls itself (line {frame['recursive_call']}) "
+                f"but has no condition that stops the recursion.",
+            )
+
+    enter_AsyncFunctionDef = enter_FunctionDef
+    leave_AsyncFunctionDef = leave_FunctionDef
+
+    def enter_Call(self, node):
+        if self.functions and isinstance(node.func, ast.Name) and node.func.id == self.functions[-1]["name"]:
+            if self.functions[-1]["recursive_call"] is None:
+                self.functions[-1]["recursive_call"] = node.lineno
+
+    def _guard(self, node):
+        if self.functions:
+            self.functions[-1]["guarded"] = True
+
+    enter_If = enter_IfExp = enter_While = enter_For = enter_AsyncFor = _guard
+    enter_Try = enter_BoolOp = enter_Match = enter_comprehension = _guard
+
+
+@register
+class LenComparisonRule(Rule):
+    """i <= len(arr) / len(arr) >= i: one step past the last index."""
+    id = "len-off-by-one"
+    type = "boundary_condition"
+    severity = "medium"
+    description = "<= against len() in an index bound"
+
+    def enter_Compare(self, node):
+        left = node.left
+        for op, right in zip(node.ops, node.comparators):
+            if (isinstance(op, ast.LtE) and _is_len_call(right)) or (isinstance(op, ast.GtE) and _is_len_call(left)):
+                self.report(
+                    node,
+                    "Possible off-by-one error: comparing an index with <= len(...). "
+                    "Valid indices stop at len - 1; use < instead.",
+                )
+                return
+            left = right
+
+
+@register
+class IndexAtLenRule(Rule):
+    """arr[len(arr)] is always out of range."""
+    id = "index-at-len"
+    type = "index_error"
+    severity = "high"
+    description = "indexing a sequence at its own length"
+
+    def enter_Subscript(self, node):
+        index = node.slice
+        if (
+            isinstance(node.value, ast.Name)
+            and _is_len_call(index)
+            and isinstance(index.args[0], ast.Name)
+            and index.args[0].id == node.value.id
+        ):
+            name = node.value.id
+            self.report(node, f"{name}[len({name})] is out of range; the last element is {name}[len({name}) - 1].")
+
+
+@register
+class UnreachableCodeRule(Rule):
+    """Statements after return/raise/break/continue in the same block."""
+    id = "unreachable-code"
+    type = "general_warning"
+    severity = "low"
+    description = "code after return/raise/break/continue"
+
+    _TERMINATORS = (ast.Return, ast.Raise, ast.Break, ast.Continue)
+
+    def _check_block(self, body: List[ast.stmt]):
+        for stmt, following in zip(body, body[1:]):
+            if isinstance(stmt, self._TERMINATORS):
+                kind = type(stmt).__name__.lower()
+                self.report(following, f"Unreachable code after '{kind}' on line {stmt.lineno}.")
+                return
+
+    def _check_node(self, node):
+        for field in ("body", "orelse", "finalbody"):
+            block = getattr(node, field, None)
+            if isinstance(block, list) and block and isinstance(block[0], ast.stmt):
+                self._check_block(block)
+
+    enter_FunctionDef = enter_AsyncFunctionDef = enter_For = enter_AsyncFor = enter_While = _check_node
+    enter_If = enter_With = enter_AsyncWith = enter_Try = enter_ExceptHandler = enter_Module = _check_node
+
+
+@register
+class UnguardedReturnRule(Rule):
+    """A program that returns but never branches or loops (baseline heuristic)."""
+    id = "return-without-flow-control"
+    type = "general_warning"
+    severity = "low"
+    description = "return statements in code without any if/for"
+
+    def __init__(self):
+        super().__init__()
+        self.first_return: Optional[ast.Return] = None
+        self.has_flow = False
+
+    def enter_Return(self, node):
+        if self.first_return is None:
+            self.first_return = node
+
+    def _flow(self, node):
+        self.has_flow = True
+
+    enter_If = enter_IfExp = enter_For = enter_AsyncFor = enter_comprehension = _flow
+
+    def leave_Module(self, node):
+        if self.first_return is not None and not self.has_flow:
+            self.report(
+                self.first_return,
+                "Suspicious return statement without flow control: nothing in the code branches or loops.",
+            )
+
+
+@register
+class UncheckedIndexRule(Rule):
+    """A list indexed by a computed index in code that never takes its len()."""
+    id = "index-without-len"
+    type = "index_error"
+    severity = "medium"
+    description = "computed index into a list whose length is never checked"
+
+    # parameters conventionally holding arrays, whose type the AST can't tell
+    _SEQUENCE_PARAMS = frozenset(("arr", "array", "nums", "lst"))
+
+    def __init__(self):
+        super().__init__()
+        self.sequences = set()
+        self.measured = set()
+        self.indexed: Dict[str, ast.Subscript] = {}
+
+    def enter_Assign(self, node):
+        # sized tables ([0] * n) are left out: their bound is the size they were built with
+        value = node.value
+        is_list = isinstance(value, (ast.List, ast.ListComp)) or (
+            isinstance(value, ast.Call) and isinstance(value.func, ast.Name) and value.func.id == "list"
+        )
+        if is_list:
+            self.sequences.update(t.id for t in node.targets if isinstance(t, ast.Name))
+
+    def enter_arg(self, node):
+        if node.arg in self._SEQUENCE_PARAMS:
+            self.sequences.add(node.arg)
+
+    def enter_Call(self, node):
+        if _is_len_call(node) and isinstance(node.args[0], ast.Name):
+            self.measured.add(node.args[0].id)
+
+    def enter_Subscript(self, node):
+        if (
+            isinstance(node.value, ast.Name)
+            and isinstance(node.ctx, ast.Load)
+            and not isinstance(node.slice, (ast.Constant, ast.Slice, ast.UnaryOp))
+        ):
+            self.indexed.setdefault(node.value.id, node)
+
+    def leave_Module(self, node):
+        for name, subscript in self.indexed.items():
+            if name in self.sequences and name not in self.measured:
+                self.report(
+                    subscript,
+                    f"Possible index out of range: {name} is indexed but its length is never checked with len({name}).",
+                )
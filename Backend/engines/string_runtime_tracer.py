@@ -0,0 +1,67 @@
+# backend/engines/string_runtime_tracer.py
+import json
+import os
+import subprocess
+from typing import Any, Dict
+
+# string operations recorded per run; later ones are only counted (and bounds-checked)
+STRING_TRACE_MAX_EVENTS = int(os.getenv("DECAPSULE_STRING_TRACE_MAX_EVENTS", "500"))
+
+_WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "string_trace_worker.py")
+_worker_source = None
+
+
+def _get_worker_source() -> str:
+    global _worker_source
+    if _worker_source is None:
+        with open(_WORKER_PATH, "r", encoding="utf-8") as f:
+            _worker_source = f.read()
+    return _worker_source
+
+
+def trace_string_runtime(
+    code: str,
+    stdin: str = "",
+    max_events: int = STRING_TRACE_MAX_EVENTS,
+    timeout: int = 3,
+) -> Dict[str, Any]:
+    """
+    Run the code once in an isolated worker with string indexing, slicing,
+    find/count/replace/join/... calls and `+=` / `s = s + t` instrumented.
+    Concatenations run unchanged; "copied" is measured from whether CPython
+    extended the string in place (only the new chars written) or built a new one.
+    Returns dict:
+    {
+      "events": [{"op": "index" | "slice" | "method" | "concat", "line", ...}],
+      "issues": [{"variable", "index", "length", "line", "error"}],          # real OOB indexing
+      "concat_sites": [{"variable", "line", "count", "copied", "in_place", "final_length", "copy_ratio", "time_ms"}],
+      "quadratic_concat": [{"variable", "line", "concatenations", "copied_chars", "hint", ...}],
+      "op_counts", "ops_total", "events_truncated", "var_names", "stdout",
+      "exception": {"type", "message", "line"} | None,
+      "elapsed_ms"
+    }
+    or {"error": ...} when the worker could not run the code.
+    """
+    payload = json.dumps({"code": code, "stdin": stdin, "max_events": max_events})
+    try:
+        proc = subprocess.run(
+            # -I: no user site / PYTHONPATH / cwd on sys.path; code comes in on stdin
+            ["python", "-I", "-c", _get_worker_source()],
+            input=payload,
+            capture_output=True,
+            timeout=timeout,
+            check=False,
+            text=True
+        )
+    except subprocess.TimeoutExpired:
+        return {"error": "timeout", "message": "Execution timed out (possible infinite loop)"}
+    except Exception as e:
+        return {"error": "execution_failed", "message": str(e)}
+
+    lines = proc.stdout.strip().splitlines()
+    if not lines:
+        return {"error": "no output", "stderr": proc.stderr.strip()[-2000:]}
+    try:
+        return json.loads(lines[-1])
+    except Exception as e:
+        return {"error": f"json-parse-failed: {e}", "raw_stdout": proc.stdout[-2000:]}
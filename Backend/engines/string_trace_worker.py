@@ -0,0 +1,386 @@
+# backend/engines/string_trace_worker.py
+# Isolated worker for engines/string_runtime_tracer.py.
+# Runs as `python -I -c <this source>` and never imports the backend:
+# - reads {"code", "stdin", "max_events"} as JSON on stdin
+# - rewrites string indexing/slicing, find/count/replace/join/... calls and
+#   `s += x` / `s = s + x` so that, when the value is a str at runtime, they
+#   go through the hooks below (anything else runs as written)
+# - runs the module once and prints a single JSON result on the real stdout
+import ast
+import builtins
+import copy
+import io
+import json
+import sys
+import time
+import traceback
+
+USER_FILE = "<user_code>"
+MAX_ISSUES = 50
+MAX_VALUE_CHARS = 80
+MAX_STDOUT = 10000
+
+TRACED_METHODS = frozenset({
+    "find", "rfind", "index", "rindex", "count", "replace", "join", "split", "startswith", "endswith",
+})
+
+# a concatenation site is flagged as quadratic when it copied at least
+# QUADRATIC_MIN_COPY chars and QUADRATIC_RATIO times the length it built
+QUADRATIC_MIN_COPY = 100000
+QUADRATIC_RATIO = 10
+
+# temp holding a concatenation's operand between the hook and the statement
+CONCAT_OPERAND = "_decap_concat_operand_"
+
+# private aliases for the type guards, so user code shadowing type/str cannot break them
+TYPE_ALIAS = "_decap_type_"
+STR_ALIAS = "_decap_str_"
+
+
+def _hook_call(hook, args, keywords=()):
+    return ast.Call(func=ast.Name(hook, ast.Load()), args=args, keywords=list(keywords))
+
+
+def _is_str(name):
+    """`type(name) is str`: the guard every rewrite sits behind."""
+    return ast.Compare(
+        left=_hook_call(TYPE_ALIAS, [ast.Name(name, ast.Load())]),
+        ops=[ast.Is()],
+        comparators=[ast.Name(STR_ALIAS, ast.Load())],
+    )
+
+
+class StringOpRewriter(ast.NodeTransformer):
+    """
+    s[i]             -> s[_decap_str_index_(s, i, "s", line)] if type(s) is str else s[i]
+    s[i:j]           -> s[_decap_str_index_(s, slice(i, j, None), "s", line)] if ... else s[i:j]
+    x.find(a, b)     -> _decap_str_method_(x, "find", line, a, b) if type(x) is str else x.find(a, b)
+    "-".join(p)      -> _decap_str_method_("-", "join", line, p)
+    s += t           -> if type(s) is str:
+                            _decap_str_concat_start_(s, t, True)
+                            s += t
+                            _decap_str_concat_end_(s, "s", line)
+                        else:
+                            s += t
+    s = s + t        -> the same around the original assignment
+    Lists, ints and other receivers (os.path.join, lst.index, i += 1) take
+    the untouched branch after one type check. Concatenations run as
+    written, so CPython still extends a string in place where it can; the
+    hooks only look at the operands before and the result after. A
+    right-hand side other than a name or constant is first stored in
+    CONCAT_OPERAND so it is evaluated once. Only plain names are guarded
+    (evaluating them twice has no side effects); method calls on other
+    receivers are left alone.
+    """
+
+    def visit_Subscript(self, node):
+        self.generic_visit(node)
+        if not isinstance(node.value, ast.Name) or not isinstance(node.ctx, ast.Load):
+            return node
+
+        index = node.slice
+        if isinstance(index, ast.Slice):
+            index = _hook_call("slice", [part or ast.Constant(None) for part in (index.lower, index.upper, index.step)])
+        elif isinstance(index, ast.Tuple):
+            return node  # not a string access
+
+        name = node.value.id
+        plain = copy.deepcopy(node)
+        node.slice = _hook_call("_decap_str_index_", [
+            ast.Name(name, ast.Load()), index, ast.Constant(name), ast.Constant(node.lineno),
+        ])
+        return ast.copy_location(ast.IfExp(test=_is_str(name), body=node, orelse=plain), node)
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        func = node.func
+        if not isinstance(func, ast.Attribute) or func.attr not in TRACED_METHODS:
+            return node
+        receiver = func.value
+        literal = isinstance(receiver, ast.Constant) and type(receiver.value) is str
+        if not literal and not isinstance(receiver, ast.Name):
+            return node
+        traced = _hook_call(
+            "_decap_str_method_",
+            [receiver, ast.Constant(func.attr), ast.Constant(node.lineno), *node.args],
+            node.keywords,
+        )
+        if not literal:
+            traced = ast.IfExp(test=_is_str(receiver.id), body=traced, orelse=node)
+        return ast.copy_location(traced, node)
+
+    def visit_AugAssign(self, node):
+        self.generic_visit(node)
+        if not isinstance(node.target, ast.Name) or not isinstance(node.op, ast.Add):
+            return node
+        plain = copy.deepcopy(node)
+        operand = self._operand(node.value)
+        node.value = operand[-1]
+        return self._around_concat(node, plain, node.target.id, operand, True)
+
+    def visit_Assign(self, node):
+        self.generic_visit(node)
+        value = node.value
+        if not (
+            len(node.targets) == 1
+            and isinstance(node.targets[0], ast.Name)
+            and isinstance(value, ast.BinOp)
+            and isinstance(value.op, ast.Add)
+        ):
+            return node
+        name = node.targets[0].id
+        plain = copy.deepcopy(node)
+        # s = s + t (append) or s = t + s (prepend)
+        if isinstance(value.left, ast.Name) and value.left.id == name:
+            operand = self._operand(value.right)
+            value.right = operand[-1]
+        elif isinstance(value.right, ast.Name) and value.right.id == name:
+            operand = self._operand(value.left)
+            value.left = operand[-1]
+        else:
+            return node
+        return self._around_concat(node, plain, name, operand, False)
+
+    @staticmethod
+    def _operand(expr):
+        """[] + the expression when re-reading it is free, else [hoisting Assign, temp Name]."""
+        if isinstance(expr, (ast.Constant, ast.Name)):
+            return [expr]
+        return [
+            ast.Assign(targets=[ast.Name(CONCAT_OPERAND, ast.Store())], value=expr),
+            ast.Name(CONCAT_OPERAND, ast.Load()),
+        ]
+
+    @staticmethod
+    def _around_concat(node, plain, name, operand, inplace):
+        line = ast.Constant(node.lineno)
+        traced = operand[:-1] + [
+            ast.Expr(_hook_call("_decap_str_concat_start_", [
+                ast.Name(name, ast.Load()), operand[-1], ast.Constant(inplace),
+            ])),
+            node,
+            ast.Expr(_hook_call("_decap_str_concat_end_", [
+                ast.Name(name, ast.Load()), ast.Constant(name), line,
+            ])),
+        ]
+        guarded = ast.If(test=_is_str(name), body=[ast.copy_location(stmt, node) for stmt in traced], orelse=[plain])
+        return ast.copy_location(guarded, node)
+
+
+def _short_repr(value):
+    try:
+        text = repr(value)
+    except Exception:
+        return "<unreprable>"
+    return text if len(text) <= MAX_VALUE_CHARS else text[:MAX_VALUE_CHARS] + "…"
+
+
+def _new_chars(result, *sources):
+    """Chars copied into result: none when CPython handed back an existing
+    object (a source itself, or a cached empty / 1-char string)."""
+    if len(result) <= 1 or any(result is source for source in sources):
+        return 0
+    return len(result)
+
+
+def make_hooks(max_events):
+    events = []
+    issues = []
+    var_names = set()
+    # (variable, line) -> concatenation stats
+    concat_sites = {}
+    counts = {"index": 0, "slice": 0, "method": 0, "concat": 0}
+    recording = max_events > 0
+
+    def record(event):
+        nonlocal recording
+        events.append(event)
+        recording = len(events) < max_events
+
+    def _decap_str_index_(container, index, name, line):
+        if type(container) is not str:
+            return index
+
+        if type(index) is int:
+            counts["index"] += 1
+            n = len(container)
+            if -n <= index < n:
+                if recording:
+                    var_names.add(name)
+                    record({"op": "index", "variable": name, "index": index, "length": n,
+                            "line": line, "value": container[index]})
+                return index
+            if len(issues) < MAX_ISSUES:
+                issues.append({
+                    "variable": name,
+                    "index": index,
+                    "length": n,
+                    "line": line,
+                    "error": "String index out of bounds",
+                })
+            if recording:
+                var_names.add(name)
+                record({"op": "index", "variable": name, "index": index, "length": n,
+                        "line": line, "out_of_bounds": True})
+        elif type(index) is slice:
+            counts["slice"] += 1
+            if recording:
+                var_names.add(name)
+                result = container[index]
+                record({"op": "slice", "variable": name, "slice": [index.start, index.stop, index.step],
+                        "length": len(container), "line": line,
+                        "value": _short_repr(result), "copied": _new_chars(result, container)})
+        return index
+
+    def _decap_str_method_(receiver, method, line, /, *args, **kwargs):
+        result = getattr(receiver, method)(*args, **kwargs)
+        if type(receiver) is str:
+            counts["method"] += 1
+            if recording:
+                event = {"op": "method", "method": method, "receiver": _short_repr(receiver),
+                         "length": len(receiver), "line": line, "result": _short_repr(result)}
+                if method != "join":
+                    event["args"] = [_short_repr(a) for a in args]
+                elif type(result) is str:
+                    pieces = args[0] if args and type(args[0]) in (list, tuple) else ()
+                    event["copied"] = _new_chars(result, *pieces[:1])
+                record(event)
+        return result
+
+    # (id, length, operand length, in-place form, start time) of the concatenation
+    # running now; nothing but the concatenation itself runs between the two hooks
+    pending = []
+
+    def _decap_str_concat_start_(target, operand, inplace):
+        pending.clear()  # left over if the previous concatenation raised
+        if type(target) is str and type(operand) is str:
+            pending.append((id(target), len(target), len(operand), inplace, time.perf_counter()))
+
+    def _decap_str_concat_end_(result, name, line):
+        end = time.perf_counter()
+        if not pending:
+            return
+        target_id, left_length, right_length, inplace, start = pending.pop()
+        if type(result) is not str:
+            return
+
+        counts["concat"] += 1
+        # measured, not assumed: the same object means CPython resized the
+        # string in place and wrote only the new part; a new object (or one
+        # the allocator moved) has had all of its chars copied
+        extended = id(result) == target_id
+        copied = right_length if extended else len(result)
+
+        site = concat_sites.get((name, line))
+        if site is None:
+            site = concat_sites[(name, line)] = {
+                "variable": name, "line": line, "count": 0, "copied": 0, "in_place": 0,
+                "final_length": 0, "time_ms": 0.0,
+            }
+        site["count"] += 1
+        site["copied"] += copied
+        site["in_place"] += extended
+        site["final_length"] = len(result)
+        site["time_ms"] += (end - start) * 1000
+
+        if recording:
+            var_names.add(name)
+            record({"op": "concat", "variable": name, "line": line, "augmented": inplace,
+                    "left_length": left_length, "right_length": right_length,
+                    "in_place": extended, "copied": copied})
+
+    def summary():
+        sites = []
+        quadratic = []
+        for site in concat_sites.values():
+            site["time_ms"] = round(site["time_ms"], 3)
+            site["copy_ratio"] = round(site["copied"] / max(site["final_length"], 1), 1)
+            sites.append(site)
+            if site["copied"] >= QUADRATIC_MIN_COPY and site["copy_ratio"] >= QUADRATIC_RATIO:
+                quadratic.append({
+                    "variable": site["variable"],
+                    "line": site["line"],
+                    "concatenations": site["count"],
+                    "copied_chars": site["copied"],
+                    "final_length": site["final_length"],
+                    "time_ms": site["time_ms"],
+                    "error": "Quadratic string building",
+                    "hint": (
+                        f"{site['count']} concatenations on line {site['line']} copied {site['copied']} chars "
+                        f"to build a {site['final_length']}-char string; append parts to a list and "
+                        f"''.join() them once"
+                    ),
+                })
+        total = sum(counts.values())
+        return {
+            "events": events,
+            "issues": issues,
+            "concat_sites": sorted(sites, key=lambda s: -s["copied"]),
+            "quadratic_concat": quadratic,
+            "op_counts": counts,
+            "ops_total": total,
+            "events_truncated": total > len(events),
+            "var_names": sorted(var_names),
+        }
+
+    hooks = {
+        TYPE_ALIAS: type,
+        STR_ALIAS: str,
+        "_decap_str_index_": _decap_str_index_,
+        "_decap_str_method_": _decap_str_method_,
+        "_decap_str_concat_start_": _decap_str_concat_start_,
+        "_decap_str_concat_end_": _decap_str_concat_end_,
+    }
+    return hooks, summary
+
+
+def _user_exception(exc):
+    line = None
+    for frame in traceback.extract_tb(exc.__traceback__):
+        if frame.filename == USER_FILE:
+            line = frame.lineno
+    return {"type": type(exc).__name__, "message": str(exc), "line": line}
+
+
+def _run(code_obj, extra_globals, stdin):
+    user_globals = {"__name__": "__main__", "__builtins__": builtins}
+    user_globals.update(extra_globals)
+    user_stdout = io.StringIO()
+    sys.stdin = io.StringIO(stdin)
+    sys.stdout = user_stdout
+    exception = None
+    start = time.perf_counter()
+    try:
+        exec(code_obj, user_globals)
+    except BaseException as e:  # SystemExit / KeyboardInterrupt from user code too
+        exception = _user_exception(e)
+    finally:
+        elapsed = time.perf_counter() - start
+        sys.stdout = sys.__stdout__
+    return exception, elapsed, user_stdout.getvalue()
+
+
+def main():
+    payload = json.loads(sys.stdin.read())
+    code = payload["code"]
+
+    try:
+        tree = ast.parse(code, USER_FILE)
+    except SyntaxError as e:
+        print(json.dumps({"error": f"syntax error: {e.msg} (line {e.lineno})"}))
+        return
+
+    tree = ast.fix_missing_locations(StringOpRewriter().visit(tree))
+    hooks, summary = make_hooks(payload.get("max_events", 500))
+    exception, elapsed, stdout = _run(compile(tree, USER_FILE, "exec"), hooks, payload.get("stdin", ""))
+
+    result = summary()
+    result.update({
+        "stdout": stdout[:MAX_STDOUT],
+        "exception": exception,
+        "elapsed_ms": round(elapsed * 1000, 3),
+    })
+    print(json.dumps(result, default=repr))
+
+
+main()
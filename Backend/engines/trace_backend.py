@@ -0,0 +1,241 @@
+# backend/engines/trace_backend.py
+# Tracing backends for the runtime tracers (execution_tracer, dp_runtime_tracer,
+# the recursion tracer script). A tracer supplies up to three hooks and gets
+# the same events from either backend:
+#
+#   on_call(frame)                    -> True: report this frame's lines and return
+#                                        False: skip this frame
+#                                        DISABLE: never report calls of this code again
+#   on_line(frame)                    -> None, or DISABLE: stop line events here
+#   on_return(frame, value, raised)   -> raised is True when an exception leaves the frame
+#
+# Only frames whose code comes from `filename` are ever reported.
+# - "monitoring" (Python 3.12+, PEP 669): subscribes only to the events that have
+#   a hook, and returns sys.monitoring.DISABLE for every code location outside
+#   the user's file (or where a hook says so), so library code and finished
+#   parts of the program run at full speed.
+# - "settrace": the sys.settrace fallback; DISABLE turns off line events for
+#   the frame (f_trace_lines) instead of the code location.
+#
+# Stdlib only and free of backend imports: recursion_engine embeds this source
+# into its tracer script.
+import os
+import sys
+import threading
+from contextlib import contextmanager
+
+# "auto" (monitoring when available), "monitoring" or "settrace"
+TRACE_BACKEND = os.getenv("DECAPSULE_TRACE_BACKEND", "auto")
+
+DISABLE = object()
+
+
+class SettraceBackend:
+    name = "settrace"
+
+    def __init__(self, filename, on_call=None, on_line=None, on_return=None):
+        self.filename = filename
+        self.on_call = on_call
+        self.on_line = on_line
+        self.on_return = on_return
+        # the frame an exception was last raised in: a 'return' with no 'line'
+        # after the 'exception' means the exception propagates out
+        self.raising = None
+
+    def _call(self, frame, event, arg):
+        if frame.f_code.co_filename != self.filename:
+            return None
+        if self.on_call is not None:
+            decision = self.on_call(frame)
+            if not decision or decision is DISABLE:
+                return None
+        if self.on_line is None and self.on_return is None:
+            return None
+        return self._local
+
+    def _local(self, frame, event, arg):
+        if event == "line":
+            if self.raising is frame:
+                self.raising = None
+            if self.on_line is not None and self.on_line(frame) is DISABLE:
+                frame.f_trace_lines = False
+        elif event == "exception":
+            self.raising = frame
+        elif event == "return":
+            raised = self.raising is frame
+            if raised:
+                self.raising = None
+            if self.on_return is not None:
+                self.on_return(frame, arg, raised)
+        return self._local
+
+    def start(self):
+        sys.settrace(self._call)
+        return True
+
+    def stop(self):
+        sys.settrace(None)
+
+
+class MonitoringBackend:
+    name = "monitoring"
+
+    def __init__(self, filename, on_call=None, on_line=None, on_return=None):
+        self.filename = filename
+        self.on_call = on_call
+        self.on_line = on_line
+        self.on_return = on_return
+        self.tool = sys.monitoring.DEBUGGER_ID
+        self.events = 0
+
+    def _callbacks(self):
+        mon = sys.monitoring
+        MON_DISABLE = mon.DISABLE
+        filename = self.filename
+        on_call, on_line, on_return = self.on_call, self.on_line, self.on_return
+        getframe = sys._getframe
+        get_ident = threading.get_ident
+        # monitoring is process-wide: only this thread's frames are reported
+        thread = get_ident()
+        every_frame = on_call is None
+        traced = set()  # frames on_call accepted and that have not returned yet
+
+        def start_event(code, offset):
+            if code.co_filename != filename:
+                return MON_DISABLE
+            if get_ident() != thread or every_frame:
+                return None
+            frame = getframe(1)
+            decision = on_call(frame)
+            if decision is DISABLE:
+                return MON_DISABLE
+            if decision:
+                traced.add(frame)
+            return None
+
+        def report_line(frame):
+            if not every_frame and frame not in traced:
+                return None
+            if on_line(frame) is DISABLE:
+                return MON_DISABLE
+            return None
+
+        def line_event(code, line):
+            if code.co_filename != filename:
+                return MON_DISABLE
+            if get_ident() != thread:
+                return None
+            return report_line(getframe(1))
+
+        line_starts = {}  # code -> {instruction offset: line}
+
+        def jump_event(code, offset, destination):
+            # settrace also reports a line when a loop jumps back within one
+            # line ([f(x) for x in xs]); LINE does not fire there
+            if code.co_filename != filename:
+                return MON_DISABLE
+            if destination >= offset or get_ident() != thread:
+                return None
+            lines = line_starts.get(code)
+            if lines is None:
+                lines = line_starts[code] = {
+                    at: line for start, end, line in code.co_lines() for at in range(start, end, 2)
+                }
+            if lines.get(destination) != lines.get(offset):
+                return None
+            return report_line(getframe(1))
+
+        def leave(frame, value, raised):
+            if every_frame:
+                if on_return is not None:
+                    on_return(frame, value, raised)
+            elif frame in traced:
+                traced.discard(frame)
+                if on_return is not None:
+                    on_return(frame, value, raised)
+
+        def return_event(code, offset, value):
+            if code.co_filename != filename:
+                return MON_DISABLE
+            if get_ident() == thread:
+                leave(getframe(1), value, False)
+            return None
+
+        def unwind_event(code, offset, exc):
+            # global-only event: cannot be disabled per code location
+            if code.co_filename == filename and get_ident() == thread:
+                leave(getframe(1), None, True)
+
+        events = mon.events
+        callbacks = {}
+        if on_call is not None:
+            # settrace reports a generator resuming as a call too
+            callbacks[events.PY_START] = start_event
+            callbacks[events.PY_RESUME] = start_event
+        if on_line is not None:
+            callbacks[events.LINE] = line_event
+            callbacks[events.JUMP] = jump_event
+        if on_return is not None or on_call is not None:
+            # also needed to forget accepted frames
+            callbacks[events.PY_RETURN] = return_event
+            callbacks[events.PY_YIELD] = return_event
+            callbacks[events.PY_UNWIND] = unwind_event
+        return callbacks
+
+    def start(self):
+        """False when another tool (a debugger, another trace) holds the tool id."""
+        mon = sys.monitoring
+        try:
+            mon.use_tool_id(self.tool, "decapsule-tracer")
+        except ValueError:
+            return False
+        mask = 0
+        for event, callback in self._callbacks().items():
+            mon.register_callback(self.tool, event, callback)
+            mask |= event
+        self.events = mask
+        mon.set_events(self.tool, mask)
+        return True
+
+    def stop(self):
+        mon = sys.monitoring
+        mon.set_events(self.tool, 0)
+        for event in self._events_in(self.events):
+            mon.register_callback(self.tool, event, None)
+        mon.free_tool_id(self.tool)
+        # locations disabled during this trace must fire again for the next one
+        mon.restart_events()
+
+    @staticmethod
+    def _events_in(mask):
+        bit = 1
+        while bit <= mask:
+            if mask & bit:
+                yield bit
+            bit <<= 1
+
+
+def monitoring_available() -> bool:
+    return hasattr(sys, "monitoring")
+
+
+@contextmanager
+def tracing(filename, on_call=None, on_line=None, on_return=None, backend=None):
+    """
+    Trace frames of `filename` in the current thread for the duration of the
+    block; yields the backend name. backend=None uses TRACE_BACKEND, and
+    "monitoring" falls back to settrace when it is unavailable or busy.
+    """
+    choice = backend or TRACE_BACKEND
+    tracer = None
+    if choice != "settrace" and monitoring_available():
+        tracer = MonitoringBackend(filename, on_call, on_line, on_return)
+        if not tracer.start():
+            tracer = None
+    if tracer is None:
+        tracer = SettraceBackend(filename, on_call, on_line, on_return)
+        tracer.start()
+    try:
+        yield tracer.name
+    finally:
+        tracer.stop()
@@ -1,8 +1,11 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from routes.run import router as run_router
 # from routes.analyze import router as analyze_router
@@ -13,10 +16,23 @@ from routes.fix import router as fix_router
 # from routes.dp import router as dp_router
 from routes.process import router as process_router
 from routes.process_stream import router as process_stream_router
+from routes.jobs import router as jobs_router
+from routes.debug_session import router as debug_session_router
+from routes.trace import router as trace_router
+
+from services.admission import Overloaded
+from services.warmup import warm_up
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # uvicorn only starts accepting connections once this has run;
+    # one-time boot work (job resume) runs in a single worker
+    app.state.warmup = warm_up()
+    yield
 
 
-app = FastAPI(title="DECAPSULE Backend", description="AI Debugger Backend")
+app = FastAPI(title="DECAPSULE Backend", description="AI Debugger Backend", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -34,6 +50,19 @@ app.include_router(fix_router, prefix="/fix")
 # app.include_router(dp_router, prefix="/dp")
 app.include_router(process_router, prefix="/process")
 app.include_router(process_stream_router, prefix="/process_stream")
+app.include_router(jobs_router, prefix="/jobs")
+app.include_router(debug_session_router, prefix="/debug_session")
+app.include_router(trace_router, prefix="/trace")
+
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    # a pool filled up after admission: shed the request instead of queueing forever
+    return JSONResponse(
+        status_code=429,
+        content={"ok": False, "error": str(exc)},
+        headers={"Retry-After": str(max(1, int(exc.retry_after)))},
+    )
 
 
 @app.get("/")
@@ -21,11 +21,20 @@
 # """
 
 # ml/explain_prompt.py
-def make_explain_prompt(code, trace, concise: bool = False):
+from ml.trace_summary import EXPLAIN_TRACE_TOKENS, clip_to_budget, summarize_trace
+
+
+def make_explain_prompt(code, trace, concise: bool = False, budget_tokens: int = EXPLAIN_TRACE_TOKENS):
     """
     Build a clear, structured explanation prompt.
     - 'concise' will ask for a shorter explanation suitable for UI summaries.
+    - the trace is summarized to at most 'budget_tokens'; a string is taken
+      as an already-made summary (the pipeline's) and only clipped to the budget
     """
+    if isinstance(trace, str):
+        trace = clip_to_budget(trace, budget_tokens)
+    else:
+        trace = summarize_trace(trace, budget_tokens)["text"]
     length_hint = "short and concise" if concise else "detailed and step-by-step"
     return f"""
 SYSTEM: You are an expert AI debugger and DSA instructor. Speak clearly and precisely.
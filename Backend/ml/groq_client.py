@@ -1,17 +1,28 @@
 # ml/groq_client.py
 import os
-from dotenv import load_dotenv
-from groq import Groq
+import threading
 
-# Load .env
-load_dotenv()
+# .env is loaded once by main.py; the Groq SDK (and its HTTP stack) is only
+# imported when the first LLM call actually happens, keeping cold start fast.
 
-# Load Groq API Key
-GROQ_KEY = os.getenv("GROQ_API_KEY")
+MODEL = "openai/gpt-oss-20b"  # best general-purpose model on Groq
 
-client = Groq(api_key=GROQ_KEY)
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Build the Groq client on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from groq import Groq
+
+                # Load Groq API Key
+                _client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    return _client
 
-MODEL = "openai/gpt-oss-20b"  # best general-purpose model on Groq
 
 def call_groq(prompt: str, json_mode: bool = False):
     """
@@ -20,6 +31,8 @@ def call_groq(prompt: str, json_mode: bool = False):
     """
 
     try:
+        client = get_client()
+
         if json_mode:
             # Ask Groq to return JSON
             completion = client.chat.completions.create(
@@ -1,5 +1,4 @@
 # backend/ml/local_llm.py
-import requests
 import os
 from typing import Optional
 
@@ -20,6 +19,8 @@ def call_local_llm(prompt: str, model: str = "llama3.1", max_tokens: int = 512)
         "stream": False
     }
     try:
+        import requests  # only needed when the local fallback is actually used
+
         resp = requests.post(OLLAMA_URL, json=payload, timeout=20)
         resp.raise_for_status()
         data = resp.json()
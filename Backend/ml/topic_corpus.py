@@ -0,0 +1,1498 @@
+# ml/topic_corpus.py
+# Labelled snippets for ml/train_topic_model.py, one list per pipeline topic
+# plus "pointer" (linked structures) and "unknown" (everything else).
+# Deliberately mixed: some use the names the keyword heuristics look for,
+# many do not (the model is only consulted when the heuristics fail), and
+# the training script adds copies with every identifier renamed.
+from typing import List, Tuple
+
+RECURSION = [
+    """
+def fact(n):
+    if n <= 1:
+        return 1
+    return n * fact(n - 1)
+
+print(fact(6))
+""",
+    """
+def power(base, exp):
+    if exp == 0:
+        return 1
+    half = power(base, exp // 2)
+    if exp % 2:
+        return half * half * base
+    return half * half
+
+print(power(3, 13))
+""",
+    """
+def hanoi(k, a, b, c):
+    if k == 0:
+        return 0
+    moves = hanoi(k - 1, a, c, b)
+    moves += 1
+    return moves + hanoi(k - 1, c, b, a)
+
+print(hanoi(5, "A", "B", "C"))
+""",
+    """
+def gcd(a, b):
+    if b == 0:
+        return a
+    return gcd(b, a % b)
+
+print(gcd(84, 36))
+""",
+    """
+def count_down(x):
+    if x < 0:
+        return
+    print(x)
+    count_down(x - 1)
+
+count_down(5)
+""",
+    """
+def digits(n):
+    if n < 10:
+        return n
+    return n % 10 + digits(n // 10)
+
+print(digits(98765))
+""",
+    """
+def perms(items):
+    if len(items) <= 1:
+        return [items]
+    out = []
+    for i in range(len(items)):
+        for rest in perms(items[:i] + items[i + 1:]):
+            out.append([items[i]] + rest)
+    return out
+
+print(len(perms([1, 2, 3, 4])))
+""",
+    """
+def subsets(nums, i=0, cur=None):
+    if cur is None:
+        cur = []
+    if i == len(nums):
+        print(cur)
+        return
+    subsets(nums, i + 1, cur)
+    subsets(nums, i + 1, cur + [nums[i]])
+
+subsets([1, 2, 3])
+""",
+    """
+def g(n):
+    if n < 2:
+        return n
+    return g(n - 1) + g(n - 2)
+
+print(g(10))
+""",
+    """
+def binary(n):
+    if n == 0:
+        return ""
+    return binary(n // 2) + str(n % 2)
+
+print(binary(37))
+""",
+    """
+def ackermann(m, n):
+    if m == 0:
+        return n + 1
+    if n == 0:
+        return ackermann(m - 1, 1)
+    return ackermann(m - 1, ackermann(m, n - 1))
+
+print(ackermann(2, 3))
+""",
+    """
+def depth(tree):
+    if not tree:
+        return 0
+    left, right = tree[1], tree[2]
+    return 1 + max(depth(left), depth(right))
+
+t = (1, (2, None, None), (3, (4, None, None), None))
+print(depth(t))
+""",
+    """
+def merge_sort(a):
+    if len(a) < 2:
+        return a
+    mid = len(a) // 2
+    left = merge_sort(a[:mid])
+    right = merge_sort(a[mid:])
+    out = []
+    while left and right:
+        out.append(left.pop(0) if left[0] < right[0] else right.pop(0))
+    return out + left + right
+
+print(merge_sort([5, 2, 9, 1, 7]))
+""",
+    """
+def s(n):
+    return 0 if n == 0 else n + s(n - 1)
+
+print(s(50))
+""",
+]
+
+DP_TOPDOWN = [
+    """
+memo = {}
+
+def fib(n):
+    if n < 2:
+        return n
+    if n in memo:
+        return memo[n]
+    memo[n] = fib(n - 1) + fib(n - 2)
+    return memo[n]
+
+print(fib(40))
+""",
+    """
+from functools import lru_cache
+
+@lru_cache(maxsize=None)
+def ways(n):
+    if n <= 1:
+        return 1
+    return ways(n - 1) + ways(n - 2)
+
+print(ways(30))
+""",
+    """
+seen = {}
+
+def paths(r, c):
+    if r == 0 or c == 0:
+        return 1
+    key = (r, c)
+    if key in seen:
+        return seen[key]
+    seen[key] = paths(r - 1, c) + paths(r, c - 1)
+    return seen[key]
+
+print(paths(10, 10))
+""",
+    """
+from functools import cache
+
+@cache
+def coins(amount, i):
+    if amount == 0:
+        return 1
+    if amount < 0 or i == 3:
+        return 0
+    return coins(amount - [1, 2, 5][i], i) + coins(amount, i + 1)
+
+print(coins(11, 0))
+""",
+    """
+known = {0: 0, 1: 1}
+
+def t(n):
+    if n not in known:
+        known[n] = t(n - 1) + t(n - 2) + t(n - 3) if n > 2 else n
+    return known[n]
+
+print(t(25))
+""",
+    """
+def knap(i, cap, w, v, store):
+    if i == len(w) or cap == 0:
+        return 0
+    if (i, cap) in store:
+        return store[(i, cap)]
+    best = knap(i + 1, cap, w, v, store)
+    if w[i] <= cap:
+        best = max(best, v[i] + knap(i + 1, cap - w[i], w, v, store))
+    store[(i, cap)] = best
+    return best
+
+print(knap(0, 10, [5, 4, 6, 3], [10, 40, 30, 50], {}))
+""",
+    """
+table = {}
+
+def lcs(a, b, i, j):
+    if i == len(a) or j == len(b):
+        return 0
+    if (i, j) in table:
+        return table[(i, j)]
+    if a[i] == b[j]:
+        res = 1 + lcs(a, b, i + 1, j + 1)
+    else:
+        res = max(lcs(a, b, i + 1, j), lcs(a, b, i, j + 1))
+    table[(i, j)] = res
+    return res
+
+print(lcs("abcde", "ace", 0, 0))
+""",
+    """
+cache_ = {}
+
+def climb(n):
+    if n <= 2:
+        return n
+    if n not in cache_:
+        cache_[n] = climb(n - 1) + climb(n - 2)
+    return cache_[n]
+
+print(climb(35))
+""",
+    """
+def min_cost(i, cost, m):
+    if i >= len(cost):
+        return 0
+    if i in m:
+        return m[i]
+    m[i] = cost[i] + min(min_cost(i + 1, cost, m), min_cost(i + 2, cost, m))
+    return m[i]
+
+c = [10, 15, 20, 5, 1]
+print(min(min_cost(0, c, {}), min_cost(1, c, {})))
+""",
+    """
+d = {}
+
+def f(n):
+    if n == 1:
+        return 0
+    if n in d:
+        return d[n]
+    best = f(n - 1) + 1
+    if n % 2 == 0:
+        best = min(best, f(n // 2) + 1)
+    d[n] = best
+    return best
+
+print(f(100))
+""",
+    """
+import functools
+
+@functools.lru_cache(None)
+def partitions(n, k):
+    if n == 0:
+        return 1
+    if n < 0 or k == 0:
+        return 0
+    return partitions(n - k, k) + partitions(n, k - 1)
+
+print(partitions(20, 20))
+""",
+    """
+res = {}
+
+def jump(i, nums):
+    if i >= len(nums) - 1:
+        return 0
+    if i in res:
+        return res[i]
+    best = 10 ** 9
+    for step in range(1, nums[i] + 1):
+        best = min(best, 1 + jump(i + step, nums))
+    res[i] = best
+    return best
+
+print(jump(0, [2, 3, 1, 1, 4]))
+""",
+]
+
+DP_BOTTOMUP = [
+    """
+n = 10
+dp = [0] * (n + 1)
+dp[1] = 1
+for i in range(2, n + 1):
+    dp[i] = dp[i - 1] + dp[i - 2]
+print(dp[n])
+""",
+    """
+coins = [1, 2, 5]
+amount = 11
+best = [float("inf")] * (amount + 1)
+best[0] = 0
+for a in range(1, amount + 1):
+    for c in coins:
+        if c <= a:
+            best[a] = min(best[a], best[a - c] + 1)
+print(best[amount])
+""",
+    """
+a = "kitten"
+b = "sitting"
+t = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+for i in range(len(a) + 1):
+    t[i][0] = i
+for j in range(len(b) + 1):
+    t[0][j] = j
+for i in range(1, len(a) + 1):
+    for j in range(1, len(b) + 1):
+        cost = 0 if a[i - 1] == b[j - 1] else 1
+        t[i][j] = min(t[i - 1][j] + 1, t[i][j - 1] + 1, t[i - 1][j - 1] + cost)
+print(t[len(a)][len(b)])
+""",
+    """
+w = [1, 3, 4, 5]
+v = [1, 4, 5, 7]
+cap = 7
+K = [[0] * (cap + 1) for _ in range(len(w) + 1)]
+for i in range(1, len(w) + 1):
+    for c in range(cap + 1):
+        K[i][c] = K[i - 1][c]
+        if w[i - 1] <= c:
+            K[i][c] = max(K[i][c], K[i - 1][c - w[i - 1]] + v[i - 1])
+print(K[len(w)][cap])
+""",
+    """
+rows, cols = 4, 5
+grid = [[1] * cols for _ in range(rows)]
+for r in range(1, rows):
+    for c in range(1, cols):
+        grid[r][c] = grid[r - 1][c] + grid[r][c - 1]
+print(grid[rows - 1][cols - 1])
+""",
+    """
+nums = [10, 9, 2, 5, 3, 7, 101, 18]
+L = [1] * len(nums)
+for i in range(len(nums)):
+    for j in range(i):
+        if nums[j] < nums[i]:
+            L[i] = max(L[i], L[j] + 1)
+print(max(L))
+""",
+    """
+steps = 12
+ways = [0] * (steps + 1)
+ways[0] = 1
+for i in range(1, steps + 1):
+    ways[i] += ways[i - 1]
+    if i >= 2:
+        ways[i] += ways[i - 2]
+print(ways[steps])
+""",
+    """
+cost = [[1, 3, 1], [1, 5, 1], [4, 2, 1]]
+m, n = len(cost), len(cost[0])
+acc = [[0] * n for _ in range(m)]
+acc[0][0] = cost[0][0]
+for i in range(m):
+    for j in range(n):
+        if i == 0 and j == 0:
+            continue
+        up = acc[i - 1][j] if i else float("inf")
+        left = acc[i][j - 1] if j else float("inf")
+        acc[i][j] = cost[i][j] + min(up, left)
+print(acc[m - 1][n - 1])
+""",
+    """
+x = "abcbdab"
+y = "bdcaba"
+M = [[0] * (len(y) + 1) for _ in range(len(x) + 1)]
+for i in range(1, len(x) + 1):
+    for j in range(1, len(y) + 1):
+        if x[i - 1] == y[j - 1]:
+            M[i][j] = M[i - 1][j - 1] + 1
+        else:
+            M[i][j] = max(M[i - 1][j], M[i][j - 1])
+print(M[-1][-1])
+""",
+    """
+vals = [3, 34, 4, 12, 5, 2]
+target = 9
+ok = [False] * (target + 1)
+ok[0] = True
+for v in vals:
+    for s in range(target, v - 1, -1):
+        ok[s] = ok[s] or ok[s - v]
+print(ok[target])
+""",
+    """
+h = [2, 7, 9, 3, 1]
+rob = [0] * (len(h) + 1)
+rob[1] = h[0]
+for i in range(2, len(h) + 1):
+    rob[i] = max(rob[i - 1], rob[i - 2] + h[i - 1])
+print(rob[-1])
+""",
+    """
+n = 6
+cat = [0] * (n + 1)
+cat[0] = 1
+for i in range(1, n + 1):
+    for j in range(i):
+        cat[i] += cat[j] * cat[i - 1 - j]
+print(cat[n])
+""",
+]
+
+GRAPH_BFS = [
+    """
+from collections import deque
+
+graph = {"A": ["B", "C"], "B": ["D"], "C": ["D", "E"], "D": [], "E": []}
+
+def bfs(start):
+    visited = {start}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        print(node)
+        for nxt in graph[node]:
+            if nxt not in visited:
+                visited.add(nxt)
+                queue.append(nxt)
+
+bfs("A")
+""",
+    """
+adj = {1: [2, 3], 2: [4], 3: [4], 4: []}
+seen = [1]
+todo = [1]
+while todo:
+    cur = todo.pop(0)
+    for nb in adj[cur]:
+        if nb not in seen:
+            seen.append(nb)
+            todo.append(nb)
+print(seen)
+""",
+    """
+from collections import deque
+
+def shortest(grid, start, goal):
+    rows, cols = len(grid), len(grid[0])
+    dist = {start: 0}
+    q = deque([start])
+    while q:
+        r, c = q.popleft()
+        if (r, c) == goal:
+            return dist[(r, c)]
+        for dr, dc in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < rows and 0 <= nc < cols and grid[nr][nc] == 0 and (nr, nc) not in dist:
+                dist[(nr, nc)] = dist[(r, c)] + 1
+                q.append((nr, nc))
+    return -1
+
+print(shortest([[0, 0, 1], [1, 0, 0], [0, 0, 0]], (0, 0), (2, 2)))
+""",
+    """
+edges = [(0, 1), (0, 2), (1, 3), (2, 3), (3, 4)]
+nbrs = {i: [] for i in range(5)}
+for a, b in edges:
+    nbrs[a].append(b)
+    nbrs[b].append(a)
+level = {0: 0}
+frontier = [0]
+while frontier:
+    nxt = []
+    for u in frontier:
+        for w in nbrs[u]:
+            if w not in level:
+                level[w] = level[u] + 1
+                nxt.append(w)
+    frontier = nxt
+print(level)
+""",
+    """
+import collections
+
+def levels(tree, root):
+    out = []
+    dq = collections.deque([root])
+    while dq:
+        size = len(dq)
+        row = []
+        for _ in range(size):
+            x = dq.popleft()
+            row.append(x)
+            dq.extend(tree.get(x, []))
+        out.append(row)
+    return out
+
+print(levels({1: [2, 3], 2: [4, 5], 3: [6]}, 1))
+""",
+    """
+from collections import deque
+
+words = {"hot", "dot", "dog", "lot", "log", "cog"}
+
+def ladder(begin, end):
+    q = deque([(begin, 1)])
+    used = {begin}
+    while q:
+        w, d = q.popleft()
+        if w == end:
+            return d
+        for i in range(len(w)):
+            for ch in "abcdefghijklmnopqrstuvwxyz":
+                cand = w[:i] + ch + w[i + 1:]
+                if cand in words and cand not in used:
+                    used.add(cand)
+                    q.append((cand, d + 1))
+    return 0
+
+print(ladder("hit", "cog"))
+""",
+    """
+from collections import deque
+
+n = 6
+links = [[1, 2], [0, 3], [0, 4], [1, 5], [2], [3]]
+parent = [-1] * n
+parent[0] = 0
+q = deque([0])
+while q:
+    u = q.popleft()
+    for v in links[u]:
+        if parent[v] == -1:
+            parent[v] = u
+            q.append(v)
+print(parent)
+""",
+    """
+indeg = {"a": 0, "b": 1, "c": 1, "d": 2}
+out = {"a": ["b", "c"], "b": ["d"], "c": ["d"], "d": []}
+ready = [k for k in indeg if indeg[k] == 0]
+order = []
+while ready:
+    k = ready.pop(0)
+    order.append(k)
+    for m in out[k]:
+        indeg[m] -= 1
+        if indeg[m] == 0:
+            ready.append(m)
+print(order)
+""",
+    """
+from collections import deque
+
+def infect(grid):
+    q = deque()
+    for r, row in enumerate(grid):
+        for c, val in enumerate(row):
+            if val == 2:
+                q.append((r, c, 0))
+    minutes = 0
+    while q:
+        r, c, t = q.popleft()
+        minutes = max(minutes, t)
+        for nr, nc in ((r + 1, c), (r - 1, c), (r, c + 1), (r, c - 1)):
+            if 0 <= nr < len(grid) and 0 <= nc < len(grid[0]) and grid[nr][nc] == 1:
+                grid[nr][nc] = 2
+                q.append((nr, nc, t + 1))
+    return minutes
+
+print(infect([[2, 1, 1], [1, 1, 0], [0, 1, 1]]))
+""",
+    """
+from collections import deque
+
+g = {0: [1, 4], 1: [2], 2: [3], 3: [], 4: [3]}
+d = {0: 0}
+pending = deque([0])
+while pending:
+    x = pending.popleft()
+    for y in g[x]:
+        if y not in d:
+            d[y] = d[x] + 1
+            pending.append(y)
+print(d[3])
+""",
+]
+
+GRAPH_DFS = [
+    """
+graph = {"A": ["B", "C"], "B": ["D"], "C": ["E"], "D": [], "E": []}
+visited = set()
+
+def dfs(node):
+    if node in visited:
+        return
+    visited.add(node)
+    print(node)
+    for nxt in graph[node]:
+        dfs(nxt)
+
+dfs("A")
+""",
+    """
+adj = {1: [2, 3], 2: [4], 3: [4], 4: []}
+stack = [1]
+seen = set()
+while stack:
+    u = stack.pop()
+    if u in seen:
+        continue
+    seen.add(u)
+    print(u)
+    for v in reversed(adj[u]):
+        stack.append(v)
+""",
+    """
+def islands(grid):
+    rows, cols = len(grid), len(grid[0])
+
+    def sink(r, c):
+        if r < 0 or c < 0 or r >= rows or c >= cols or grid[r][c] != 1:
+            return
+        grid[r][c] = 0
+        sink(r + 1, c)
+        sink(r - 1, c)
+        sink(r, c + 1)
+        sink(r, c - 1)
+
+    count = 0
+    for r in range(rows):
+        for c in range(cols):
+            if grid[r][c] == 1:
+                count += 1
+                sink(r, c)
+    return count
+
+print(islands([[1, 1, 0], [0, 1, 0], [1, 0, 1]]))
+""",
+    """
+nbrs = {0: [1, 2], 1: [2], 2: [0, 3], 3: [3]}
+state = {}
+
+def has_cycle(u):
+    state[u] = "open"
+    for v in nbrs[u]:
+        if state.get(v) == "open":
+            return True
+        if v not in state and has_cycle(v):
+            return True
+    state[u] = "done"
+    return False
+
+print(any(has_cycle(u) for u in nbrs if u not in state))
+""",
+    """
+out = {"shirt": ["tie"], "tie": ["jacket"], "pants": ["shoes", "belt"], "belt": ["jacket"], "shoes": [], "jacket": []}
+order = []
+done = set()
+
+def visit(x):
+    done.add(x)
+    for y in out[x]:
+        if y not in done:
+            visit(y)
+    order.append(x)
+
+for k in out:
+    if k not in done:
+        visit(k)
+print(order[::-1])
+""",
+    """
+links = [[1], [2], [0], [4], []]
+mark = [False] * len(links)
+comp = []
+
+def explore(u, acc):
+    mark[u] = True
+    acc.append(u)
+    for v in links[u]:
+        if not mark[v]:
+            explore(v, acc)
+
+for s in range(len(links)):
+    if not mark[s]:
+        part = []
+        explore(s, part)
+        comp.append(part)
+print(comp)
+""",
+    """
+maze = ["S.#", "..#", "#.E"]
+
+def solve(r, c, path, been):
+    if not (0 <= r < 3 and 0 <= c < 3) or maze[r][c] == "#" or (r, c) in been:
+        return None
+    if maze[r][c] == "E":
+        return path + [(r, c)]
+    been.add((r, c))
+    for dr, dc in ((0, 1), (1, 0), (0, -1), (-1, 0)):
+        found = solve(r + dr, c + dc, path + [(r, c)], been)
+        if found:
+            return found
+    return None
+
+print(solve(0, 0, [], set()))
+""",
+    """
+tree = {1: [2, 3], 2: [4, 5], 3: [], 4: [], 5: []}
+todo = [(1, 0)]
+deepest = 0
+while todo:
+    node, d = todo.pop()
+    deepest = max(deepest, d)
+    for child in tree[node]:
+        todo.append((child, d + 1))
+print(deepest)
+""",
+    """
+g = {"a": ["b"], "b": ["c", "d"], "c": [], "d": ["a"]}
+on_path = set()
+found = []
+
+def walk(x, trail):
+    if x in on_path:
+        found.append(trail + [x])
+        return
+    on_path.add(x)
+    for y in g[x]:
+        walk(y, trail + [x])
+    on_path.discard(x)
+
+walk("a", [])
+print(found)
+""",
+    """
+edges = {0: [1, 2], 1: [3], 2: [3], 3: []}
+
+def all_paths(u, target, path, acc):
+    path.append(u)
+    if u == target:
+        acc.append(list(path))
+    else:
+        for v in edges[u]:
+            all_paths(v, target, path, acc)
+    path.pop()
+    return acc
+
+print(all_paths(0, 3, [], []))
+""",
+]
+
+ARRAY = [
+    """
+arr = [4, 2, 7, 1, 9]
+best = arr[0]
+for i in range(1, len(arr)):
+    if arr[i] > best:
+        best = arr[i]
+print(best)
+""",
+    """
+nums = [3, 1, 4, 1, 5, 9, 2, 6]
+for i in range(len(nums)):
+    for j in range(len(nums) - 1 - i):
+        if nums[j] > nums[j + 1]:
+            nums[j], nums[j + 1] = nums[j + 1], nums[j]
+print(nums)
+""",
+    """
+a = [1, 3, 5, 7, 9, 11]
+target = 7
+lo, hi = 0, len(a) - 1
+while lo <= hi:
+    mid = (lo + hi) // 2
+    if a[mid] == target:
+        print(mid)
+        break
+    if a[mid] < target:
+        lo = mid + 1
+    else:
+        hi = mid - 1
+""",
+    """
+values = [2, 7, 11, 15]
+goal = 9
+i, j = 0, len(values) - 1
+while i < j:
+    s = values[i] + values[j]
+    if s == goal:
+        print(i, j)
+        break
+    if s < goal:
+        i += 1
+    else:
+        j -= 1
+""",
+    """
+xs = [1, -2, 3, 10, -4, 7, 2, -5]
+cur = total = xs[0]
+for x in xs[1:]:
+    cur = max(x, cur + x)
+    total = max(total, cur)
+print(total)
+""",
+    """
+data = [5, 1, 4, 2, 8]
+prefix = [0] * (len(data) + 1)
+for i, v in enumerate(data):
+    prefix[i + 1] = prefix[i] + v
+print(prefix[4] - prefix[1])
+""",
+    """
+m = [[1, 2, 3], [4, 5, 6]]
+t = [[m[r][c] for r in range(len(m))] for c in range(len(m[0]))]
+print(t)
+""",
+    """
+items = [1, 2, 3, 4, 5, 6]
+k = 2
+k %= len(items)
+items[:] = items[-k:] + items[:-k]
+print(items)
+""",
+    """
+nums = [0, 1, 0, 3, 12]
+w = 0
+for r in range(len(nums)):
+    if nums[r] != 0:
+        nums[w], nums[r] = nums[r], nums[w]
+        w += 1
+print(nums)
+""",
+    """
+heights = [1, 8, 6, 2, 5, 4, 8, 3, 7]
+l, r = 0, len(heights) - 1
+area = 0
+while l < r:
+    area = max(area, (r - l) * min(heights[l], heights[r]))
+    if heights[l] < heights[r]:
+        l += 1
+    else:
+        r -= 1
+print(area)
+""",
+    """
+def window(a, k):
+    s = sum(a[:k])
+    best = s
+    for i in range(k, len(a)):
+        s += a[i] - a[i - k]
+        best = max(best, s)
+    return best
+
+print(window([2, 1, 5, 1, 3, 2], 3))
+""",
+    """
+def partition(a, lo, hi):
+    pivot = a[hi]
+    i = lo
+    for j in range(lo, hi):
+        if a[j] < pivot:
+            a[i], a[j] = a[j], a[i]
+            i += 1
+    a[i], a[hi] = a[hi], a[i]
+    return i
+
+seq = [9, 3, 7, 1, 5]
+print(partition(seq, 0, len(seq) - 1), seq)
+""",
+    """
+counts = [0] * 10
+for d in [3, 1, 3, 9, 0, 3]:
+    counts[d] += 1
+print(counts.index(max(counts)))
+""",
+]
+
+STRING = [
+    """
+s = "racecar"
+print(s == s[::-1])
+""",
+    """
+text = "hello world"
+out = ""
+for ch in text:
+    if ch in "aeiou":
+        out += ch.upper()
+    else:
+        out += ch
+print(out)
+""",
+    """
+words = "the quick brown fox".split()
+print(" ".join(w[::-1] for w in words))
+""",
+    """
+def is_anagram(a, b):
+    freq = {}
+    for ch in a:
+        freq[ch] = freq.get(ch, 0) + 1
+    for ch in b:
+        freq[ch] = freq.get(ch, 0) - 1
+    return all(v == 0 for v in freq.values())
+
+print(is_anagram("listen", "silent"))
+""",
+    """
+s = "abcabcbb"
+start = best = 0
+last = {}
+for i, ch in enumerate(s):
+    if ch in last and last[ch] >= start:
+        start = last[ch] + 1
+    last[ch] = i
+    best = max(best, i - start + 1)
+print(best)
+""",
+    """
+msg = "Attack at dawn"
+shift = 3
+enc = ""
+for c in msg:
+    if c.isalpha():
+        base = ord("A") if c.isupper() else ord("a")
+        enc += chr((ord(c) - base + shift) % 26 + base)
+    else:
+        enc += c
+print(enc)
+""",
+    """
+p = "aaabccdddd"
+res = []
+i = 0
+while i < len(p):
+    j = i
+    while j < len(p) and p[j] == p[i]:
+        j += 1
+    res.append(p[i] + str(j - i))
+    i = j
+print("".join(res))
+""",
+    """
+line = "  Hello,   World  "
+print(line.strip().lower().replace(",", ""))
+""",
+    """
+def longest_prefix(strs):
+    pre = strs[0]
+    for w in strs[1:]:
+        while not w.startswith(pre):
+            pre = pre[:-1]
+    return pre
+
+print(longest_prefix(["flower", "flow", "flight"]))
+""",
+    """
+t = "A man, a plan, a canal: Panama"
+clean = [c.lower() for c in t if c.isalnum()]
+print(clean == clean[::-1])
+""",
+    """
+name = input()
+initials = ""
+for part in name.split(" "):
+    if part:
+        initials += part[0].upper()
+print(initials)
+""",
+    """
+sentence = "to be or not to be"
+tally = {}
+for w in sentence.split():
+    tally[w] = tally.get(w, 0) + 1
+print(max(tally, key=tally.get))
+""",
+    """
+def expand(st, lo, hi):
+    while lo >= 0 and hi < len(st) and st[lo] == st[hi]:
+        lo -= 1
+        hi += 1
+    return st[lo + 1:hi]
+
+word = "babad"
+best = ""
+for k in range(len(word)):
+    for cand in (expand(word, k, k), expand(word, k, k + 1)):
+        if len(cand) > len(best):
+            best = cand
+print(best)
+""",
+]
+
+POINTER = [
+    """
+class Node:
+    def __init__(self, val, nxt=None):
+        self.val = val
+        self.next = nxt
+
+def reverse(head):
+    prev = None
+    cur = head
+    while cur:
+        nxt = cur.next
+        cur.next = prev
+        prev = cur
+        cur = nxt
+    return prev
+
+head = Node(1, Node(2, Node(3)))
+r = reverse(head)
+while r:
+    print(r.val)
+    r = r.next
+""",
+    """
+class ListNode:
+    def __init__(self, x):
+        self.val = x
+        self.next = None
+
+def has_cycle(head):
+    slow = fast = head
+    while fast and fast.next:
+        slow = slow.next
+        fast = fast.next.next
+        if slow is fast:
+            return True
+    return False
+
+a = ListNode(1)
+a.next = ListNode(2)
+a.next.next = a
+print(has_cycle(a))
+""",
+    """
+class Node:
+    def __init__(self, data):
+        self.data = data
+        self.next = None
+
+def middle(head):
+    slow = head
+    fast = head
+    while fast is not None and fast.next is not None:
+        slow = slow.next
+        fast = fast.next.next
+    return slow.data
+
+h = Node(1)
+cur = h
+for v in range(2, 8):
+    cur.next = Node(v)
+    cur = cur.next
+print(middle(h))
+""",
+    """
+class N:
+    def __init__(self, v, n=None):
+        self.v = v
+        self.n = n
+
+def merge(a, b):
+    dummy = tail = N(0)
+    while a and b:
+        if a.v <= b.v:
+            tail.n, a = a, a.n
+        else:
+            tail.n, b = b, b.n
+        tail = tail.n
+    tail.n = a or b
+    return dummy.n
+
+x = merge(N(1, N(4, N(6))), N(2, N(3, N(7))))
+while x:
+    print(x.v)
+    x = x.n
+""",
+    """
+class Node:
+    def __init__(self, val):
+        self.val = val
+        self.prev = None
+        self.next = None
+
+class DoublyLinkedList:
+    def __init__(self):
+        self.head = None
+        self.tail = None
+
+    def push(self, val):
+        node = Node(val)
+        if self.tail is None:
+            self.head = self.tail = node
+        else:
+            node.prev = self.tail
+            self.tail.next = node
+            self.tail = node
+
+    def remove(self, node):
+        if node.prev:
+            node.prev.next = node.next
+        else:
+            self.head = node.next
+        if node.next:
+            node.next.prev = node.prev
+        else:
+            self.tail = node.prev
+
+d = DoublyLinkedList()
+for i in range(4):
+    d.push(i)
+d.remove(d.head.next)
+p = d.head
+while p:
+    print(p.val)
+    p = p.next
+""",
+    """
+class ListNode:
+    def __init__(self, val=0, next=None):
+        self.val = val
+        self.next = next
+
+def remove_nth_from_end(head, n):
+    dummy = ListNode(0, head)
+    lead = lag = dummy
+    for _ in range(n + 1):
+        lead = lead.next
+    while lead:
+        lead = lead.next
+        lag = lag.next
+    lag.next = lag.next.next
+    return dummy.next
+
+h = ListNode(1, ListNode(2, ListNode(3, ListNode(4))))
+h = remove_nth_from_end(h, 2)
+while h:
+    print(h.val)
+    h = h.next
+""",
+    """
+class Item:
+    def __init__(self, key):
+        self.key = key
+        self.link = None
+
+first = Item("a")
+first.link = Item("b")
+first.link.link = Item("c")
+
+node = first
+count = 0
+while node is not None:
+    count += 1
+    node = node.link
+print(count)
+""",
+    """
+class Node:
+    def __init__(self, val, nxt=None):
+        self.val = val
+        self.next = nxt
+
+def insert_sorted(head, val):
+    new = Node(val)
+    if head is None or val < head.val:
+        new.next = head
+        return new
+    cur = head
+    while cur.next and cur.next.val < val:
+        cur = cur.next
+    new.next = cur.next
+    cur.next = new
+    return head
+
+h = None
+for v in [5, 1, 4, 2]:
+    h = insert_sorted(h, v)
+while h:
+    print(h.val)
+    h = h.next
+""",
+    """
+class Node:
+    def __init__(self, v):
+        self.v = v
+        self.next = None
+
+def intersection(a, b):
+    p, q = a, b
+    while p is not q:
+        p = p.next if p else b
+        q = q.next if q else a
+    return p
+
+shared = Node(8)
+shared.next = Node(9)
+a = Node(1)
+a.next = shared
+b = Node(5)
+b.next = Node(6)
+b.next.next = shared
+print(intersection(a, b).v)
+""",
+    """
+class Stack:
+    class _Node:
+        def __init__(self, value, below):
+            self.value = value
+            self.below = below
+
+    def __init__(self):
+        self.top = None
+
+    def push(self, value):
+        self.top = self._Node(value, self.top)
+
+    def pop(self):
+        node = self.top
+        self.top = node.below
+        return node.value
+
+s = Stack()
+for i in range(3):
+    s.push(i)
+print(s.pop(), s.pop())
+""",
+    """
+class Node:
+    def __init__(self, val, next=None):
+        self.val = val
+        self.next = next
+
+def rotate(head, k):
+    if not head:
+        return head
+    length, tail = 1, head
+    while tail.next:
+        tail = tail.next
+        length += 1
+    tail.next = head
+    for _ in range(length - k % length):
+        tail = tail.next
+    new_head = tail.next
+    tail.next = None
+    return new_head
+
+h = rotate(Node(1, Node(2, Node(3, Node(4)))), 1)
+while h:
+    print(h.val)
+    h = h.next
+""",
+    """
+class Node:
+    def __init__(self, key, left=None, right=None):
+        self.key = key
+        self.left = left
+        self.right = right
+
+def insert(root, key):
+    if root is None:
+        return Node(key)
+    cur = root
+    while True:
+        if key < cur.key:
+            if cur.left is None:
+                cur.left = Node(key)
+                break
+            cur = cur.left
+        else:
+            if cur.right is None:
+                cur.right = Node(key)
+                break
+            cur = cur.right
+    return root
+
+root = None
+for k in [5, 3, 8, 1]:
+    root = insert(root, k)
+print(root.left.key, root.right.key)
+""",
+]
+
+# code the algorithm topics do not describe: the model should say "unknown"
+# here rather than stretch the nearest topic
+UNKNOWN = [
+    """
+def add(a, b):
+    return a + b
+
+print(add(2, 3))
+""",
+    """
+def area(r):
+    return 3.14159 * r * r
+
+print(area(2))
+""",
+    """
+import json
+
+with open("config.json") as f:
+    config = json.load(f)
+print(config.get("name"))
+""",
+    """
+import requests
+
+resp = requests.get("https://api.example.com/items", timeout=5)
+resp.raise_for_status()
+for item in resp.json():
+    print(item["id"])
+""",
+    """
+def celsius_to_fahrenheit(c):
+    return c * 9 / 5 + 32
+
+temps = [0, 25, 100]
+print([celsius_to_fahrenheit(t) for t in temps])
+""",
+    """
+class Account:
+    def __init__(self, owner, balance=0):
+        self.owner = owner
+        self.balance = balance
+
+    def deposit(self, amount):
+        if amount <= 0:
+            raise ValueError("amount must be positive")
+        self.balance += amount
+
+acct = Account("ana")
+acct.deposit(50)
+print(acct.balance)
+""",
+    """
+from dataclasses import dataclass
+
+@dataclass
+class Point:
+    x: float
+    y: float
+
+    def norm(self):
+        return (self.x ** 2 + self.y ** 2) ** 0.5
+
+print(Point(3, 4).norm())
+""",
+    """
+import csv
+
+with open("people.csv", newline="") as f:
+    reader = csv.DictReader(f)
+    ages = [int(row["age"]) for row in reader]
+print(sum(ages) / len(ages))
+""",
+    """
+import argparse
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--verbose", action="store_true")
+args = parser.parse_args()
+if args.verbose:
+    print("verbose mode")
+""",
+    """
+try:
+    value = int(input())
+except ValueError:
+    value = 0
+print(value * 2)
+""",
+    """
+import math
+
+def hypotenuse(a, b):
+    return math.sqrt(a * a + b * b)
+
+print(hypotenuse(3, 4))
+""",
+    """
+from flask import Flask, jsonify
+
+app = Flask(__name__)
+
+@app.route("/health")
+def health():
+    return jsonify(status="ok")
+""",
+    """
+import os
+
+path = os.path.join(os.getcwd(), "output")
+os.makedirs(path, exist_ok=True)
+print(os.path.exists(path))
+""",
+    """
+def greet(name, greeting="Hello"):
+    return f"{greeting}, {name}!"
+
+print(greet("Sam"))
+""",
+    """
+import datetime
+
+today = datetime.date.today()
+deadline = today + datetime.timedelta(days=30)
+print(deadline.isoformat())
+""",
+    """
+class Shape:
+    def area(self):
+        raise NotImplementedError
+
+class Square(Shape):
+    def __init__(self, side):
+        self.side = side
+
+    def area(self):
+        return self.side * self.side
+
+print(Square(3).area())
+""",
+    """
+import sqlite3
+
+conn = sqlite3.connect(":memory:")
+conn.execute("CREATE TABLE t (x INTEGER)")
+conn.execute("INSERT INTO t VALUES (1)")
+print(conn.execute("SELECT x FROM t").fetchone())
+""",
+    """
+def is_even(n):
+    return n % 2 == 0
+
+print(is_even(7))
+""",
+]
+
+CORPUS = {
+    "recursion": RECURSION,
+    "dp_topdown": DP_TOPDOWN,
+    "dp_bottomup": DP_BOTTOMUP,
+    "graph_bfs": GRAPH_BFS,
+    "graph_dfs": GRAPH_DFS,
+    "array": ARRAY,
+    "string": STRING,
+    "pointer": POINTER,
+    "unknown": UNKNOWN,
+}
+
+# held out of training: train_topic_model.py fails if the model puts any of
+# these in an algorithm topic with at least TOPIC_MODEL_MIN_CONFIDENCE
+OUT_OF_DOMAIN_PROBES = [
+    "def add(a, b): return a + b\n",
+    "def area(r): return 3.14*r*r\n",
+    "import json\nwith open('data.json') as fh:\n    data = json.load(fh)\nprint(data['users'][0])\n",
+    "import requests\nr = requests.get('https://example.com/api', params={'q': 'x'})\nprint(r.status_code, r.text[:100])\n",
+    "def bmi(weight, height):\n    return weight / height ** 2\n\nprint(round(bmi(70, 1.75), 1))\n",
+    "import logging\nlogging.basicConfig(level=logging.INFO)\nlog = logging.getLogger(__name__)\nlog.info('started')\n",
+    "class User:\n    def __init__(self, name, email):\n        self.name = name\n        self.email = email\n\n    def __repr__(self):\n        return f'User({self.name!r})'\n\nprint(User('a', 'a@b.c'))\n",
+    "import random\nprint(random.choice(['rock', 'paper', 'scissors']))\n",
+    "x = 10\ny = 3\nprint(x // y, x % y, x ** y)\n",
+    "from pathlib import Path\nfor p in Path('.').glob('*.txt'):\n    print(p.name, p.stat().st_size)\n",
+]
+
+
+def labelled_snippets() -> List[Tuple[str, str]]:
+    return [(label, code) for label, snippets in CORPUS.items() for code in snippets]
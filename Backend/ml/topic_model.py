@@ -0,0 +1,218 @@
+# ml/topic_model.py
+# Local topic classifier for code the keyword heuristics in
+# engines/classifier.py cannot place. A multinomial logistic regression over
+# AST and token features, trained by ml/train_topic_model.py on the snippets
+# in ml/topic_corpus.py; the weights ship as ml/data/topic_model.json and are
+# loaded once per process. Pure Python: a prediction is one AST walk plus a
+# sparse dot product per class, well under a millisecond for typical snippets.
+import ast
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+MODEL_PATH = os.getenv(
+    "DECAPSULE_TOPIC_MODEL",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "topic_model.json"),
+)
+
+# below this probability /analyze asks the LLM instead
+TOPIC_MODEL_MIN_CONFIDENCE = float(os.getenv("DECAPSULE_TOPIC_MODEL_MIN_CONFIDENCE", "0.6"))
+
+# calls and attributes worth a feature of their own; others only count as calls
+_KNOWN_CALLS = {
+    "range", "len", "min", "max", "sum", "sorted", "reversed", "enumerate", "zip",
+    "set", "dict", "list", "str", "int", "ord", "chr", "print", "input", "abs",
+    "append", "appendleft", "pop", "popleft", "extend", "insert", "add", "get",
+    "split", "join", "strip", "upper", "lower", "replace", "find", "startswith",
+    "endswith", "isalpha", "isdigit", "count", "sort", "index", "items", "keys",
+    "values", "deque", "heappush", "heappop", "lru_cache", "cache", "setdefault",
+}
+
+_WORD = re.compile(r"[a-z]+")
+
+
+@lru_cache(maxsize=4096)
+def _words(name: str) -> Tuple[str, ...]:
+    # snake_case and camelCase pieces: "maxSubArray" -> max, sub, array
+    spaced = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", name).lower()
+    return tuple(w for w in _WORD.findall(spaced) if len(w) > 1)
+
+
+_LOOPS = {ast.For, ast.While}
+_FUNCS = {ast.FunctionDef, ast.AsyncFunctionDef}
+# Load/Store/Del context children carry nothing the Name/Subscript checks miss
+_SKIP_FIELDS = {"ctx"}
+_CONTAINER_OPS = {"append", "pop", "popleft", "appendleft", "heappop"}
+
+
+def _walk(tree: ast.AST, counts: Counter) -> int:
+    """
+    One explicit-stack pass over the tree (ast.NodeVisitor's per-node dispatch
+    is most of the cost otherwise); node types are compared by identity, which
+    is exact for parser output. Each entry carries its loop depth and the
+    enclosing function names; returns the deepest loop nesting.
+    """
+    max_depth = 0
+    kinds: Dict[type, int] = {}
+    stack = [(tree, 0, ())]
+    while stack:
+        node, depth, funcs = stack.pop()
+        kind = type(node)
+        kinds[kind] = kinds.get(kind, 0) + 1
+        if kind is ast.Name:
+            for word in _words(node.id):
+                counts["word:" + word] += 1
+        elif kind is ast.Attribute:
+            # node.next, self.head, cur.left: linked structures live in attributes
+            for word in _words(node.attr):
+                counts["attr:" + word] += 1
+        elif kind is ast.Import or kind is ast.ImportFrom:
+            modules = [a.name for a in node.names] if kind is ast.Import else [node.module or ""]
+            for module in modules:
+                counts["import:" + module.split(".")[0]] += 1
+        elif kind is ast.Call:
+            func = node.func
+            name = func.id if isinstance(func, ast.Name) else func.attr if isinstance(func, ast.Attribute) else None
+            if name is not None:
+                if name in funcs:
+                    counts["struct:self_call"] += 1
+                elif name in _KNOWN_CALLS:
+                    counts["call:" + name] += 1
+                if depth and name in _CONTAINER_OPS:
+                    counts["struct:container_op_in_loop"] += 1
+        elif kind is ast.Subscript:
+            if isinstance(node.value, ast.Subscript):
+                counts["struct:2d_index"] += 1
+            if depth and isinstance(node.ctx, ast.Store):
+                counts["struct:store_index_in_loop"] += 1
+        elif kind is ast.Constant:
+            value = node.value
+            if isinstance(value, str):
+                counts["const:str"] += 1
+                if len(value) == 1:
+                    counts["const:char"] += 1
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                counts["const:num"] += 1
+        elif kind is ast.Compare:
+            if any(isinstance(op, (ast.In, ast.NotIn)) for op in node.ops):
+                counts["struct:membership_test"] += 1
+        elif kind in _LOOPS:
+            depth += 1
+            max_depth = max(max_depth, depth)
+        elif kind in _FUNCS:
+            counts["struct:functions"] += 1
+            for word in _words(node.name):
+                counts["word:" + word] += 1
+            for arg in node.args.args:
+                for word in _words(arg.arg):
+                    counts["word:" + word] += 1
+            for dec in node.decorator_list:
+                target = dec.func if isinstance(dec, ast.Call) else dec
+                name = getattr(target, "id", None) or getattr(target, "attr", None)
+                if name:
+                    counts["decorator:" + name] += 1
+            funcs = funcs + (node.name,)
+        elif kind is ast.ListComp:
+            elt = node.elt
+            if isinstance(elt, (ast.List, ast.ListComp)) or (
+                isinstance(elt, ast.BinOp) and isinstance(elt.left, ast.List)
+            ):
+                counts["struct:2d_list"] += 1
+        for field in node._fields:
+            if field in _SKIP_FIELDS:
+                continue
+            child = getattr(node, field, None)
+            if isinstance(child, ast.AST):
+                stack.append((child, depth, funcs))
+            elif isinstance(child, list):
+                for item in child:
+                    if isinstance(item, ast.AST):
+                        stack.append((item, depth, funcs))
+    for kind, n in kinds.items():
+        counts["node:" + kind.__name__] = n
+    return max_depth
+
+
+def extract_features(code: str) -> Optional[Dict[str, float]]:
+    """
+    Sparse feature vector: log-scaled counts of AST nodes, calls, name and
+    attribute words, imports and structure. None when the code is not Python.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+    counts: Counter = Counter()
+    counts["struct:loop_depth"] = _walk(tree, counts)
+    return {name: math.log1p(value) for name, value in counts.items() if value}
+
+
+class TopicModel:
+    def __init__(self, artifact: Dict[str, Any]):
+        self.classes: List[str] = artifact["classes"]
+        self.bias: List[float] = artifact["bias"]
+        # feature -> weight per class, so a prediction touches only the features present
+        self.weights: Dict[str, List[float]] = {
+            feature: [row[j] for row in artifact["weights"]]
+            for j, feature in enumerate(artifact["features"])
+        }
+        self.meta = {k: artifact.get(k) for k in ("version", "trained_on", "cv_accuracy")}
+
+    def predict(self, code: str) -> Optional[Dict[str, Any]]:
+        """None for code that does not parse (C-style pointers, pseudo-code):
+        the model has only seen Python, so the LLM gets those."""
+        features = extract_features(code)
+        return self.predict_features(features) if features is not None else None
+
+    def predict_features(self, features: Dict[str, float]) -> Dict[str, Any]:
+        scores = list(self.bias)
+        contributions: Dict[str, float] = {}
+        for feature, value in features.items():
+            weights = self.weights.get(feature)
+            if weights is None:
+                continue
+            for k, w in enumerate(weights):
+                scores[k] += w * value
+            contributions[feature] = value
+        top = max(scores)
+        exps = [math.exp(s - top) for s in scores]
+        total = sum(exps)
+        probs = [e / total for e in exps]
+        best = max(range(len(probs)), key=probs.__getitem__)
+        # the features that pushed the winning class most, for the reasons list
+        weights_best = {f: self.weights[f][best] * v for f, v in contributions.items()}
+        evidence = sorted((f for f in weights_best if weights_best[f] > 0), key=weights_best.get, reverse=True)[:3]
+        return {
+            "topic": self.classes[best],
+            "confidence": round(probs[best], 4),
+            "probabilities": {c: round(p, 4) for c, p in zip(self.classes, probs)},
+            "evidence": evidence,
+        }
+
+
+_model: Optional[TopicModel] = None
+_model_lock = threading.Lock()
+
+
+def load_topic_model() -> Optional[TopicModel]:
+    """The shipped model, loaded on first use (warm-up loads it at startup). None if missing."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                try:
+                    with open(MODEL_PATH, "r", encoding="utf-8") as f:
+                        _model = TopicModel(json.load(f))
+                except (OSError, ValueError, KeyError):
+                    return None
+    return _model
+
+
+def predict_topic(code: str) -> Optional[Dict[str, Any]]:
+    model = load_topic_model()
+    return model.predict(code) if model is not None else None
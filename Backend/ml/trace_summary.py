@@ -0,0 +1,317 @@
+# ml/trace_summary.py
+# Compress runtime data (DP steps with full tables, recursion trees, tracer
+# events, sandbox output) into a bounded number of prompt tokens.
+# The summary keeps: aggregate stats, the first error, representative events
+# (with their original index, so the explanation can point at them) and key
+# table states (first / evenly spaced / final).
+import json
+import math
+import os
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+# token budget for the trace part of the explanation prompt
+EXPLAIN_TRACE_TOKENS = int(os.getenv("DECAPSULE_EXPLAIN_TRACE_TOKENS", "1500"))
+
+# rough chars-per-token for code / JSON; no tokenizer dependency
+CHARS_PER_TOKEN = 4
+
+# the original size is measured up to this many budgets; past it the input is
+# simply "large" and the count is a lower bound (original_capped)
+ORIGINAL_SIZE_BUDGETS = 16
+
+# (max list/dict items, max string chars, sampled events, tree lines),
+# tried in order until the summary fits the budget
+_LEVELS = [
+    (12, 400, 8, 40),
+    (8, 200, 6, 24),
+    (4, 100, 4, 12),
+    (2, 40, 2, 6),
+]
+
+_EVENT_TYPE_KEYS = ("type", "event")
+
+_UNSET = object()
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _clip(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    half = max(1, max_chars // 2)
+    return f"{text[:half]}…[{len(text) - 2 * half} chars]…{text[-half:]}"
+
+
+def _compact(value: Any, max_items: int, max_chars: int, depth: int = 0) -> Any:
+    """Bounded copy of any JSON-like value: long lists/dicts/strings keep head and tail."""
+    if isinstance(value, str):
+        return _clip(value, max_chars)
+    if depth >= 4:
+        return _clip(json.dumps(value, default=str), max_chars)
+
+    if isinstance(value, dict):
+        items = list(value.items())
+        if len(items) <= max_items:
+            return {str(k): _compact(v, max_items, max_chars, depth + 1) for k, v in items}
+        head = max(1, max_items // 2)
+        tail = max(1, max_items - head)
+        out = {str(k): _compact(v, max_items, max_chars, depth + 1) for k, v in items[:head]}
+        out["…"] = f"{len(items) - head - tail} more keys"
+        out.update((str(k), _compact(v, max_items, max_chars, depth + 1)) for k, v in items[-tail:])
+        return out
+
+    if isinstance(value, (list, tuple)):
+        if len(value) <= max_items:
+            return [_compact(v, max_items, max_chars, depth + 1) for v in value]
+        head = max(1, max_items // 2)
+        tail = max(1, max_items - head)
+        return (
+            [_compact(v, max_items, max_chars, depth + 1) for v in value[:head]]
+            + [f"…{len(value) - head - tail} more…"]
+            + [_compact(v, max_items, max_chars, depth + 1) for v in value[-tail:]]
+        )
+
+    return value
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _json_chars(value: Any, limit: int) -> int:
+    """
+    Approximate length of _dumps(value), walking the value without building
+    the string; stops as soon as it passes limit (and returns limit + 1).
+    """
+    total = 0
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, str):
+            total += len(value) + 2
+        elif isinstance(value, dict):
+            total += 2 + max(0, len(value) - 1)
+            for key, sub in value.items():
+                total += len(str(key)) + 3
+                stack.append(sub)
+        elif isinstance(value, (list, tuple)):
+            total += 2 + max(0, len(value) - 1)
+            stack.extend(value)
+        elif value is None or isinstance(value, bool):
+            total += 5
+        else:
+            total += len(str(value))
+        if total > limit:
+            return limit + 1
+    return total
+
+
+def clip_to_budget(text: str, budget_tokens: int = EXPLAIN_TRACE_TOKENS) -> str:
+    """Hard cap, whatever the shape of the input."""
+    max_chars = budget_tokens * CHARS_PER_TOKEN
+    if len(text) > max_chars:
+        text = text[: max_chars - 24] + "\n…[trace truncated]"
+    return text
+
+
+def _sample_indices(n: int, k: int) -> List[int]:
+    """k evenly spaced indices over range(n), always including first and last."""
+    if n <= k:
+        return list(range(n))
+    if k <= 1:
+        return [0]
+    return sorted({round(i * (n - 1) / (k - 1)) for i in range(k)})
+
+
+def _event_type(event: Any) -> Optional[str]:
+    if isinstance(event, dict):
+        for key in _EVENT_TYPE_KEYS:
+            if key in event:
+                return str(event[key])
+    return None
+
+
+def _is_error(event: Any) -> bool:
+    if not isinstance(event, dict):
+        return False
+    return "error" in event or (_event_type(event) or "").endswith("error")
+
+
+def _looks_like_events(value: Any) -> bool:
+    return isinstance(value, list) and len(value) > 0 and _event_type(value[0]) is not None
+
+
+def _summarize_events(name: str, events: List[Dict[str, Any]], level) -> List[str]:
+    max_items, max_chars, samples, _ = level
+    counts = Counter(_event_type(e) for e in events)
+    lines = [f"{name}: {len(events)} events {_dumps(dict(counts))}"]
+
+    first_error = next(((i, e) for i, e in enumerate(events) if _is_error(e)), None)
+    if first_error is not None:
+        i, e = first_error
+        lines.append(f"  first error #{i}: {_dumps(_compact(e, max_items, max_chars))}")
+
+    for i in _sample_indices(len(events), samples):
+        lines.append(f"  #{i}: {_dumps(_compact(events[i], max_items, max_chars))}")
+    return lines
+
+
+def _tree_label(node: Dict[str, Any], max_chars: int) -> str:
+    args = ", ".join(f"{k}={v}" for k, v in (node.get("args") or {}).items())
+    return _clip(f"{node.get('func')}({args}) -> {node.get('return')}", max_chars)
+
+
+def _summarize_tree(name: str, root: Dict[str, Any], level) -> List[str]:
+    _, max_chars, _, tree_lines = level
+
+    calls = leaves = max_depth = 0
+    arg_counts: Counter = Counter()
+    stack = [(root, 0)]
+    while stack:
+        node, depth = stack.pop()
+        calls += 1
+        max_depth = max(max_depth, depth)
+        arg_counts[_dumps(node.get("args"))] += 1
+        children = node.get("children") or []
+        if not children:
+            leaves += 1
+        stack.extend((child, depth + 1) for child in children)
+
+    repeated = sum(c - 1 for c in arg_counts.values() if c > 1)
+    lines = [
+        f"{name}: calls={calls} max_depth={max_depth} leaves={leaves} "
+        f"distinct_args={len(arg_counts)} repeated_subcalls={repeated}"
+    ]
+
+    # line-limited preorder rendering of the top of the tree
+    shown = 0
+    stack = [(root, 0)]
+    while stack and shown < tree_lines:
+        node, depth = stack.pop()
+        lines.append("  " + "  " * depth + _tree_label(node, max_chars))
+        shown += 1
+        stack.extend((child, depth + 1) for child in reversed(node.get("children") or []))
+    if calls > shown:
+        lines.append(f"  … {calls - shown} more calls")
+    return lines
+
+
+def _summarize_dp(name: str, dp: Dict[str, Any], level) -> List[str]:
+    max_items, max_chars, _, _ = level
+    lines = []
+    steps = dp.get("steps") or []
+    if steps:
+        lines.extend(_summarize_table_steps(f"{name}.steps", steps, level))
+    if dp.get("final_table") is not None:
+        lines.append(f"{name}.final_table: {_dumps(_compact(dp['final_table'], max_items, max_chars))}")
+    for key, value in dp.items():
+        if key not in ("steps", "final_table"):
+            lines.extend(_summarize_value(f"{name}.{key}", value, level))
+    return lines
+
+
+def _summarize_table_steps(name: str, steps: List[Dict[str, Any]], level) -> List[str]:
+    # table snapshots dominate DP traces: events carry only the cells that
+    # changed, full tables are shown at a few sampled steps
+    max_items, max_chars, samples, _ = level
+    lines = _summarize_events(name, _table_deltas(steps), level)
+    with_table = [i for i, s in enumerate(steps) if isinstance(s, dict) and "table" in s]
+    for pick in _sample_indices(len(with_table), max(2, samples // 2)):
+        i = with_table[pick]
+        lines.append(f"  table @#{i}: {_dumps(_compact(steps[i]['table'], max_items, max_chars))}")
+    return lines
+
+
+def _table_deltas(steps: List[Any]) -> List[Any]:
+    out = []
+    previous = None
+    for step in steps:
+        if not (isinstance(step, dict) and "table" in step):
+            out.append(step)
+            continue
+        table = step["table"]
+        delta = {k: v for k, v in step.items() if k != "table"}
+        changed = None
+        if isinstance(table, dict):
+            before = previous if isinstance(previous, dict) else {}
+            changed = {k: v for k, v in table.items() if before.get(k, _UNSET) != v}
+        elif isinstance(table, list) and isinstance(previous, list) and len(previous) == len(table):
+            changed = {i: v for i, (p, v) in enumerate(zip(previous, table)) if p != v}
+        if changed:
+            delta["changed"] = changed
+        previous = table
+        out.append(delta)
+    return out
+
+
+def _summarize_value(name: str, value: Any, level) -> List[str]:
+    max_items, max_chars, _, _ = level
+    if value is None or value == {} or value == []:
+        return []
+    if isinstance(value, dict) and "children" in value and "func" in value:
+        return _summarize_tree(name, value, level)
+    if isinstance(value, dict) and "steps" in value and isinstance(value["steps"], list):
+        return _summarize_dp(name, value, level)
+    if _looks_like_events(value):
+        if any(isinstance(e, dict) and "table" in e for e in value):
+            return _summarize_table_steps(name, value, level)
+        return _summarize_events(name, value, level)
+    if isinstance(value, dict) and isinstance(value.get("events"), list):
+        lines = _summarize_events(f"{name}.events", value["events"], level)
+        rest = {k: v for k, v in value.items() if k != "events"}
+        for key, sub in rest.items():
+            lines.extend(_summarize_value(f"{name}.{key}", sub, level))
+        return lines
+    return [f"{name}: {_dumps(_compact(value, max_items, max_chars))}"]
+
+
+def _render(trace: Any, level) -> str:
+    if isinstance(trace, dict):
+        lines = []
+        for key, value in trace.items():
+            lines.extend(_summarize_value(str(key), value, level))
+        return "\n".join(lines)
+    return "\n".join(_summarize_value("trace", trace, level))
+
+
+def summarize_trace(trace: Any, budget_tokens: int = EXPLAIN_TRACE_TOKENS) -> Dict[str, Any]:
+    """
+    Summarize a trace/analysis structure into text of at most budget_tokens.
+    Returns {"text", "tokens", "budget", "original_tokens", "original_capped", "level"}.
+    The original is never serialized whole: its size is estimated by a walk
+    that stops after ORIGINAL_SIZE_BUDGETS budgets (original_capped: the
+    count is a lower bound).
+    """
+    budget_chars = budget_tokens * CHARS_PER_TOKEN
+    size_limit = budget_chars * ORIGINAL_SIZE_BUDGETS
+    if isinstance(trace, str):
+        original_chars = len(trace)
+    else:
+        original_chars = _json_chars(trace, size_limit)
+    capped = original_chars > size_limit
+
+    # small traces go in verbatim (level None); larger ones are summarized,
+    # each level more aggressive than the last
+    level = None
+    if isinstance(trace, str):
+        text = trace
+    elif original_chars <= budget_chars:
+        text = _dumps(trace)
+    else:
+        for level, params in enumerate(_LEVELS):
+            text = _render(trace, params)
+            if estimate_tokens(text) <= budget_tokens:
+                break
+
+    text = clip_to_budget(text, budget_tokens)
+    return {
+        "text": text,
+        "tokens": estimate_tokens(text),
+        "budget": budget_tokens,
+        "original_tokens": math.ceil(min(original_chars, size_limit) / CHARS_PER_TOKEN),
+        "original_capped": capped,
+        "level": level,
+    }
@@ -0,0 +1,232 @@
+# ml/train_topic_model.py
+"""
+Train the local topic classifier and write ml/data/topic_model.json.
+
+    cd Backend
+    python -m ml.train_topic_model --folds 5
+
+Multinomial logistic regression (softmax, L2) fitted by full-batch gradient
+descent on the features of ml.topic_model.extract_features, over the
+snippets in ml/topic_corpus.py plus a copy of each with every user-defined
+identifier renamed (v0, v1, f0 ...), so the model also learns the shape of
+the code and not only its names. Features seen in fewer than --min-docs
+documents are dropped. Reports stratified k-fold accuracy (a snippet and its
+renamed copy always share a fold) and the per-snippet prediction latency of
+the final model, then checks it against OUT_OF_DOMAIN_PROBES: ordinary code
+it never saw must come out "unknown" or below TOPIC_MODEL_MIN_CONFIDENCE,
+since anything above goes back to /analyze as an answer. Only a model that
+passes is written (exit status 1 otherwise).
+"""
+import argparse
+import ast
+import builtins
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+from ml.topic_corpus import OUT_OF_DOMAIN_PROBES, labelled_snippets
+from ml.topic_model import MODEL_PATH, TOPIC_MODEL_MIN_CONFIDENCE, TopicModel, extract_features
+
+ARTIFACT_VERSION = 2
+
+_KEEP = set(dir(builtins))
+
+
+class _Renamer(ast.NodeTransformer):
+    """Renames functions, arguments and variables; builtins, imports and attributes stay."""
+
+    def __init__(self):
+        self.names: Dict[str, str] = {}
+        self.imported = set()
+
+    def _new(self, name: str, prefix: str) -> str:
+        if name in _KEEP or name in self.imported:
+            return name
+        if name not in self.names:
+            self.names[name] = f"{prefix}{len(self.names)}"
+        return self.names[name]
+
+    def visit_Import(self, node):
+        self.imported.update((a.asname or a.name).split(".")[0] for a in node.names)
+        return node
+
+    def visit_ImportFrom(self, node):
+        self.imported.update(a.asname or a.name for a in node.names)
+        return node
+
+    def visit_FunctionDef(self, node):
+        node.name = self._new(node.name, "f")
+        for arg in node.args.args:
+            arg.arg = self._new(arg.arg, "v")
+        self.generic_visit(node)
+        return node
+
+    def visit_Name(self, node):
+        node.id = self._new(node.id, "v")
+        return node
+
+
+def rename_identifiers(code: str) -> str:
+    return ast.unparse(_Renamer().visit(ast.parse(code)))
+
+
+def build_dataset() -> List[Tuple[int, str, Dict[str, float]]]:
+    """(group, label, features) rows; a snippet and its renamed copy share a group."""
+    rows = []
+    for group, (label, code) in enumerate(labelled_snippets()):
+        rows.append((group, label, extract_features(code)))
+        rows.append((group, label, extract_features(rename_identifiers(code))))
+    return rows
+
+
+def fit(
+    rows: List[Tuple[int, str, Dict[str, float]]],
+    classes: List[str],
+    min_docs: int,
+    epochs: int,
+    lr: float,
+    l2: float,
+) -> Dict:
+    doc_freq = Counter(f for _, _, x in rows for f in x)
+    features = sorted(f for f, n in doc_freq.items() if n >= min_docs)
+    index = {f: j for j, f in enumerate(features)}
+    data = [
+        (classes.index(label), [(index[f], v) for f, v in x.items() if f in index])
+        for _, label, x in rows
+    ]
+    k, n = len(classes), len(data)
+    weights = [[0.0] * len(features) for _ in range(k)]
+    bias = [0.0] * k
+    for _ in range(epochs):
+        grad_w = [[l2 * w for w in row] for row in weights]
+        grad_b = [0.0] * k
+        for y, x in data:
+            scores = [bias[c] + sum(weights[c][j] * v for j, v in x) for c in range(k)]
+            top = max(scores)
+            exps = [math.exp(s - top) for s in scores]
+            total = sum(exps)
+            for c in range(k):
+                err = (exps[c] / total - (1.0 if c == y else 0.0)) / n
+                grad_b[c] += err
+                row = grad_w[c]
+                for j, v in x:
+                    row[j] += err * v
+        for c in range(k):
+            bias[c] -= lr * grad_b[c]
+            row, grad = weights[c], grad_w[c]
+            for j in range(len(features)):
+                row[j] -= lr * grad[j]
+    return {
+        "classes": classes,
+        "features": features,
+        "weights": [[round(w, 5) for w in row] for row in weights],
+        "bias": [round(b, 5) for b in bias],
+    }
+
+
+def _folds(rows, folds: int, seed: int) -> List[set]:
+    """Groups split into stratified folds."""
+    by_label: Dict[str, List[int]] = {}
+    for group, label, _ in rows:
+        if group not in by_label.setdefault(label, []):
+            by_label[label].append(group)
+    rng = random.Random(seed)
+    out = [set() for _ in range(folds)]
+    for groups in by_label.values():
+        rng.shuffle(groups)
+        for i, group in enumerate(groups):
+            out[i % folds].add(group)
+    return out
+
+
+def cross_validate(rows, classes, folds: int, seed: int, **fit_args) -> float:
+    correct = total = 0
+    for held_out in _folds(rows, folds, seed):
+        model = TopicModel(fit([r for r in rows if r[0] not in held_out], classes, **fit_args))
+        for _, label, x in (r for r in rows if r[0] in held_out):
+            correct += model.predict_features(x)["topic"] == label
+            total += 1
+    return correct / total
+
+
+def out_of_domain_failures(model: TopicModel, threshold: float) -> List[Dict]:
+    """Probes the model would confidently put in an algorithm topic."""
+    failures = []
+    for code in OUT_OF_DOMAIN_PROBES:
+        predicted = model.predict(code)
+        if predicted and predicted["topic"] != "unknown" and predicted["confidence"] >= threshold:
+            failures.append({"code": code.splitlines()[0], "topic": predicted["topic"],
+                             "confidence": predicted["confidence"]})
+    return failures
+
+
+def _latency_us(model: TopicModel, codes: List[str], repeat: int = 20) -> Dict[str, float]:
+    times = []
+    for code in codes:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            model.predict(code)
+            best = min(best, time.perf_counter() - start)
+        times.append(best * 1e6)
+    times.sort()
+    return {"median_us": round(times[len(times) // 2], 1), "max_us": round(times[-1], 1)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the local /analyze topic classifier")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--epochs", type=int, default=400)
+    parser.add_argument("--lr", type=float, default=0.5)
+    parser.add_argument("--l2", type=float, default=0.01)
+    parser.add_argument("--min-docs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--min-confidence", type=float, default=TOPIC_MODEL_MIN_CONFIDENCE,
+                        help="threshold the out-of-domain probes must stay under")
+    parser.add_argument("--out", default=MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    rows = build_dataset()
+    classes = sorted({label for _, label, _ in rows})
+    fit_args = {"min_docs": args.min_docs, "epochs": args.epochs, "lr": args.lr, "l2": args.l2}
+    cv_accuracy = cross_validate(rows, classes, args.folds, args.seed, **fit_args) if args.folds > 1 else None
+
+    artifact = fit(rows, classes, **fit_args)
+    artifact.update({
+        "version": ARTIFACT_VERSION,
+        "trained_on": len(rows),
+        "cv_accuracy": round(cv_accuracy, 4) if cv_accuracy is not None else None,
+        "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    })
+    model = TopicModel(artifact)
+    failures = out_of_domain_failures(model, args.min_confidence)
+    if not failures:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(artifact, f, separators=(",", ":"))
+
+    report = {
+        "python": sys.version.split()[0],
+        "classes": classes,
+        "documents": len(rows),
+        "features": len(artifact["features"]),
+        "cv_accuracy": artifact["cv_accuracy"],
+        "predict_latency": _latency_us(model, [code for _, code in labelled_snippets()]),
+        "out_of_domain_probes": len(OUT_OF_DOMAIN_PROBES),
+        "out_of_domain_failures": failures,
+        "artifact": args.out if not failures else None,
+    }
+    if not failures:
+        report["artifact_bytes"] = os.path.getsize(args.out)
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
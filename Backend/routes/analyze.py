@@ -1,15 +1,18 @@
 # backend/routes/analyze.py
+import asyncio
+
 from fastapi import APIRouter
 from pydantic import BaseModel
 from engines.classifier import classify_code
 from ml.local_llm import call_local_llm
+from ml.topic_model import TOPIC_MODEL_MIN_CONFIDENCE, predict_topic
 
 router = APIRouter()
 
 
 class AnalyzeRequest(BaseModel):
     code: str
-    use_ml: bool = False  # optionally call LLM fallback
+    use_ml: bool = False  # optionally use the topic model, then the LLM
 
 
 @router.post("/")
@@ -18,14 +21,24 @@ async def analyze(req: AnalyzeRequest):
     # first do fast heuristics
     result = classify_code(code, use_ml_fallback=req.use_ml)
 
-    # if result asks for ML fallback, optionally call local llm
+    # if result asks for ML fallback: the local topic model first (sub-millisecond),
+    # the local llm only when the model is unsure or missing
     if result.get("topic") == "ml_fallback" and req.use_ml:
+        predicted = predict_topic(code)
+        if predicted is not None and predicted["confidence"] >= TOPIC_MODEL_MIN_CONFIDENCE:
+            return {
+                "topic": predicted["topic"],
+                "confidence": predicted["confidence"],
+                "reasons": ["topic model: " + ", ".join(predicted["evidence"])],
+                "probabilities": predicted["probabilities"],
+            }
+
         prompt = f"""You are a code classifier. Given the code below, reply JSON with fields:
 {{ "topic": <one of recursion, dp, graph, array, string, pointer, unknown>, "reason": "<short reason>" }}.
 Code:
 {code}
 """
-        llm_out = call_local_llm(prompt)
+        llm_out = await asyncio.to_thread(call_local_llm, prompt)
         # try to parse simple JSON from llm_out
         import json
         try:
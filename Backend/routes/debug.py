@@ -5,6 +5,7 @@ from engines.array_engine import simulate_array_operations
 from engines.string_engine import simulate_string_operations
 from engines.debugger_rules import detect_common_array_bugs, detect_common_string_bugs
 from engines.execution_tracer import trace_execution
+from services.trace_store import record_trace, trace_key
 
 router = APIRouter()
 
@@ -32,6 +33,12 @@ async def debug(req: DebugRequest):
         all_issues.extend(issues)
 
     runtime_steps = trace_execution(req.code)
+    if runtime_steps.get("ok"):
+        # pageable via GET /trace/{id}
+        index = record_trace(trace_key("debug", req.code), "execution_step", runtime_steps["events"],
+                             {"topic": "execution", "backend": runtime_steps["backend"]})
+        if index is not None:
+            runtime_steps["trace_id"] = index["trace_id"]
 
     return {
         "analysis": analysis,
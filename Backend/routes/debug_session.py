@@ -0,0 +1,105 @@
+# routes/debug_session.py
+# Stepwise debugging over a WebSocket. The client drives a paused program:
+#
+#   -> {"code": "...", "input": "", "breakpoints": [3, 7]}
+#   <- {"type": "ready", "session": id, "limits": {...}}
+#   <- {"type": "paused", "reason": "step", "steps": [...], "at": {...}, "stdout": ""}
+#   -> {"cmd": "step", "count": 10} | {"cmd": "continue"} | {"cmd": "breakpoints", "lines": [...]}
+#   <- {"type": "paused", ...} | {"type": "breakpoints", ...} | {"type": "finished", ...}
+#
+# Only the steps the client asks for are computed: the program stays blocked
+# in its trace hook between commands, and is killed when the socket closes.
+import asyncio
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from services.admission import Overloaded, client_key, rate_limiter
+from services.debug_sessions import (
+    DEBUG_CONTINUE_STEPS,
+    DEBUG_IDLE_TIMEOUT_S,
+    DEBUG_MAX_BATCH,
+    DEBUG_MAX_STEPS,
+    SessionError,
+    debug_sessions,
+)
+
+router = APIRouter()
+
+# close codes (RFC 6455)
+TRY_AGAIN_LATER = 1013
+POLICY_VIOLATION = 1008
+
+
+@router.websocket("/")
+async def debug_session(websocket: WebSocket):
+    await websocket.accept()
+
+    retry_after = rate_limiter.take(client_key(websocket))
+    if retry_after:
+        await websocket.send_json({"type": "error", "error": "rate limit exceeded", "retry_after": retry_after})
+        await websocket.close(code=TRY_AGAIN_LATER)
+        return
+
+    try:
+        session = debug_sessions.open()
+    except Overloaded as e:
+        await websocket.send_json({"type": "error", "error": str(e), "retry_after": e.retry_after})
+        await websocket.close(code=TRY_AGAIN_LATER)
+        return
+
+    try:
+        try:
+            start = await asyncio.wait_for(websocket.receive_json(), DEBUG_IDLE_TIMEOUT_S)
+            code = start["code"]
+        except asyncio.TimeoutError:
+            await websocket.send_json({"type": "closed", "reason": "idle"})
+            await websocket.close()
+            return
+        except (KeyError, TypeError, ValueError):
+            await websocket.send_json({"type": "error", "error": "first message must be {\"code\": ...}"})
+            await websocket.close(code=POLICY_VIOLATION)
+            return
+
+        await websocket.send_json({
+            "type": "ready",
+            "session": session.id,
+            "limits": {
+                "max_batch": DEBUG_MAX_BATCH,
+                "continue_steps": DEBUG_CONTINUE_STEPS,
+                "max_steps": DEBUG_MAX_STEPS,
+                "idle_timeout_s": DEBUG_IDLE_TIMEOUT_S,
+            },
+        })
+        await websocket.send_json(
+            await session.start(code, start.get("input", ""), start.get("breakpoints", []))
+        )
+
+        while True:
+            try:
+                message = await asyncio.wait_for(websocket.receive_json(), DEBUG_IDLE_TIMEOUT_S)
+            except asyncio.TimeoutError:
+                await websocket.send_json({"type": "closed", "reason": "idle"})
+                await websocket.close()
+                return
+            except ValueError:
+                await websocket.send_json({"type": "error", "error": "invalid JSON"})
+                continue
+            if not isinstance(message, dict):
+                await websocket.send_json({"type": "error", "error": "commands are JSON objects"})
+                continue
+            if message.get("cmd") == "stop":
+                await websocket.send_json({"type": "closed", "reason": "stopped"})
+                await websocket.close()
+                return
+            try:
+                reply = await session.command(message)
+            except (TypeError, ValueError):
+                reply = {"type": "error", "error": "invalid command arguments"}
+            await websocket.send_json(reply)
+    except SessionError as e:
+        await websocket.send_json({"type": "closed", "reason": "error", "error": str(e)})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await debug_sessions.close(session)
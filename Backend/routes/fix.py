@@ -1,7 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 # from ml.gemini_client import call_gemini
-from ml.groq_client import call_groq as call_llm
+from services.admission import admission
+from services.stages import call_llm
 from ml.fix_prompt import make_fix_prompt
 from engines.debugger import analyze_code_for_issues
 
@@ -10,8 +11,8 @@ router = APIRouter()
 class FixRequest(BaseModel):
     code: str
 
-@router.post("/")
-async def fix(req: FixRequest):
+@router.post("/", dependencies=[Depends(admission("llm"))])
+def fix(req: FixRequest):
 
     # 1. Detect Issues (our own rule engine)
     issues = analyze_code_for_issues(req.code)
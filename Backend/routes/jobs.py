@@ -0,0 +1,89 @@
+# routes/jobs.py
+import asyncio
+from typing import AsyncGenerator, Optional
+
+from fastapi import APIRouter, Depends, Header, Request
+from pydantic import BaseModel
+
+from services.admission import admission
+from services.job_runner import submit_job
+from services.job_store import FINISHED_STATUSES, get_job_store
+from routes.process_stream import sse_event
+from services.wire import negotiate_encoding, sse_response, to_columnar
+
+router = APIRouter()
+
+# how often the SSE subscriber checks the store for new events
+POLL_INTERVAL = 0.2
+
+
+class JobRequest(BaseModel):
+    code: str
+    input: str = ""
+
+
+# jobs queue on their own worker pool: the per-client rate limit applies here,
+# and submit_job sheds the request (429) once the job queue is full
+@router.post("/", dependencies=[Depends(admission())])
+async def create_job(req: JobRequest):
+    job_id = await asyncio.to_thread(submit_job, req.code, req.input)
+    return {"ok": True, "job_id": job_id, "status": "queued"}
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, include_events: bool = False, after: int = -1):
+    store = get_job_store()
+    job = await asyncio.to_thread(store.get_job, job_id)
+    if job is None:
+        return {"ok": False, "error": "job not found"}
+
+    out = {"ok": True, "job": job}
+    if include_events:
+        out["events"] = await asyncio.to_thread(store.get_events, job_id, after)
+    return out
+
+
+@router.get("/{job_id}/stream")
+async def stream_job(
+    job_id: str,
+    request: Request,
+    after: int = -1,
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Replay a job's events as SSE, then follow it live until it finishes.
+    Reconnecting EventSource clients send Last-Event-ID and resume after it.
+    """
+    store = get_job_store()
+    encoding = negotiate_encoding(request, streaming=True)
+    if last_event_id is not None and last_event_id.isdigit():
+        after = max(after, int(last_event_id))
+
+    async def event_generator() -> AsyncGenerator[str, None]:
+        cursor = after
+        try:
+            while True:
+                job = await asyncio.to_thread(store.get_job, job_id)
+                if job is None:
+                    yield sse_event({"stage": "error", "payload": {"error": "job not found"}})
+                    return
+
+                events = await asyncio.to_thread(store.get_events, job_id, cursor)
+                for event in events:
+                    cursor = event.pop("seq")
+                    if encoding == "columnar":
+                        event = to_columnar(event)
+                    yield sse_event(event, event_id=cursor)
+
+                # status is read before events, so nothing is missed on finish
+                if job["status"] in FINISHED_STATUSES:
+                    return
+
+                if await request.is_disconnected():
+                    return
+                await asyncio.sleep(POLL_INTERVAL)
+
+        except asyncio.CancelledError:
+            return
+
+    return sse_response(request, event_generator(), encoding)
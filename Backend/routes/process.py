@@ -1,21 +1,31 @@
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Request
 from pydantic import BaseModel
 
 # Engines
-from engines.classifier import classify_code
-from engines.recursion_engine import trace_recursion_runtime
 from engines.recursion_tree_builder import build_recursion_tree
-from engines.dp_engine import analyze_dp, simulate_lis_dp
-from engines.debugger import debug_code_static
-from engines.array_engine import analyze_array_code
-from engines.string_engine import analyze_string_code
-
-# Sandbox
-from sandbox.sandbox_runner import run_in_sandbox
-
-# LLM
-# from ml.gemini_client import call_gemini
-from ml.groq_client import call_groq as call_llm
+from engines.dp_engine import analyze_dp, LIS_MAX_SNAPSHOTS, LIS_MAX_ROWS
+from engines.entry_extractor import extract_entry_points, find_entry_call
+from engines.complexity_engine import complexity_requested
+
+# Deterministic engines (memoized), sandbox and LLM behind admission pools
+from services.stages import (
+    classify_code,
+    trace_recursion_runtime,
+    simulate_lis_dp,
+    simulate_lis_patience,
+    debug_code_static,
+    analyze_array_code,
+    analyze_string_code,
+    analyze_complexity,
+    traced_runtime,
+    call_llm,
+)
+from services.admission import admission, degraded
+from services.wire import encoded_response
+
+# LLM prompt
 from ml.explain_prompt import make_explain_prompt
 
 
@@ -25,10 +35,14 @@ router = APIRouter()
 class ProcessRequest(BaseModel):
     code: str
     input: str = ""
+    # time the entry function on scaled inputs (adds up to ~2 s); unset: DECAPSULE_COMPLEXITY
+    complexity: Optional[bool] = None
 
 
-@router.post("/")
-async def process(req: ProcessRequest):
+# plain def: FastAPI runs it in the threadpool, so blocking stages
+# (and waiting for a pool slot) never stall the event loop
+@router.post("/", dependencies=[Depends(admission("sandbox", "tracer", "llm"))])
+def process(req: ProcessRequest, request: Request):
 
     code = req.code
     user_input = req.input
@@ -41,6 +55,7 @@ async def process(req: ProcessRequest):
         "issues": [],
         "recursion_tree": None,
         "dp": {},
+        "complexity": None,
         "fix": None,
         "explanation": None
     }
@@ -58,25 +73,22 @@ async def process(req: ProcessRequest):
     # 2) ARRAY / STRING EXECUTION + ANALYSIS
     # ----------------------------------------------------
     if topic in ["array", "pointer"]:
-        final["runtime"] = run_in_sandbox(code, user_input)
-        final["analysis"] = analyze_array_code(code)
+        # the trace worker's run doubles as the runtime result
+        final["analysis"] = analyze_array_code(code, stdin=user_input)
+        final["runtime"] = traced_runtime(final["analysis"], code, user_input)
 
     if topic == "string":
-        final["runtime"] = run_in_sandbox(code, user_input)
-        final["analysis"] = analyze_string_code(code)
+        final["analysis"] = analyze_string_code(code, stdin=user_input)
+        final["runtime"] = traced_runtime(final["analysis"], code, user_input)
 
     # ----------------------------------------------------
     # 3) RECURSION SIMULATION
     # ----------------------------------------------------
     if topic == "recursion":
-        # A better entry function guess
-        entry_func = None
-        for line in code.splitlines():
-            if line.strip().startswith("def "):
-                entry_func = line.split("(")[0].replace("def", "").strip()
-                break
+        # entry function and the literal args it is called with at top level
+        entry_func, rec_args = find_entry_call(code, default_args=[4])
 
-        trace = trace_recursion_runtime(code, entry_func, [4])
+        trace = trace_recursion_runtime(code, entry_func, rec_args)
 
         if "data" in trace:
             events = trace["data"]["events"]
@@ -92,23 +104,29 @@ async def process(req: ProcessRequest):
 
         # If DP is LIS → simulate DP table
         if "lis" in code.lower():
-            # Extract array safely using AST-free exec
-            arr = []
-            try:
-                local_vars = {}
-                exec(code, {}, local_vars)
-                arr = local_vars.get("arr", [])
-            except:
-                arr = []
+            # read `arr` statically: only literal assignments, nothing is executed
+            arr = extract_entry_points(code)["constants"].get("arr", [])
 
             if isinstance(arr, list):
-                final["dp"]["simulation"] = simulate_lis_dp(arr)
+                # bounded snapshots keep the payload small for long arrays
+                final["dp"]["simulation"] = simulate_lis_dp(
+                    arr, max_snapshots=LIS_MAX_SNAPSHOTS, max_rows=LIS_MAX_ROWS
+                )
+                if len(arr) > LIS_MAX_ROWS:
+                    # past the visualized rows, show the O(n log n) run instead
+                    final["dp"]["patience"] = simulate_lis_patience(arr)
 
     # ----------------------------------------------------
     # 5) STATIC BUG FINDER
     # ----------------------------------------------------
     final["issues"] = debug_code_static(code).get("issues", [])
 
+    # ----------------------------------------------------
+    # 5b) EMPIRICAL COMPLEXITY (entry function on scaled inputs)
+    # ----------------------------------------------------
+    if complexity_requested(req.complexity) and topic not in ("graph_bfs", "graph_dfs", "dp_bottomup"):
+        final["complexity"] = analyze_complexity(code, stdin=user_input)
+
     # ----------------------------------------------------
     # 6) AUTO-FIX PATCH
     # ----------------------------------------------------
@@ -122,12 +140,17 @@ Fix this code without changing its logic unless necessary:
     # ----------------------------------------------------
     # 7) TEACHER EXPLANATION (Gemini)
     # ----------------------------------------------------
-    explain_prompt = make_explain_prompt(code, final)
-    final["explanation"] = call_llm(explain_prompt)
-
-    return {
+    if degraded():
+        # under LLM pressure the explanation is the first thing we shed
+        final["degraded"] = True
+    else:
+        explain_prompt = make_explain_prompt(code, final)
+        final["explanation"] = call_llm(explain_prompt)
+
+    # json, columnar or msgpack; gzip/br when accepted
+    return encoded_response(request, {
         "ok": True,
         "result": final
-    }
+    })
 
 # This is pipeline for all routes endpoint except run
\ No newline at end of file
@@ -1,14 +1,24 @@
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-from sandbox.sandbox_runner import run_in_sandbox
+from services.admission import admission
+from services.stages import run_in_sandbox
 
 router = APIRouter()
 
 class RunRequest(BaseModel):
     code: str
     input: str = ""
+    # None: server default (DECAPSULE_SANDBOX_WATCHDOG)
+    watchdog: Optional[bool] = None
+    # per-line hits/time, per-function calls and peak memory under "profile"
+    profile: bool = False
+    # with profile: exact per-line hits (sys.monitoring LINE events, 3.12+); much slower
+    profile_exact: bool = False
 
-@router.post("/")
-async def run(req: RunRequest):
-    result = run_in_sandbox(req.code, req.input)
+# plain def: runs in the threadpool while waiting for a sandbox slot
+@router.post("/", dependencies=[Depends(admission("sandbox"))])
+def run(req: RunRequest):
+    result = run_in_sandbox(req.code, req.input, req.watchdog, req.profile, req.profile_exact)
     return result
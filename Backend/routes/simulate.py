@@ -1,11 +1,12 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from pydantic import BaseModel
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 
 from engines.recursion_engine import trace_recursion_runtime
 from engines.recursion_tree_builder import build_recursion_tree
-from engines.dp_engine import simulate_lis_dp
+from engines.dp_engine import simulate_lis_dp, simulate_lis_patience, LIS_MAX_ROWS
+from services.wire import encoded_response
 
 
 router = APIRouter()
@@ -16,10 +17,18 @@ class SimRequest(BaseModel):
     topic: str = "recursion"
     entry_func: str = None
     entry_args: list = []
+    # dp_lis only: "quadratic" (dp table snapshots) or "patience" (O(n log n) tails deltas)
+    mode: str = "quadratic"
+    max_snapshots: Optional[int] = None
 
 
 @router.post("/")
-async def simulate(req: SimRequest) -> Dict[str, Any]:
+async def simulate(req: SimRequest, request: Request):
+    # json, columnar or msgpack; gzip/br when accepted
+    return encoded_response(request, _simulate(req))
+
+
+def _simulate(req: SimRequest) -> Dict[str, Any]:
     # CURRENTLY ONLY SUPPORT RECURSION
     if req.topic == "recursion":
         if not req.entry_func:
@@ -71,12 +80,16 @@ async def simulate(req: SimRequest) -> Dict[str, Any]:
         except Exception:
             return {"error": "Array must contain integers only"}
 
-        out = simulate_lis_dp(arr)
+        if req.mode == "patience":
+            return {"ok": True, "array": arr, **simulate_lis_patience(arr)}
+
+        # max_snapshots switches on the bounded mode (rows are capped too)
+        bounded_rows = LIS_MAX_ROWS if req.max_snapshots is not None else None
+        out = simulate_lis_dp(arr, max_snapshots=req.max_snapshots, max_rows=bounded_rows)
         return {
             "ok": True,
             "array": arr,
-            "final_dp": out["final_dp"],
-            "snapshots": out["snapshots"]
+            **out
         }
 
     return {"error": "topic not supported yet"}
@@ -0,0 +1,50 @@
+# routes/trace.py
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+
+from engines.graph_runtime_tracer import as_delta
+from services.admission import admission
+from services.trace_store import TRACE_MAX_RANGE, get_trace_store
+
+router = APIRouter()
+
+
+@router.get("/{trace_id}", dependencies=[Depends(admission())])
+async def get_trace(
+    trace_id: str, start: int = 0, count: int = 0, kind: Optional[str] = None, deltas: bool = False
+):
+    """
+    Summary metadata of a stored trace (step count, per-kind counts, sizes,
+    topic and entry call), plus steps [start, start + count) when count > 0.
+    With `kind` (recursion_event, dp_step, graph_step, execution_step) the
+    range counts only steps of that kind. `deltas` drops the queue/visited
+    lists from BFS graph steps except on the range's first one and keyframes.
+    """
+    store = get_trace_store()
+    index = await asyncio.to_thread(store.get_index, trace_id)
+    if index is None:
+        return {"ok": False, "error": "trace not found"}
+
+    meta = {k: v for k, v in index.items() if k not in ("segments", "replay")}
+    meta["segments"] = len(index["segments"])
+    out = {"ok": True, "trace": meta}
+    if count > 0:
+        steps = await asyncio.to_thread(store.get_steps, index, start, count, kind)
+        if deltas:
+            graph_steps = 0
+            for step in steps:
+                if step["kind"] == "graph_step":
+                    step["data"] = as_delta(step["data"], graph_steps)
+                    graph_steps += 1
+        total = index["steps"] if kind is None else index["kinds"].get(kind, 0)
+        out["range"] = {
+            "start": start,
+            "count": len(steps),
+            "total": total,
+            "max_count": TRACE_MAX_RANGE,
+            "next": start + len(steps) if start + len(steps) < total else None,
+        }
+        out["steps"] = steps
+    return out
@@ -0,0 +1,546 @@
+# sandbox/profiler.py
+# Per-line profiler for sandbox_runner's profile mode.
+# The runner starts `python -c <this source> <user file> <config json>`; main()
+# runs the user file as __main__ under one of two backends:
+# - "sampling" (default): a thread samples the main thread's innermost user
+#   frame every `sample_interval_s`, and calls of the user's functions are
+#   counted from call/return events only (sys.monitoring PY_START / PY_RETURN
+#   on Python 3.12+, switched off for code outside the user's file;
+#   sys.setprofile before). A few percent of overhead.
+# - "monitoring" (`exact`, Python 3.12+): sys.monitoring LINE events on top,
+#   so line hits are exact and each line's time is its self time (callees'
+#   lines get their own). A Python callback per executed line costs about 10x
+#   on tight loops, so it is only used when asked for.
+# Overhead is estimated from a calibration run of the same backend.
+# The profile is written as one `MARKER {json}` line to stderr when the program
+# ends (normally, by an exception or sys.exit) or when `deadline_s` passes; in
+# the last case the process exits with TIMEOUT_EXIT_CODE.
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+import _thread
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MARKER = "__DECAPSULE_PROFILE__"
+TIMEOUT_EXIT_CODE = 87
+CALIBRATION_FILE = "<decapsule-profiler-calibration>"
+
+DEFAULTS = {
+    "sample_interval_s": 0.001,
+    "deadline_s": 1.8,
+    "hotspots": 5,
+    "exact": False,
+}
+
+# call/return events the sampling backend listens to on 3.12+
+CALL_EVENTS = ("PY_START", "PY_RESUME", "PY_RETURN", "PY_YIELD", "PY_UNWIND")
+
+_CALIBRATION_SOURCE = """
+def spin(n):
+    total = 0
+    for i in range(n):
+        total += i
+        total ^= 1
+    return total
+"""
+
+
+def _peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # bytes on macOS
+
+
+class MonitoringProfiler:
+    """sys.monitoring backend: exact line hits and per-line self time."""
+
+    mode = "monitoring"
+    EVENTS = ("LINE", "PY_START", "PY_RESUME", "PY_RETURN", "PY_YIELD", "PY_UNWIND")
+
+    def __init__(self, filename, config):
+        self.filename = filename
+        self.config = config
+        self.hits = {}       # line -> hits
+        self.times = {}      # line -> self seconds
+        self.functions = {}  # code -> [calls, seconds]
+        self.counter = [0]   # events seen
+        self.tool = sys.monitoring.PROFILER_ID
+
+    @property
+    def events(self):
+        return self.counter[0]
+
+    def _callbacks(self):
+        """
+        Closures over local names: the LINE callback runs for every line of
+        user code, so it avoids attribute lookups and method calls.
+        """
+        DISABLE = sys.monitoring.DISABLE
+        filename = self.filename
+        hits, times, functions, counter = self.hits, self.times, self.functions, self.counter
+        clock = time.perf_counter
+        get_ident = _thread.get_ident
+        thread = get_ident()
+        # current[0]: when the running line started, current[1]: that line
+        current = [clock(), None]
+        # per running user frame: (code, caller's line, start time)
+        frames = []
+        active = {}  # code -> frames of it currently running (recursion)
+
+        def line_event(code, line):
+            if code.co_filename != filename:
+                return DISABLE
+            if get_ident() != thread:
+                return None
+            now = clock()
+            running = current[1]
+            if running is not None:
+                times[running] += now - current[0]
+            current[0] = now
+            current[1] = line
+            if line in hits:
+                hits[line] += 1
+            else:
+                hits[line] = 1
+                times[line] = 0.0
+            counter[0] += 1
+            return None
+
+        def enter(code, calls):
+            now = clock()
+            running = current[1]
+            if running is not None:
+                times[running] += now - current[0]
+            current[0] = now
+            current[1] = None
+            entry = functions.get(code)
+            if entry is None:
+                functions[code] = [calls, 0.0]
+            else:
+                entry[0] += calls
+            active[code] = active.get(code, 0) + 1
+            frames.append((code, running, now))
+            counter[0] += 1
+
+        def leave(code):
+            now = clock()
+            running = current[1]
+            if running is not None:
+                times[running] += now - current[0]
+            current[0] = now
+            counter[0] += 1
+            if not frames or frames[-1][0] is not code:
+                return
+            _, caller_line, started = frames.pop()
+            current[1] = caller_line  # the rest of the calling line
+            depth = active[code] - 1
+            active[code] = depth
+            if depth == 0:
+                # only the outermost frame of a recursive function adds its time
+                functions[code][1] += now - started
+
+        def start_event(code, offset):
+            if code.co_filename != filename:
+                return DISABLE
+            if get_ident() == thread:
+                enter(code, 1)
+            return None
+
+        def resume_event(code, offset):
+            # a generator picking up again: a start without a new call
+            if code.co_filename != filename:
+                return DISABLE
+            if get_ident() == thread:
+                enter(code, 0)
+            return None
+
+        def return_event(code, offset, value):
+            if code.co_filename != filename:
+                return DISABLE
+            if get_ident() == thread:
+                leave(code)
+            return None
+
+        def unwind_event(code, offset, exc):
+            # global-only event: cannot be disabled per code object
+            if code.co_filename == filename and get_ident() == thread:
+                leave(code)
+
+        return {
+            "LINE": line_event,
+            "PY_START": start_event,
+            "PY_RESUME": resume_event,
+            "PY_RETURN": return_event,
+            "PY_YIELD": return_event,
+            "PY_UNWIND": unwind_event,
+        }
+
+    def start(self):
+        mon = sys.monitoring
+        mon.use_tool_id(self.tool, "decapsule-profiler")
+        mask = 0
+        for name, callback in self._callbacks().items():
+            event = getattr(mon.events, name)
+            mon.register_callback(self.tool, event, callback)
+            mask |= event
+        mon.set_events(self.tool, mask)
+
+    def stop(self):
+        mon = sys.monitoring
+        mon.set_events(self.tool, 0)
+        for name in self.EVENTS:
+            mon.register_callback(self.tool, getattr(mon.events, name), None)
+        mon.free_tool_id(self.tool)
+        mon.restart_events()  # re-arm locations disabled for this run
+
+    def snapshot(self):
+        times = dict(self.times)
+        lines = [
+            {"line": line, "hits": hits, "time_ms": round(times.get(line, 0.0) * 1000, 3)}
+            for line, hits in sorted(dict(self.hits).items())
+        ]
+        return lines, _functions(dict(self.functions))
+
+
+class SamplingProfiler:
+    """Sampled line times plus exact call counts from call/return events."""
+
+    mode = "sampling"
+
+    def __init__(self, filename, config):
+        self.filename = filename
+        self.config = config
+        self.samples = {}    # line -> samples
+        self.functions = {}  # code -> [calls, seconds]
+        self.active = {}
+        self.starts = []
+        self.events = 0
+        self.total_samples = 0
+        self.sampled_s = 0.0
+        self.sampler_cpu_s = 0.0
+        self.thread = _thread.get_ident()
+        self.running = False
+        self.sampler = None
+        self.monitoring = hasattr(sys, "monitoring")
+
+    def _enter(self, code, calls):
+        self.events += 1
+        entry = self.functions.get(code)
+        if entry is None:
+            self.functions[code] = [calls, 0.0]
+        else:
+            entry[0] += calls
+        self.active[code] = self.active.get(code, 0) + 1
+        self.starts.append((code, time.perf_counter()))
+
+    def _leave(self, code):
+        if not self.starts or self.starts[-1][0] is not code:
+            return
+        self.events += 1
+        _, started = self.starts.pop()
+        depth = self.active[code] - 1
+        self.active[code] = depth
+        if depth == 0:
+            # only the outermost frame of a recursive function adds its time
+            self.functions[code][1] += time.perf_counter() - started
+
+    def _profile(self, frame, event, arg):
+        # sys.setprofile: "call" also fires when a generator resumes
+        if event == "call" and frame.f_code.co_filename == self.filename:
+            self._enter(frame.f_code, 1)
+        elif event == "return" and frame.f_code.co_filename == self.filename:
+            self._leave(frame.f_code)
+
+    def _monitoring_callbacks(self):
+        DISABLE = sys.monitoring.DISABLE
+        filename = self.filename
+        get_ident = _thread.get_ident
+        thread = self.thread
+
+        def start_event(code, offset):
+            if code.co_filename != filename:
+                return DISABLE
+            if get_ident() == thread:
+                self._enter(code, 1)
+            return None
+
+        def resume_event(code, offset):
+            # a generator picking up again: a start without a new call
+            if code.co_filename != filename:
+                return DISABLE
+            if get_ident() == thread:
+                self._enter(code, 0)
+            return None
+
+        def return_event(code, offset, value):
+            if code.co_filename != filename:
+                return DISABLE
+            if get_ident() == thread:
+                self._leave(code)
+            return None
+
+        def unwind_event(code, offset, exc):
+            # global-only event: cannot be disabled per code object
+            if code.co_filename == filename and get_ident() == thread:
+                self._leave(code)
+
+        return {
+            "PY_START": start_event,
+            "PY_RESUME": resume_event,
+            "PY_RETURN": return_event,
+            "PY_YIELD": return_event,
+            "PY_UNWIND": unwind_event,
+        }
+
+    def hook_calls(self):
+        if not self.monitoring:
+            sys.setprofile(self._profile)
+            return
+        mon = sys.monitoring
+        mon.use_tool_id(mon.PROFILER_ID, "decapsule-profiler")
+        mask = 0
+        for name, callback in self._monitoring_callbacks().items():
+            event = getattr(mon.events, name)
+            mon.register_callback(mon.PROFILER_ID, event, callback)
+            mask |= event
+        mon.set_events(mon.PROFILER_ID, mask)
+
+    def unhook_calls(self):
+        if not self.monitoring:
+            sys.setprofile(None)
+            return
+        mon = sys.monitoring
+        mon.set_events(mon.PROFILER_ID, 0)
+        for name in CALL_EVENTS:
+            mon.register_callback(mon.PROFILER_ID, getattr(mon.events, name), None)
+        mon.free_tool_id(mon.PROFILER_ID)
+        mon.restart_events()  # re-arm locations disabled for this run
+
+    def _sample_loop(self):
+        interval = self.config["sample_interval_s"]
+        cpu_start = time.thread_time()
+        previous = time.perf_counter()
+        while self.running:
+            time.sleep(interval)
+            now = time.perf_counter()
+            frame = sys._current_frames().get(self.thread)
+            while frame is not None and frame.f_code.co_filename != self.filename:
+                frame = frame.f_back
+            if frame is not None:
+                line = frame.f_lineno
+                self.samples[line] = self.samples.get(line, 0) + 1
+                self.total_samples += 1
+                self.sampled_s += now - previous
+            previous = now
+            del frame
+            self.sampler_cpu_s = time.thread_time() - cpu_start
+
+    def start(self):
+        # the sampler needs the GIL back at least once per interval
+        sys.setswitchinterval(min(sys.getswitchinterval(), self.config["sample_interval_s"]))
+        self.running = True
+        self.sampler = threading.Thread(target=self._sample_loop, daemon=True, name="decapsule-profiler")
+        self.sampler.start()
+        self.hook_calls()
+
+    def stop(self):
+        self.unhook_calls()
+        self.running = False
+        if self.sampler is not None and self.sampler is not threading.current_thread():
+            self.sampler.join(timeout=1)
+
+    def snapshot(self):
+        samples = dict(self.samples)
+        # each sample stands for the wall time since the previous one
+        per_sample = self.sampled_s / self.total_samples if self.total_samples else 0.0
+        lines = [
+            {"line": line, "samples": count, "time_ms": round(count * per_sample * 1000, 3)}
+            for line, count in sorted(samples.items())
+        ]
+        return lines, _functions(dict(self.functions))
+
+
+def _functions(functions):
+    out = [
+        {
+            "function": getattr(code, "co_qualname", code.co_name),
+            "line": code.co_firstlineno,
+            "calls": calls,
+            "time_ms": round(seconds * 1000, 3),
+        }
+        for code, (calls, seconds) in functions.items()
+        if code.co_name != "<module>"
+    ]
+    out.sort(key=lambda f: f["line"])
+    return out
+
+
+def make_profiler(filename, config):
+    if config.get("exact") and hasattr(sys, "monitoring"):
+        return MonitoringProfiler(filename, config)
+    return SamplingProfiler(filename, config)
+
+
+def _best(fn, repeat=3):
+    fastest = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        fastest = min(fastest, time.perf_counter() - start)
+    return fastest
+
+
+def calibrate(config, loops=2000):
+    """
+    Seconds of overhead per profiler event, from timing a small workload with
+    and without the same backend (best of 3 each).
+    """
+    namespace = {}
+    exec(compile(_CALIBRATION_SOURCE, CALIBRATION_FILE, "exec"), namespace)
+    spin = namespace["spin"]
+    profiler = make_profiler(CALIBRATION_FILE, config)
+
+    if isinstance(profiler, MonitoringProfiler):
+        # mostly LINE events
+        def workload():
+            spin(loops)
+    else:
+        # call/return events; the sampler thread is costed by its own CPU time
+        def workload():
+            for _ in range(loops // 10):
+                spin(0)
+
+    plain = _best(workload)
+    if isinstance(profiler, MonitoringProfiler):
+        profiler.start()
+        try:
+            profiled = _best(workload)
+        finally:
+            profiler.stop()
+    else:
+        profiler.hook_calls()
+        try:
+            profiled = _best(workload)
+        finally:
+            profiler.unhook_calls()
+    return max(0.0, profiled - plain) / max(profiler.events / 3, 1)
+
+
+class Session:
+    def __init__(self, filename, config):
+        self.config = config
+        self.per_event_s = calibrate(config)
+        self.baseline_rss_kb = _peak_rss_kb()
+        self.profiler = make_profiler(filename, config)
+        self.started = None
+        self.emitted = threading.Lock()
+
+    def run(self, code, user_globals):
+        timer = threading.Timer(self.config["deadline_s"], self._deadline)
+        timer.daemon = True
+        timer.start()
+        self.started = time.perf_counter()
+        self.profiler.start()
+        try:
+            exec(code, user_globals)
+        finally:
+            self.profiler.stop()
+            timer.cancel()
+
+    def _deadline(self):
+        # the program is still running: report what was seen so far
+        if self.emit(truncated=True):
+            os._exit(TIMEOUT_EXIT_CODE)
+
+    def emit(self, truncated=False):
+        """Write the profile once; False if it was already written."""
+        if not self.emitted.acquire(blocking=False):
+            return False
+        wall = time.perf_counter() - self.started if self.started is not None else 0.0
+        lines, functions = self.profiler.snapshot()
+        overhead = self.profiler.events * self.per_event_s
+        if isinstance(self.profiler, SamplingProfiler):
+            overhead += self.profiler.sampler_cpu_s
+        overhead = min(overhead, wall)
+        peak = _peak_rss_kb()
+        ranked = sorted(lines, key=lambda entry: entry["time_ms"], reverse=True)
+        report = {
+            "mode": self.profiler.mode,
+            "python": f"{sys.version_info[0]}.{sys.version_info[1]}",
+            "wall_ms": round(wall * 1000, 3),
+            "lines": lines,
+            "functions": functions,
+            "hotspots": [entry["line"] for entry in ranked[:self.config["hotspots"]] if entry["time_ms"] > 0],
+            "memory": {
+                "peak_rss_kb": peak,
+                "baseline_rss_kb": self.baseline_rss_kb,
+                "program_peak_kb": None if peak is None else max(0, peak - self.baseline_rss_kb),
+            },
+            "overhead": {
+                "events": self.profiler.events,
+                "per_event_us": round(self.per_event_s * 1e6, 3),
+                "estimated_ms": round(overhead * 1000, 3),
+                "percent": round(100 * overhead / (wall - overhead), 1) if wall > overhead else None,
+            },
+            "truncated": truncated,
+        }
+        if isinstance(self.profiler, SamplingProfiler):
+            report["sample_interval_ms"] = self.config["sample_interval_s"] * 1000
+            report["samples"] = self.profiler.total_samples
+            report["call_events"] = "sys.monitoring" if self.profiler.monitoring else "sys.setprofile"
+        try:
+            sys.stdout.flush()
+        except Exception:
+            pass
+        os.write(2, f"\n{MARKER} {json.dumps(report)}\n".encode())
+        return True
+
+
+def _print_user_traceback(exc, filename):
+    tb = exc.__traceback__
+    # drop the bootstrap frames so the output matches `python file.py`
+    while tb is not None and tb.tb_frame.f_code.co_filename != filename:
+        tb = tb.tb_next
+    traceback.print_exception(type(exc), exc, tb)
+
+
+def main():
+    filename = sys.argv[1]
+    config = dict(DEFAULTS)
+    if len(sys.argv) > 2:
+        config.update(json.loads(sys.argv[2]))
+    sys.argv = [filename]
+    sys.path[0] = os.path.dirname(filename)
+
+    with open(filename, "rb") as f:
+        source = f.read()
+    try:
+        code = compile(source, filename, "exec")
+    except SyntaxError as e:
+        traceback.print_exception(type(e), e, None)
+        sys.exit(1)
+
+    user_globals = {"__name__": "__main__", "__file__": filename, "__builtins__": __builtins__}
+    session = Session(filename, config)
+    try:
+        session.run(code, user_globals)
+    except SystemExit:
+        session.emit()
+        raise
+    except BaseException as e:
+        _print_user_traceback(e, filename)
+        session.emit()
+        sys.exit(1)
+    session.emit()
+
+
+if __name__ == "__main__":
+    main()
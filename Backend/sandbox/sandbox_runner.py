@@ -1,28 +1,213 @@
 import subprocess
 import tempfile
 import os
+import json
+import re
+import sys
+import threading
+import time
 import uuid
+from contextlib import contextmanager
 
-def run_in_sandbox(code: str, stdin: str):
-    file_id = str(uuid.uuid4())
-    tmp_dir = tempfile.gettempdir()          # <-- works on Windows/Linux/Mac
-    filepath = os.path.join(tmp_dir, f"{file_id}.py")
+from sandbox import profiler as _profiler
+from sandbox import watchdog as _watchdog
 
+# opt-in: run user code under sandbox/watchdog.py, which stops loops that
+# cannot make progress and runaway recursion before the timeout
+SANDBOX_WATCHDOG = os.getenv("DECAPSULE_SANDBOX_WATCHDOG", "0") == "1"
+# seconds between stack samples inside the sandboxed interpreter
+WATCHDOG_INTERVAL_S = float(os.getenv("DECAPSULE_WATCHDOG_INTERVAL_S", "0.02"))
+# recursion deeper than this on consecutive samples is stopped
+WATCHDOG_MAX_DEPTH = int(os.getenv("DECAPSULE_WATCHDOG_MAX_DEPTH", "10000"))
+# profile mode without sys.monitoring (Python < 3.12): seconds between line samples
+PROFILE_SAMPLE_INTERVAL_S = float(os.getenv("DECAPSULE_PROFILE_SAMPLE_INTERVAL_S", "0.001"))
+
+# how the child gets the user's code: "auto" reads it from an inherited fd
+# (memfd, else a pipe) so nothing touches the disk; "file" writes a temp .py
+# (always the case without pass_fds, i.e. on Windows)
+CODE_DELIVERY = os.getenv("DECAPSULE_CODE_DELIVERY", "auto")
+
+# interpreter for sandboxed runs; defaults to the server's own, so the
+# profiler backend (sys.monitoring needs 3.12+) matches what the server runs
+SANDBOX_PYTHON = os.getenv("DECAPSULE_SANDBOX_PYTHON", sys.executable or "python")
+
+SANDBOX_TIMEOUT_S = 2
+# a profiled run reports what it saw this long before the timeout would kill it
+PROFILE_DEADLINE_MARGIN_S = 0.2
+
+_bootstrap_sources = {}
+
+# live counters so load tests can see how deep the sandbox queue gets
+_stats_lock = threading.Lock()
+_stats = {"in_flight": 0, "peak_in_flight": 0, "total": 0}
+
+
+def sandbox_stats(reset_peak: bool = False) -> dict:
+    with _stats_lock:
+        snapshot = dict(_stats)
+        if reset_peak:
+            _stats["peak_in_flight"] = _stats["in_flight"]
+    return snapshot
+
+
+def _track(delta: int):
+    with _stats_lock:
+        _stats["in_flight"] += delta
+        if delta > 0:
+            _stats["total"] += 1
+            _stats["peak_in_flight"] = max(_stats["peak_in_flight"], _stats["in_flight"])
+
+
+@contextmanager
+def _code_path(code: str):
+    """
+    Yields (path the child opens to read the code, fds it must inherit).
+    An inherited fd is opened as /dev/fd/N in the child: a memfd is a plain
+    in-memory file; a pipe is fed by a thread so code larger than the pipe
+    buffer cannot block us.
+    """
+    data = code.encode("utf-8")
+    if CODE_DELIVERY != "file" and os.name == "posix":
+        if hasattr(os, "memfd_create"):
+            fd = os.memfd_create("decapsule_code")
+            try:
+                os.write(fd, data)
+                yield f"/dev/fd/{fd}", (fd,)
+            finally:
+                os.close(fd)
+            return
+
+        read_fd, write_fd = os.pipe()
+
+        def feed():
+            try:
+                with open(write_fd, "wb") as f:
+                    f.write(data)
+            except OSError:
+                pass  # the child exited without reading all of it
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        try:
+            yield f"/dev/fd/{read_fd}", (read_fd,)
+        finally:
+            os.close(read_fd)
+            feeder.join()
+        return
+
+    filepath = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4()}.py")
     with open(filepath, "w") as f:
         f.write(code)
+    try:
+        yield filepath, ()
+    finally:
+        try:
+            os.remove(filepath)
+        except OSError:
+            pass
+
+
+# <uuid4>.py files of the old file delivery, decap_trace_*.py of the old recursion tracer
+_ORPHAN_NAME = re.compile(r"^([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|decap_trace_[0-9a-f]{16})\.py$")
+
+
+def purge_orphan_code_files(min_age_s: float = 60.0) -> int:
+    """Delete user-code temp files that earlier runs left behind. Returns how many."""
+    tmp_dir = tempfile.gettempdir()
+    cutoff = time.time() - min_age_s
+    removed = 0
+    try:
+        names = os.listdir(tmp_dir)
+    except OSError:
+        return 0
+    for name in names:
+        if not _ORPHAN_NAME.match(name):
+            continue
+        path = os.path.join(tmp_dir, name)
+        try:
+            # younger files may belong to a sibling worker's running request
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def _bootstrap_command(module, filepath: str, config: dict):
+    """`python -c <module source> <user file> <config>` for watchdog.py / profiler.py"""
+    source = _bootstrap_sources.get(module.__name__)
+    if source is None:
+        with open(module.__file__, "r", encoding="utf-8") as f:
+            source = _bootstrap_sources[module.__name__] = f.read()
+    return [SANDBOX_PYTHON, "-c", source, filepath, json.dumps(config)]
+
+
+def _command(filepath: str, watchdog: bool, profile: bool, exact: bool = False):
+    if profile:
+        return _bootstrap_command(_profiler, filepath, {
+            "sample_interval_s": PROFILE_SAMPLE_INTERVAL_S,
+            "deadline_s": SANDBOX_TIMEOUT_S - PROFILE_DEADLINE_MARGIN_S,
+            "exact": exact,
+        })
+    if watchdog:
+        return _bootstrap_command(_watchdog, filepath, {
+            "interval_s": WATCHDOG_INTERVAL_S,
+            "max_depth": WATCHDOG_MAX_DEPTH,
+        })
+    return [SANDBOX_PYTHON, filepath]
+
+
+def _split_marker(stderr: str, marker: str):
+    """(stderr without the marker line, its JSON payload or None)"""
+    head, sep, tail = stderr.rpartition(marker + " ")
+    if not sep:
+        return stderr, None
+    line, _, rest = tail.partition("\n")
+    try:
+        payload = json.loads(line)
+    except ValueError:
+        return stderr, None
+    return (head.rstrip("\n") + rest).strip("\n"), payload
+
+
+def run_in_sandbox(code: str, stdin: str, watchdog: bool = None, profile: bool = False, exact: bool = False):
+    """exact: with profile, count every line with sys.monitoring (3.12+; ~10x slower)"""
+    _track(1)
+    try:
+        return _run_in_sandbox(code, stdin, SANDBOX_WATCHDOG if watchdog is None else watchdog, profile, exact)
+    finally:
+        _track(-1)
+
 
+def _run_in_sandbox(code: str, stdin: str, watchdog: bool = False, profile: bool = False, exact: bool = False):
+    # profile mode runs without the watchdog: both would instrument the same frames
+    watchdog = watchdog and not profile
     try:
-        proc = subprocess.run(
-            ["python", filepath],            # <-- use python instead of python3 on Windows
-            input=stdin.encode(),
-            capture_output=True,
-            timeout=2
-        )
-        return {
+        with _code_path(code) as (filepath, pass_fds):
+            proc = subprocess.run(
+                _command(filepath, watchdog, profile, exact),
+                input=stdin.encode(),
+                capture_output=True,
+                timeout=SANDBOX_TIMEOUT_S,
+                pass_fds=pass_fds,
+            )
+        result = {
             "stdout": proc.stdout.decode(),
             "stderr": proc.stderr.decode(),
             "exit_code": proc.returncode
         }
+        if watchdog and proc.returncode == _watchdog.EXIT_CODE:
+            result["stderr"], diagnosis = _split_marker(result["stderr"], _watchdog.MARKER)
+            if diagnosis is not None:
+                label = "Infinite loop" if diagnosis["kind"] == "non_progress_loop" else "Unbounded recursion"
+                result["error"] = f"{label} detected: {diagnosis['detail']}"
+                result["watchdog"] = diagnosis
+        if profile:
+            result["stderr"], result["profile"] = _split_marker(result["stderr"], _profiler.MARKER)
+            if proc.returncode == _profiler.TIMEOUT_EXIT_CODE and result["profile"] is not None:
+                result["error"] = "Timeout: infinite loop detected"
+        return result
     except subprocess.TimeoutExpired:
         return {"error": "Timeout: infinite loop detected"}
     except Exception as e:
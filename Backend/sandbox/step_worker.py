@@ -0,0 +1,219 @@
+# sandbox/step_worker.py
+# Paused, stepwise execution for services/debug_sessions.py.
+# Started as `python -c <engines/trace_backend.py + this source> <config json>`
+# (tracing() and DISABLE come from the prepended backend source). Protocol,
+# one JSON object per line:
+# - stdin, first line: {"code", "stdin", "breakpoints"}; then commands:
+#     {"cmd": "step", "count": N}     run N lines, report each one
+#     {"cmd": "continue"}             run to a breakpoint (only that stop is reported)
+#     {"cmd": "breakpoints", "lines"} replace the breakpoint set
+#     {"cmd": "stop"}
+# - stdout: {"type": "paused", "reason", "steps", "at", "stdout"} after each
+#   command, {"type": "finished", ...} when the program ends.
+# The program pauses *before* the reported line runs: the line-event hook
+# blocks on the command pipe, so nothing past the last viewed step is computed.
+# The user's program gets `stdin` as its input and its prints are captured;
+# file descriptors 0 and 1 are kept for the protocol.
+import io
+import json
+import os
+import reprlib
+import sys
+import traceback
+
+USER_FILE = "<user_code>"
+
+DEFAULTS = {
+    "max_batch": 200,
+    "continue_steps": 200000,
+    "max_steps": 1000000,
+}
+
+_repr = reprlib.Repr()
+_repr.maxlevel = 3
+_repr.maxlist = _repr.maxtuple = _repr.maxset = _repr.maxdict = _repr.maxdeque = 30
+_repr.maxstring = _repr.maxother = 120
+
+
+def _short(value):
+    try:
+        return _repr.repr(value)
+    except Exception:
+        return "<unreprable>"
+
+
+class Stepper:
+    def __init__(self, commands, protocol, config, user_stdout, breakpoints):
+        self.commands = commands
+        self.protocol = protocol
+        self.config = config
+        self.user_stdout = user_stdout
+        self.stdout_sent = 0
+        self.breakpoints = set(breakpoints)
+        self.mode = "step"
+        self.remaining = 1  # pause on the first line
+        self.run_steps = 0
+        self.total = 0
+        self.batch = []
+        self.frame_ids = {}   # frame -> small int shown to the client
+        self.frames_seen = 0
+        self.snapshots = {}   # frame -> locals last reported for it
+
+    # ---- hooks (tracing backend) ----
+
+    def on_line(self, frame):
+        self.total += 1
+        self.run_steps += 1
+        if self.total > self.config["max_steps"]:
+            self.finish(error=f"Stopped after {self.config['max_steps']} steps")
+        if self.mode == "step":
+            step = self.describe(frame)
+            self.batch.append(step)
+            self.remaining -= 1
+            if self.remaining <= 0:
+                self.pause("step", step)
+        elif frame.f_lineno in self.breakpoints:
+            self.pause("breakpoint", self.describe(frame))
+        elif self.run_steps >= self.config["continue_steps"]:
+            self.pause("step_limit", self.describe(frame))
+        return None
+
+    def on_return(self, frame, value, raised):
+        self.frame_ids.pop(frame, None)
+        self.snapshots.pop(frame, None)
+
+    # ---- reporting ----
+
+    def describe(self, frame):
+        fid = self.frame_ids.get(frame)
+        if fid is None:
+            self.frames_seen += 1
+            fid = self.frame_ids[frame] = self.frames_seen
+        current = {
+            name: _short(value) for name, value in frame.f_locals.items()
+            if not name.startswith("__") and type(value).__name__ not in ("module", "function", "type")
+        }
+        last = self.snapshots.get(frame, {})
+        self.snapshots[frame] = current
+        depth = 0
+        f = frame
+        while f is not None:
+            if f.f_code.co_filename == USER_FILE:
+                depth += 1
+            f = f.f_back
+        return {
+            "step": self.total,
+            "line": frame.f_lineno,
+            "function": frame.f_code.co_name,
+            "frame": fid,
+            "depth": depth,
+            "changed": {k: v for k, v in current.items() if last.get(k) != v},
+            "removed": [k for k in last if k not in current],
+        }
+
+    def new_output(self):
+        text = self.user_stdout.getvalue()
+        out = text[self.stdout_sent:]
+        self.stdout_sent = len(text)
+        return out
+
+    def send(self, message):
+        self.protocol.write(json.dumps(message) + "\n")
+        self.protocol.flush()
+
+    # ---- pausing ----
+
+    def pause(self, reason, at):
+        self.send({
+            "type": "paused",
+            "reason": reason,
+            "steps": self.batch,
+            "at": at,
+            "stdout": self.new_output(),
+            "total_steps": self.total,
+        })
+        self.batch = []
+        self.wait()
+
+    def wait(self):
+        """Block the program until a command resumes it."""
+        while True:
+            line = self.commands.readline()
+            if not line:
+                os._exit(0)  # the session went away
+            try:
+                command = json.loads(line)
+            except ValueError:
+                self.send({"type": "error", "error": "invalid command"})
+                continue
+            cmd = command.get("cmd")
+            if cmd == "step":
+                self.mode = "step"
+                self.remaining = max(1, min(int(command.get("count", 1)), self.config["max_batch"]))
+                self.run_steps = 0
+                return
+            if cmd == "continue":
+                self.mode = "continue"
+                self.run_steps = 0
+                return
+            if cmd == "breakpoints":
+                self.breakpoints = set(int(n) for n in command.get("lines", []))
+                self.send({"type": "breakpoints", "lines": sorted(self.breakpoints)})
+                continue
+            if cmd == "stop":
+                os._exit(0)
+            self.send({"type": "error", "error": f"unknown command: {cmd!r}"})
+
+    def finish(self, error=None):
+        self.send({
+            "type": "finished",
+            "steps": self.batch,
+            "stdout": self.new_output(),
+            "error": error,
+            "total_steps": self.total,
+        })
+        self.protocol.flush()
+        os._exit(0)
+
+
+def main():
+    config = dict(DEFAULTS)
+    if len(sys.argv) > 1:
+        config.update(json.loads(sys.argv[1]))
+
+    # keep fds 0/1 for the protocol; the program sees its own stdin and stdout
+    commands = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    protocol = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+
+    start = json.loads(commands.readline())
+    user_stdout = io.StringIO()
+    sys.stdin = io.StringIO(start.get("stdin", ""))
+    sys.stdout = user_stdout
+    sys.stderr = io.StringIO()
+
+    stepper = Stepper(commands, protocol, config, user_stdout, start.get("breakpoints", []))
+    try:
+        code = compile(start["code"], USER_FILE, "exec")
+    except SyntaxError as e:
+        stepper.finish(error="".join(traceback.format_exception_only(type(e), e)).strip())
+
+    error = None
+    try:
+        with tracing(USER_FILE, on_line=stepper.on_line, on_return=stepper.on_return):  # noqa: F821
+            exec(code, {"__name__": "__main__"})
+    except SystemExit:
+        pass
+    except BaseException as e:
+        tb = e.__traceback__
+        # drop the worker's own frames
+        while tb is not None and tb.tb_frame.f_code.co_filename != USER_FILE:
+            tb = tb.tb_next
+        error = "".join(traceback.format_exception(type(e), e, tb)).strip()
+    stepper.finish(error=error)
+
+
+if __name__ == "__main__":
+    main()
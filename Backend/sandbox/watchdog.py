@@ -0,0 +1,508 @@
+# sandbox/watchdog.py
+# Opt-in non-progress watchdog for sandbox_runner.
+# The runner starts `python -c <this source> <user file> <config json>`; main()
+# runs the user file as __main__ while a daemon thread samples the main
+# thread's stack every `interval_s`:
+# - recursion: the user's frames are deeper than `max_depth` on
+#   `depth_samples` consecutive samples -> the base case is not reached
+# - loops: when the main thread is inside a `while` loop, the sampler sends
+#   ARM_SIGNAL; its handler (which runs in the main thread) line-traces that
+#   one frame for a short window. Every return to the same instruction in the
+#   loop body is a back-edge; if the frame's variables are identical on
+#   `repeats` consecutive back-edges the loop cannot make progress. The first
+#   back-edge that shows a change ends the window, and each window that saw
+#   progress doubles the wait before the next one (up to `max_hold_off_s`),
+#   so a loop that is getting somewhere is barely traced at all.
+# On a diagnosis it writes one `MARKER {json}` line to stderr and exits with
+# EXIT_CODE, so the sandbox slot is freed long before the timeout.
+# Loops that touch outside state (time, input, random, next(), ...) or call
+# functions the file does not define are never judged; the state compared
+# includes what the file's own functions carry in closures and defaults.
+import ast
+import builtins
+import json
+import numbers
+import os
+import reprlib
+import signal
+import sys
+import threading
+import time
+import traceback
+import types
+from collections import deque
+
+MARKER = "__DECAPSULE_WATCHDOG__"
+EXIT_CODE = 86
+ARM_SIGNAL = getattr(signal, "SIGUSR2", None)
+
+DEFAULTS = {
+    "interval_s": 0.02,
+    "repeats": 2,
+    # line events one armed window may trace before it gives up
+    "max_lines": 20000,
+    # after a window that saw progress, the next one waits twice as long, up to this
+    "max_hold_off_s": 0.4,
+    "max_depth": 10000,
+    "depth_samples": 3,
+}
+
+# names whose presence in a loop means its exit may depend on the outside world
+# or on state this watchdog cannot see (iterators, files)
+EXTERNAL_NAMES = frozenset({
+    "time", "sleep", "perf_counter", "monotonic", "datetime", "random", "randint", "choice",
+    "input", "sys", "os", "threading", "queue", "select", "socket", "uuid", "secrets", "signal",
+    "next", "send", "read", "readline", "recv", "get_nowait",
+})
+
+_SKIP_TYPES = (types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType, type)
+
+# how many closures deep a function's captured state is followed
+CLOSURE_DEPTH = 3
+
+# a state is copied exactly or not at all: past this many elements, or this
+# much nesting, the back-edge is not judged instead of compared on a partial view
+STATE_BUDGET = 200000
+STATE_NESTING = 64
+
+_BUILTIN_NAMES = frozenset(dir(builtins))
+
+# immutable values a state copy can hold as they are
+_ATOMS = frozenset({type(None), bool, int, float, complex, str, bytes, range})
+
+_repr = reprlib.Repr()
+_repr.maxlevel = 3
+_repr.maxlist = _repr.maxtuple = _repr.maxset = _repr.maxdict = _repr.maxdeque = 50
+_repr.maxstring = _repr.maxother = 200
+
+
+class _Unjudgeable(Exception):
+    """The state is too big, too deep or holds objects that cannot be copied exactly."""
+
+
+class _Fingerprint:
+    """
+    Exact, comparable copy of the values a loop body can read. Containers of
+    plain values are copied with one tuple() call; anything else is walked
+    under STATE_BUDGET, and objects met twice (cycles, shared nodes) become
+    references. It never truncates: it raises _Unjudgeable instead.
+    """
+
+    def __init__(self):
+        self.budget = STATE_BUDGET
+        # id -> object; holding the objects keeps their ids from being reused mid-walk
+        self.seen = {}
+
+    def _spend(self, count):
+        self.budget -= count
+        if self.budget < 0:
+            raise _Unjudgeable
+
+    def value(self, value, depth=0):
+        kind = type(value)
+        if kind in _ATOMS:
+            return value
+        if depth >= STATE_NESTING:
+            raise _Unjudgeable
+        if id(value) in self.seen:
+            return ("ref", id(value))
+        self.seen[id(value)] = value
+        name = kind.__qualname__
+
+        if isinstance(value, (list, tuple, deque)):
+            self._spend(len(value))
+            if set(map(type, value)) <= _ATOMS:
+                return (name, tuple(value))
+            return (name, tuple(self.value(v, depth + 1) for v in value))
+        if isinstance(value, dict):
+            self._spend(len(value))
+            if set(map(type, value)) <= _ATOMS and set(map(type, value.values())) <= _ATOMS:
+                return (name, tuple(value.items()))
+            return (name, tuple((self.value(k, depth + 1), self.value(v, depth + 1)) for k, v in value.items()))
+        if isinstance(value, (set, frozenset)):
+            self._spend(len(value))
+            if set(map(type, value)) <= _ATOMS:
+                return (name, frozenset(value))
+            return (name, tuple(self.value(v, depth + 1) for v in value))
+        if isinstance(value, bytearray):
+            self._spend(len(value))
+            return (name, bytes(value))
+        if isinstance(value, types.FunctionType):
+            return self.function(value)
+        if isinstance(value, _SKIP_TYPES):
+            return (name, id(value))
+        if isinstance(value, numbers.Number) and getattr(value, "__hash__", None):
+            return (name, value)  # Decimal, numpy scalars, ...
+
+        # objects mutated through attributes (node.count += 1)
+        attrs = getattr(value, "__dict__", None)
+        slots = _slot_names(kind)
+        if not isinstance(attrs, dict) and not slots:
+            raise _Unjudgeable  # iterators, C objects, arrays: no exact copy
+        self._spend(len(slots) + 1)
+        return (
+            name,
+            self.value(attrs, depth + 1) if isinstance(attrs, dict) else None,
+            tuple(self.value(getattr(value, s), depth + 1) if hasattr(value, s) else "<unset>" for s in slots),
+        )
+
+    def function(self, func, depth=CLOSURE_DEPTH):
+        """
+        State a function carries with it: its closure cells (a counter bumped
+        through `nonlocal`) and mutable defaults (def f(seen=[])). Functions in
+        those cells are followed up to `depth` levels.
+        """
+        parts = []
+        for cell in func.__closure__ or ():
+            try:
+                value = cell.cell_contents
+            except ValueError:  # not assigned yet
+                parts.append("<unset>")
+                continue
+            if isinstance(value, types.FunctionType):
+                parts.append(self.function(value, depth - 1) if depth > 1 else None)
+            elif not isinstance(value, _SKIP_TYPES):
+                parts.append(self.value(value))
+        for value in (func.__defaults__ or ()) + tuple((func.__kwdefaults__ or {}).values()):
+            if not isinstance(value, _SKIP_TYPES):
+                parts.append(self.value(value))
+        return ("function", tuple(parts))
+
+    def scope(self, scope):
+        """(name, copy) per variable, produced lazily so a comparison can stop early."""
+        for name, value in list(scope.items()):
+            if name.startswith("__"):
+                continue
+            if isinstance(value, types.FunctionType):
+                if value.__closure__ or value.__defaults__ or value.__kwdefaults__:
+                    yield name, self.function(value)
+            elif isinstance(value, type) and value.__module__ == "__main__":
+                # class attributes used as counters (Counter.total += 1)
+                yield name, self.value({k: v for k, v in vars(value).items()
+                                        if not k.startswith("__") and not isinstance(v, _SKIP_TYPES)})
+            elif not isinstance(value, _SKIP_TYPES):
+                yield name, self.value(value)
+
+
+def _slot_names(kind):
+    names = []
+    for cls in kind.__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        names.extend((slots,) if isinstance(slots, str) else slots)
+    return [s for s in names if s not in ("__dict__", "__weakref__")]
+
+
+def _state(frame):
+    """Lazy copy of everything a deterministic loop body can read, locals first."""
+    fingerprint = _Fingerprint()
+    yield from fingerprint.scope(frame.f_locals)
+    if frame.f_globals is not frame.f_locals:
+        yield from fingerprint.scope(frame.f_globals)  # a helper may change a global the test reads
+
+
+def _same_state(previous, state):
+    """Whether `state` matches the stored copy, stopping at the first variable that differs."""
+    stored = iter(previous)
+    for entry in state:
+        if next(stored, None) != entry:
+            return False
+    return next(stored, None) is None
+
+
+def _direct_lines(loop):
+    """Lines of the while test and body that are not inside a nested for/def/class."""
+    lines = set()
+    stack = [loop.test, *loop.body]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.For, ast.AsyncFor, ast.FunctionDef, ast.AsyncFunctionDef,
+                             ast.ClassDef, ast.Lambda, ast.comprehension)):
+            continue
+        if hasattr(node, "lineno"):
+            lines.add(node.lineno)
+        stack.extend(ast.iter_child_nodes(node))
+    return frozenset(lines)
+
+
+def _defined_names(tree):
+    """Names the user's file binds itself (def, class, assignment), imports excluded."""
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+            names.add(node.id)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+    return names
+
+
+def _while_loops(tree):
+    """[{"line", "end_line", "names", "lines"}] for while loops that are safe to judge."""
+    out = []
+    defined = _defined_names(tree)
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.While):
+            continue
+        names = set()
+        opaque = False
+        for sub in ast.walk(node):
+            if isinstance(sub, ast.Name):
+                names.add(sub.id)
+            elif isinstance(sub, ast.Attribute):
+                names.add(sub.attr)
+            elif isinstance(sub, ast.Call) and isinstance(sub.func, ast.Name):
+                # functions from other modules keep state the fingerprint
+                # cannot reach; the file's own ones are covered by _state
+                opaque = opaque or (sub.func.id not in defined and sub.func.id not in _BUILTIN_NAMES)
+        if opaque or names & EXTERNAL_NAMES:
+            continue
+        out.append({"line": node.lineno, "end_line": node.end_lineno, "names": names, "lines": _direct_lines(node)})
+    return out
+
+
+def _short(value):
+    try:
+        return _repr.repr(value)
+    except Exception:
+        return "<unreprable>"
+
+
+class Watchdog(threading.Thread):
+    def __init__(self, filename, tree, main_ident, config):
+        super().__init__(daemon=True, name="decapsule-watchdog")
+        self.filename = filename
+        self.loops = _while_loops(tree)
+        self.main_ident = main_ident
+        self.config = config
+        self.start_time = time.perf_counter()
+        self.depths = []
+        self.armed = False
+        # windows that saw progress push the next one further out
+        self.hold_off = config["interval_s"]
+        self.resume_at = 0.0
+        self.can_arm = ARM_SIGNAL is not None and hasattr(signal, "pthread_kill") and bool(self.loops)
+
+    # ---- sampler thread ----
+
+    def run(self):
+        interval = self.config["interval_s"]
+        while True:
+            time.sleep(interval)
+            frame = sys._current_frames().get(self.main_ident)
+            if frame is None:
+                return
+            try:
+                diagnosis = self._sample(frame)
+            except Exception:
+                diagnosis = None  # never let the watchdog break the user's program
+            finally:
+                del frame
+            if diagnosis is not None:
+                self._stop(diagnosis)
+
+    def _sample(self, frame):
+        # innermost frame of the user's file (the main thread may be inside a builtin);
+        # the walk is capped so a very deep stack stays cheap to sample
+        cap = 2 * self.config["max_depth"]
+        depth = 0
+        user_frame = None
+        f = frame
+        while f is not None and depth <= cap:
+            if f.f_code.co_filename == self.filename:
+                depth += 1
+                if user_frame is None:
+                    user_frame = f
+            f = f.f_back
+        if user_frame is None:
+            return None
+
+        diagnosis = self._check_depth(user_frame, depth)
+        if (
+            diagnosis is None and self.can_arm and not self.armed
+            and time.perf_counter() >= self.resume_at and self._loop_at(user_frame.f_lineno)
+        ):
+            self.armed = True
+            signal.pthread_kill(self.main_ident, ARM_SIGNAL)
+        return diagnosis
+
+    def _check_depth(self, frame, depth):
+        if depth <= self.config["max_depth"]:
+            self.depths = []
+            return None
+        self.depths.append(depth)
+        needed = self.config["depth_samples"]
+        recent = self.depths[-needed:]
+        # still growing (or past the walk cap on every sample)
+        if len(recent) < needed or any(b < a for a, b in zip(recent, recent[1:])):
+            return None
+        code = frame.f_code
+        shown = "more than " + str(depth - 1) if depth > 2 * self.config["max_depth"] else str(depth)
+        return {
+            "kind": "unbounded_recursion",
+            "function": code.co_name,
+            "line": frame.f_lineno,
+            "depth": depth,
+            "variables": {k: _short(v) for k, v in frame.f_locals.items() if not k.startswith("__")},
+            "detail": (
+                f"Recursion in {code.co_name}() is {shown} calls deep and still growing "
+                f"(line {frame.f_lineno}); the base case is probably never reached."
+            ),
+        }
+
+    def _loop_at(self, line):
+        """Innermost judged while loop containing the line."""
+        found = None
+        for loop in self.loops:
+            if line is not None and loop["line"] <= line <= loop["end_line"]:
+                if found is None or loop["line"] >= found["line"]:
+                    found = loop
+        return found
+
+    # ---- main thread: signal handler and line tracer ----
+
+    def install(self):
+        if self.can_arm:
+            signal.signal(ARM_SIGNAL, self._arm)
+
+    def _arm(self, signum, frame):
+        while frame is not None and frame.f_code.co_filename != self.filename:
+            frame = frame.f_back
+        loop = self._loop_at(frame.f_lineno) if frame is not None else None
+        if loop is None:
+            self.armed = False
+            return
+        self.loop = loop
+        self.frame = frame
+        self.marker = None
+        self.previous = None
+        self.same = 0
+        self.lines = 0
+        frame.f_trace_lines = True
+        frame.f_trace = self._trace_line
+        sys.settrace(self._trace_call)
+
+    def _trace_call(self, frame, event, arg):
+        return None  # only the armed frame is line-traced
+
+    def _disarm(self, back_off=False):
+        self.frame.f_trace = None
+        self.frame = None
+        sys.settrace(None)
+        if back_off:
+            self.hold_off = min(self.hold_off * 2, self.config["max_hold_off_s"])
+        self.resume_at = time.perf_counter() + self.hold_off
+        self.armed = False
+
+    def _trace_line(self, frame, event, arg):
+        if frame is not self.frame:
+            return None
+        if event != "line":
+            if event in ("return", "exception"):
+                self._disarm()
+            return self._trace_line
+
+        self.lines += 1
+        if self.lines > self.config["max_lines"]:
+            self._disarm(back_off=True)  # iterations too long to watch
+            return None
+        line = frame.f_lineno
+        loop = self.loop
+        if not loop["line"] <= line <= loop["end_line"]:
+            self._disarm()  # left the loop
+            return None
+        if line not in loop["lines"]:
+            return self._trace_line
+
+        point = (line, frame.f_lasti)
+        if self.marker is None:
+            self.marker = point
+        elif point != self.marker:
+            return self._trace_line
+
+        # back at the same instruction: one iteration went by
+        try:
+            if self.previous is None:
+                self.previous = list(_state(frame))
+                return self._trace_line
+            same = _same_state(self.previous, _state(frame))
+        except Exception:  # _Unjudgeable, or a value that broke the copy
+            self._disarm(back_off=True)
+            return None
+        if not same:
+            self._disarm(back_off=True)  # progress: leave the loop alone for a while
+            return None
+        self.same += 1
+        if self.same >= self.config["repeats"]:
+            self._stop(self._loop_diagnosis(frame))
+        return self._trace_line
+
+    def _loop_diagnosis(self, frame):
+        loop = self.loop
+        variables = {
+            k: _short(v) for k, v in frame.f_locals.items()
+            if k in loop["names"] and not isinstance(v, _SKIP_TYPES)
+        }
+        shown = ", ".join(f"{k}={v}" for k, v in sorted(variables.items())) or "no variables"
+        return {
+            "kind": "non_progress_loop",
+            "line": loop["line"],
+            "end_line": loop["end_line"],
+            "function": frame.f_code.co_name,
+            "variables": variables,
+            "iterations": self.same + 1,
+            "detail": (
+                f"while loop at line {loop['line']} repeats with identical state ({shown}); "
+                f"nothing it depends on changes, so it never ends."
+            ),
+        }
+
+    def _stop(self, diagnosis):
+        diagnosis["elapsed_ms"] = round((time.perf_counter() - self.start_time) * 1000)
+        try:
+            sys.stdout.flush()
+        except Exception:
+            pass
+        os.write(2, f"\n{MARKER} {json.dumps(diagnosis, default=repr)}\n".encode())
+        os._exit(EXIT_CODE)
+
+
+def _print_user_traceback(exc, filename):
+    tb = exc.__traceback__
+    # drop the bootstrap frames so the output matches `python file.py`
+    while tb is not None and tb.tb_frame.f_code.co_filename != filename:
+        tb = tb.tb_next
+    traceback.print_exception(type(exc), exc, tb)
+
+
+def main():
+    filename = sys.argv[1]
+    config = dict(DEFAULTS)
+    if len(sys.argv) > 2:
+        config.update(json.loads(sys.argv[2]))
+    sys.argv = [filename]
+    sys.path[0] = os.path.dirname(filename)
+
+    with open(filename, "rb") as f:
+        source = f.read()
+    try:
+        tree = ast.parse(source, filename)
+    except SyntaxError as e:
+        traceback.print_exception(type(e), e, None)
+        sys.exit(1)
+
+    user_globals = {"__name__": "__main__", "__file__": filename, "__builtins__": __builtins__}
+    dog = Watchdog(filename, tree, threading.get_ident(), config)
+    dog.install()
+    dog.start()
+    try:
+        exec(compile(tree, filename, "exec"), user_globals)
+    except SystemExit:
+        raise
+    except BaseException as e:
+        _print_user_traceback(e, filename)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+# services/admission.py
+import functools
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Request
+
+from services.workers import WEB_WORKERS, ProcessSlots, process_slots
+
+# concurrent work allowed per pool
+SANDBOX_CONCURRENCY = int(os.getenv("DECAPSULE_SANDBOX_CONCURRENCY", "4"))
+TRACER_CONCURRENCY = int(os.getenv("DECAPSULE_TRACER_CONCURRENCY", "4"))
+LLM_CONCURRENCY = int(os.getenv("DECAPSULE_LLM_CONCURRENCY", "8"))
+
+# sandbox subprocesses allowed across all workers on the machine
+# (only enforced with several workers; one per core by default)
+SANDBOX_MACHINE_CONCURRENCY = int(os.getenv("DECAPSULE_SANDBOX_MACHINE_CONCURRENCY", str(os.cpu_count() or 4)))
+
+# callers allowed to wait for a slot, and for how long, before we shed load
+POOL_QUEUE_LIMIT = int(os.getenv("DECAPSULE_POOL_QUEUE", "16"))
+POOL_WAIT_TIMEOUT = float(os.getenv("DECAPSULE_POOL_WAIT_TIMEOUT", "10"))
+
+# per-client token bucket for expensive routes
+# (a whole classroom may share one NAT address, so keep it generous; 0 disables)
+# limits are per machine: each worker enforces its share
+RATE_LIMIT_PER_MINUTE = float(os.getenv("DECAPSULE_RATE_LIMIT", "120"))
+RATE_LIMIT_BURST = float(os.getenv("DECAPSULE_RATE_BURST", "40"))
+RATE_LIMIT_MAX_CLIENTS = 10000
+
+# once this many callers wait for the LLM, the explanation stage is skipped
+DEGRADE_LLM_QUEUE = int(os.getenv("DECAPSULE_DEGRADE_LLM_QUEUE", "4"))
+
+
+class Overloaded(Exception):
+    """A work pool is full; the request should be retried later."""
+
+    def __init__(self, pool: str, retry_after: float):
+        super().__init__(f"{pool} pool is busy, retry later")
+        self.pool = pool
+        self.retry_after = retry_after
+
+
+class WorkPool:
+    """
+    Bounded concurrency with a bounded wait queue.
+    Works from any thread: pipeline stages run in worker threads.
+    With `shared` slots, a caller also needs one of the machine-wide slots,
+    so several worker processes together stay within that limit.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        max_queue: int = POOL_QUEUE_LIMIT,
+        timeout: float = POOL_WAIT_TIMEOUT,
+        shared: Optional[ProcessSlots] = None,
+    ):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.shared = shared
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._cond = threading.Condition()
+
+    def _acquire(self):
+        started = time.monotonic()
+        self._acquire_local()
+        if self.shared is None:
+            return
+        remaining = max(0.0, self.timeout - (time.monotonic() - started))
+        if not self.shared.acquire(remaining):
+            self._release_local()
+            with self._cond:
+                self.rejected += 1
+            raise Overloaded(self.name, self.timeout)
+
+    def _release(self):
+        if self.shared is not None:
+            self.shared.release()
+        self._release_local()
+
+    def _acquire_local(self):
+        with self._cond:
+            if self.active < self.limit and self.waiting == 0:
+                self.active += 1
+                return
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded(self.name, self.timeout)
+
+            self.waiting += 1
+            try:
+                ok = self._cond.wait_for(lambda: self.active < self.limit, self.timeout)
+            finally:
+                self.waiting -= 1
+            if not ok:
+                self.rejected += 1
+                raise Overloaded(self.name, self.timeout)
+            self.active += 1
+
+    def _release_local(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self):
+        self._acquire()
+        try:
+            yield
+        finally:
+            self._release()
+
+    def saturated(self) -> bool:
+        return self.waiting >= self.max_queue
+
+    def stats(self) -> Dict[str, int]:
+        out = {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+        }
+        if self.shared is not None:
+            out["machine_limit"] = self.shared.limit
+            out["machine_active"] = self.shared.in_use()
+        return out
+
+
+pools: Dict[str, WorkPool] = {
+    "sandbox": WorkPool(
+        "sandbox", SANDBOX_CONCURRENCY, shared=process_slots("sandbox", SANDBOX_MACHINE_CONCURRENCY)
+    ),
+    "tracer": WorkPool("tracer", TRACER_CONCURRENCY),
+    "llm": WorkPool("llm", LLM_CONCURRENCY),
+}
+
+
+def pooled(pool_name: str):
+    """Run the decorated function inside a slot of the named pool."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with pools[pool_name].slot():
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def degraded() -> bool:
+    """True when LLM pressure is high enough to skip optional LLM stages."""
+    return pools["llm"].waiting >= DEGRADE_LLM_QUEUE
+
+
+class TokenBucketLimiter:
+    """Per-client token buckets, oldest clients evicted beyond max_clients."""
+
+    def __init__(self, per_minute: float, burst: float, max_clients: int = RATE_LIMIT_MAX_CLIENTS):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, client: str) -> float:
+        """Consume one token. Returns 0 if allowed, else seconds until a token is free."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.pop(client, None) or [self.burst, now]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            if tokens >= 1:
+                retry_after = 0.0
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / self.rate
+            self._buckets[client] = [tokens, now]
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+
+# connections are spread across workers, so each one gets an equal share
+rate_limiter = TokenBucketLimiter(
+    RATE_LIMIT_PER_MINUTE / WEB_WORKERS,
+    max(1.0, RATE_LIMIT_BURST / WEB_WORKERS),
+)
+
+
+def client_key(request: Request) -> str:
+    # behind the platform router the real client is the first X-Forwarded-For hop
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded:
+        return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def too_many_requests(detail: str, retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def admission(*pool_names: str):
+    """
+    Route dependency: per-client rate limit, then early load shedding
+    when any pool the route needs already has a full wait queue.
+    """
+    def dependency(request: Request):
+        retry_after = rate_limiter.take(client_key(request))
+        if retry_after:
+            raise too_many_requests("rate limit exceeded", retry_after)
+
+        for name in pool_names:
+            pool = pools[name]
+            if pool.saturated():
+                raise too_many_requests(f"{name} pool is busy, retry later", pool.timeout)
+
+    return dependency
@@ -0,0 +1,145 @@
+# services/debug_sessions.py
+# Interactive debug sessions: one paused sandbox/step_worker.py process per
+# session, driven one command at a time (see routes/debug_session.py).
+# The worker computes steps only when asked, so a session that is closed
+# after a few dozen steps never runs the rest of the program.
+import asyncio
+import json
+import os
+import uuid
+from typing import Any, Dict, Optional
+
+from engines import trace_backend
+from sandbox import step_worker
+from services.admission import Overloaded
+from services.workers import WEB_WORKERS
+
+# open sessions allowed per machine (each worker enforces its share)
+DEBUG_MAX_SESSIONS = int(os.getenv("DECAPSULE_DEBUG_MAX_SESSIONS", "8"))
+# a session with no command for this long is closed
+DEBUG_IDLE_TIMEOUT_S = float(os.getenv("DECAPSULE_DEBUG_IDLE_TIMEOUT_S", "120"))
+# a command whose reply takes longer than this (a long call with no line
+# events) ends the session
+DEBUG_COMMAND_TIMEOUT_S = float(os.getenv("DECAPSULE_DEBUG_COMMAND_TIMEOUT_S", "5"))
+# most steps one "step" command may return
+DEBUG_MAX_BATCH = int(os.getenv("DECAPSULE_DEBUG_MAX_BATCH", "200"))
+# lines one "continue" may run without reaching a breakpoint
+DEBUG_CONTINUE_STEPS = int(os.getenv("DECAPSULE_DEBUG_CONTINUE_STEPS", "200000"))
+# lines a whole session may run
+DEBUG_MAX_STEPS = int(os.getenv("DECAPSULE_DEBUG_MAX_STEPS", "1000000"))
+
+# replies can carry a batch of steps with their locals
+_READ_LIMIT = 16 * 1024 * 1024
+
+_worker_source = None
+
+
+def _get_worker_source() -> str:
+    # the worker runs as `python -c` and cannot import the backend:
+    # prepend the tracing backend it uses
+    global _worker_source
+    if _worker_source is None:
+        parts = []
+        for module in (trace_backend, step_worker):
+            with open(module.__file__, "r", encoding="utf-8") as f:
+                parts.append(f.read())
+        _worker_source = "\n".join(parts)
+    return _worker_source
+
+
+class SessionError(Exception):
+    """The worker died, timed out or broke the protocol."""
+
+
+class DebugSession:
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:12]
+        self.proc: Optional[asyncio.subprocess.Process] = None
+        self.finished = False
+
+    async def start(self, code: str, stdin: str = "", breakpoints=()) -> Dict[str, Any]:
+        """Start the worker; returns its first reply (paused before the first line)."""
+        config = {
+            "max_batch": DEBUG_MAX_BATCH,
+            "continue_steps": DEBUG_CONTINUE_STEPS,
+            "max_steps": DEBUG_MAX_STEPS,
+        }
+        self.proc = await asyncio.create_subprocess_exec(
+            "python", "-c", _get_worker_source(), json.dumps(config),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=_READ_LIMIT,
+        )
+        return await self._exchange({"code": code, "stdin": stdin, "breakpoints": list(breakpoints)})
+
+    async def command(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        if self.finished:
+            return {"type": "error", "error": "the program has finished"}
+        cmd = message.get("cmd")
+        if cmd == "step":
+            count = int(message.get("count", 1))
+            message = {"cmd": "step", "count": max(1, min(count, DEBUG_MAX_BATCH))}
+        elif cmd == "breakpoints":
+            message = {"cmd": "breakpoints", "lines": [int(n) for n in message.get("lines", [])]}
+        elif cmd != "continue":
+            return {"type": "error", "error": f"unknown command: {cmd!r}"}
+        return await self._exchange(message)
+
+    async def _exchange(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        self.proc.stdin.write((json.dumps(message) + "\n").encode())
+        try:
+            await self.proc.stdin.drain()
+            line = await asyncio.wait_for(self.proc.stdout.readline(), DEBUG_COMMAND_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            raise SessionError(f"no reply within {DEBUG_COMMAND_TIMEOUT_S}s (long-running call?)")
+        except (BrokenPipeError, ConnectionResetError):
+            raise SessionError("the debug process exited")
+        if not line:
+            raise SessionError("the debug process exited")
+        try:
+            reply = json.loads(line)
+        except ValueError:
+            raise SessionError("invalid reply from the debug process")
+        if reply.get("type") == "finished":
+            self.finished = True
+        return reply
+
+    async def close(self):
+        proc = self.proc
+        if proc is None:
+            return
+        if proc.returncode is None:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+        # reap it (and let the transport close) even when it exited by itself
+        await proc.wait()
+
+
+class SessionRegistry:
+    """Open sessions of this worker, capped at its share of DEBUG_MAX_SESSIONS."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.sessions: Dict[str, DebugSession] = {}
+        self.rejected = 0
+
+    def open(self) -> DebugSession:
+        if len(self.sessions) >= self.limit:
+            self.rejected += 1
+            raise Overloaded("debug", DEBUG_IDLE_TIMEOUT_S)
+        session = DebugSession()
+        self.sessions[session.id] = session
+        return session
+
+    async def close(self, session: DebugSession):
+        self.sessions.pop(session.id, None)
+        await session.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {"limit": self.limit, "active": len(self.sessions), "rejected": self.rejected}
+
+
+debug_sessions = SessionRegistry(max(1, DEBUG_MAX_SESSIONS // WEB_WORKERS))
@@ -0,0 +1,117 @@
+# services/job_runner.py
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from services.admission import Overloaded
+from services.job_store import get_job_store
+from services.pipeline import iter_pipeline
+from services.workers import WEB_WORKERS
+
+# number of pipelines that may run in the background at once
+JOB_WORKERS = int(os.getenv("DECAPSULE_JOB_WORKERS", "2"))
+
+# queued + running jobs allowed per machine (each worker enforces its share);
+# past it POST /jobs answers 429 instead of growing the queue and the job table
+JOB_MAX_PENDING = int(os.getenv("DECAPSULE_JOB_MAX_PENDING", "32"))
+# Retry-After for a rejected job: about one pipeline run
+JOB_RETRY_AFTER_S = 10
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+_pending = 0
+_pending_limit = max(1, JOB_MAX_PENDING // WEB_WORKERS)
+_pending_lock = threading.Lock()
+_rejected = 0
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="decap-job")
+    return _executor
+
+
+def _release_pending():
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+
+
+def job_stats() -> dict:
+    with _pending_lock:
+        return {"pending": _pending, "limit": _pending_limit, "rejected": _rejected}
+
+
+def _run_job(job_id: str, code: str, user_input: str):
+    try:
+        _run_pipeline(job_id, code, user_input)
+    finally:
+        _release_pending()
+
+
+def _run_pipeline(job_id: str, code: str, user_input: str):
+    store = get_job_store()
+    store.set_status(job_id, "running")
+
+    result = None
+    error = None
+    try:
+        for seq, event in enumerate(iter_pipeline(code, user_input)):
+            store.append_event(job_id, seq, event)
+            if event["stage"] == "done":
+                result = event["payload"]
+            elif event["stage"] == "error":
+                error = event["payload"].get("error")
+    except Exception as e:
+        error = str(e)
+
+    if error is not None or result is None:
+        store.set_status(job_id, "failed", error=error or "pipeline ended without result")
+    else:
+        store.set_status(job_id, "done", result=result)
+
+
+def submit_job(code: str, user_input: str) -> str:
+    """
+    Persist a new job and queue it on the worker pool. Returns the job id.
+    Raises Overloaded (429) when this worker already holds its share of
+    JOB_MAX_PENDING queued or running jobs; nothing is stored then.
+    """
+    global _pending, _rejected
+    with _pending_lock:
+        if _pending >= _pending_limit:
+            _rejected += 1
+            raise Overloaded("jobs", JOB_RETRY_AFTER_S)
+        _pending += 1
+    try:
+        job_id = get_job_store().create_job(code, user_input)
+        _get_executor().submit(_run_job, job_id, code, user_input)
+    except BaseException:
+        _release_pending()
+        raise
+    return job_id
+
+
+def resume_pending_jobs() -> int:
+    """
+    Re-queue jobs left queued/running by a previous process.
+    Their partial event logs are dropped and rebuilt from scratch.
+    """
+    global _pending
+    store = get_job_store()
+    store.purge_expired()
+
+    pending = store.pending_jobs()
+    for job in pending:
+        # already accepted before the restart: counted, never rejected
+        with _pending_lock:
+            _pending += 1
+        store.clear_events(job["id"])
+        store.set_status(job["id"], "queued")
+        _get_executor().submit(_run_job, job["id"], job["code"], job["input"])
+    return len(pending)
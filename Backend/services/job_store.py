@@ -0,0 +1,141 @@
+# services/job_store.py
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+# SQLite file that keeps jobs and their streamed events across restarts
+JOB_DB_PATH = os.getenv(
+    "DECAPSULE_JOB_DB",
+    os.path.join(tempfile.gettempdir(), "decapsule_jobs.sqlite3")
+)
+
+# finished jobs older than this are purged on startup
+JOB_TTL_SECONDS = int(os.getenv("DECAPSULE_JOB_TTL", str(24 * 3600)))
+
+FINISHED_STATUSES = ("done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    code TEXT NOT NULL,
+    input TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_events (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+"""
+
+
+class JobStore:
+    """
+    Durable job + event log.
+    - one row per job (status, final result)
+    - one row per pipeline event, ordered by seq, so clients can
+      resume a stream from any point without re-running the work
+    """
+
+    def __init__(self, path: str = JOB_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _execute(self, sql: str, params: tuple = ()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def create_job(self, code: str, user_input: str) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._execute(
+            "INSERT INTO jobs (id, status, code, input, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, "queued", code, user_input, now, now)
+        )
+        return job_id
+
+    def set_status(self, job_id: str, status: str, result: Any = None, error: Optional[str] = None):
+        self._execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+            (status, json.dumps(result) if result is not None else None, error, time.time(), job_id)
+        )
+
+    def append_event(self, job_id: str, seq: int, event: Dict[str, Any]):
+        self._execute(
+            "INSERT OR REPLACE INTO job_events (job_id, seq, payload) VALUES (?, ?, ?)",
+            (job_id, seq, json.dumps(event, ensure_ascii=False))
+        )
+
+    def clear_events(self, job_id: str):
+        self._execute("DELETE FROM job_events WHERE job_id = ?", (job_id,))
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._execute(
+            "SELECT id, status, result, error, created_at, updated_at FROM jobs WHERE id = ?",
+            (job_id,)
+        )
+        if not rows:
+            return None
+        job_id, status, result, error, created_at, updated_at = rows[0]
+        return {
+            "id": job_id,
+            "status": status,
+            "result": json.loads(result) if result else None,
+            "error": error,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+
+    def get_events(self, job_id: str, after: int = -1, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Events with seq > after, each as {"seq": n, **event}."""
+        sql = "SELECT seq, payload FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq"
+        params: tuple = (job_id, after)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (limit,)
+        return [{"seq": seq, **json.loads(payload)} for seq, payload in self._execute(sql, params)]
+
+    def pending_jobs(self) -> List[Dict[str, str]]:
+        """Jobs a previous process accepted but never finished."""
+        rows = self._execute(
+            "SELECT id, code, input FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+        )
+        return [{"id": r[0], "code": r[1], "input": r[2]} for r in rows]
+
+    def purge_expired(self, ttl: int = JOB_TTL_SECONDS) -> int:
+        cutoff = time.time() - ttl
+        rows = self._execute(
+            "SELECT id FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+            (cutoff,)
+        )
+        for (job_id,) in rows:
+            self._execute("DELETE FROM job_events WHERE job_id = ?", (job_id,))
+            self._execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        return len(rows)
+
+
+_store: Optional[JobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = JobStore()
+    return _store
@@ -0,0 +1,306 @@
+# services/pipeline.py
+import asyncio
+import hashlib
+import json
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+# Engines (existing)
+from engines.recursion_tree_builder import build_recursion_tree
+from engines.entry_extractor import call_args_for, find_entry_call
+from engines.complexity_engine import complexity_requested
+
+# Deterministic engines, memoized per stage
+from services.stages import (
+    classify_code,
+    trace_recursion_runtime,
+    debug_code_static,
+    trace_dp_runtime,
+    trace_graph_runtime,
+    trace_dfs_runtime,
+    trace_dp_bottomup_runtime,
+    analyze_array_code,
+    analyze_string_code,
+    analyze_complexity,
+    traced_runtime,
+    call_llm,
+)
+from services.admission import degraded
+from services.trace_store import get_trace_store
+
+# LLM prompt
+from ml.explain_prompt import make_explain_prompt
+from ml.trace_summary import summarize_trace
+
+
+# bump whenever stage output changes, so coalesced/cached runs never mix versions
+PIPELINE_VERSION = "7"
+
+
+def pipeline_key(code: str, user_input: str = "", complexity: bool = False) -> str:
+    parts = [PIPELINE_VERSION, code, user_input] + (["complexity"] if complexity else [])
+    raw = json.dumps(parts, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def stage_event(stage: str, payload: Any) -> Dict[str, Any]:
+    return {"stage": stage, "payload": payload}
+
+
+# per-step events: with paging the client reads them from GET /trace/{id}
+_STEP_STAGES = ("graph_step", "dp_step")
+
+
+def paged_event(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    The event as sent to a client that pages through the stored trace:
+    None for per-step events, bulky step lists dropped elsewhere.
+    """
+    stage, payload = event["stage"], event["payload"]
+    if stage in _STEP_STAGES:
+        return None
+    if stage == "recursion":
+        return stage_event(stage, {"tree": payload["tree"], "events": None})
+    if stage == "done" and payload.get("trace_id"):
+        dp = dict(payload["dp"], steps=None)
+        return stage_event(stage, dict(payload, dp=dp))
+    return event
+
+
+def extract_top_level_call_args(code: str, func_name: str):
+    """
+    Literal args of the first top-level call of func_name, e.g.
+    fib(10) -> [10], bfs(graph, "A") -> [{...}, "A"], solve([-1, 2]) -> [[-1, 2]].
+    Calls inside function bodies (return fib(...)) are ignored.
+    """
+    return call_args_for(code, func_name)
+
+
+def _complexity_brief(complexity):
+    """The fitted class only: raw timings add nothing to the explanation."""
+    if not complexity or "error" in complexity:
+        return None
+    keys = ("entry", "best", "confidence_label", "exponent", "stop_reason")
+    return {k: complexity.get(k) for k in keys}
+
+
+def iter_pipeline(
+    code: str, user_input: str = "", complexity: Optional[bool] = None, paged: bool = False
+) -> Iterator[Dict[str, Any]]:
+    """
+    The full analysis pipeline as a plain generator of {"stage", "payload"} events.
+    Shared by the SSE route and the background job runner, so it knows
+    nothing about HTTP: every stage is computed lazily on next().
+    Runtime steps are also recorded in the trace store under the pipeline
+    key; a "trace" event before "done" tells the client where to page them.
+    complexity: run the empirical complexity stage (None: server default).
+    paged: the consumer reads steps from the trace store (see paged_event).
+    When the trace is already stored, the step tracers are not run again:
+    no per-step events are produced and the recursion tree, final DP table
+    and explanation summary come from the stored index.
+    """
+    complexity = complexity_requested(complexity)
+    trace_writer = get_trace_store().writer(pipeline_key(code, user_input, complexity))
+    replay = (trace_writer.existing or {}).get("replay") if paged else None
+    try:
+        # ---------- STAGE 1: classification ----------
+        classification = classify_code(code)
+        topic = classification.get("topic", "unknown")
+
+        yield stage_event("classification", classification)
+        # summary metadata stored with the trace
+        trace_meta = {"topic": topic}
+        if replay is not None and trace_writer.existing["summary"].get("topic") != topic:
+            replay = None
+
+        # ---------- STAGE 2: runtime (array/string/pointer) ----------
+        runtime = {}
+        analysis = {}
+        if topic in ["array", "pointer"]:
+            yield stage_event("runtime_start", {"why": "array/pointer detected"})
+            # the trace worker's run doubles as the runtime result
+            analysis = analyze_array_code(code, stdin=user_input)
+            runtime = traced_runtime(analysis, code, user_input)
+            yield stage_event("runtime", runtime)
+            yield stage_event("analysis", analysis)
+        elif topic == "string":
+            yield stage_event("runtime_start", {"why": "string detected"})
+            analysis = analyze_string_code(code, stdin=user_input)
+            runtime = traced_runtime(analysis, code, user_input)
+            yield stage_event("runtime", runtime)
+            yield stage_event("analysis", analysis)
+        # ---------- GRAPH ANALYSIS (optional) ----------
+        elif topic == "graph_bfs":
+            yield stage_event("graph_start", {"algo": "bfs"})
+
+            bfs_events = trace_graph_runtime(code) if replay is None else ()
+
+            for step in bfs_events:
+                trace_writer.append("graph_step", step)
+                yield stage_event("graph_step", step)
+        elif topic == "graph_dfs":
+            yield stage_event("graph_start", {"algo": "dfs"})
+
+            dfs_events = trace_dfs_runtime(code) if replay is None else ()
+
+            for step in dfs_events:
+                trace_writer.append("graph_step", step)
+                yield stage_event("graph_step", step)
+
+        else:
+            # for unknown topics we still tell the client
+            yield stage_event("runtime_skipped", {"reason": "topic not runtime-type"})
+
+        # ---------- STAGE 3: recursion simulation ----------
+        recursion_tree = None
+        if topic == "recursion":
+            yield stage_event("recursion_start", {})
+            # entry function + literal args of its top-level call;
+            # [4] only if the user never called it with literal args
+            entry_func, rec_args = find_entry_call(code, default_args=[4])
+            trace_meta.update(entry=entry_func, args=rec_args)
+
+            if replay is not None:
+                recursion_tree = replay["recursion_tree"]
+                yield stage_event("recursion", {"events": None, "tree": recursion_tree})
+            else:
+                trace = trace_recursion_runtime(code, entry_func, rec_args)
+                if "data" in trace and "events" in trace["data"]:
+                    events = trace["data"]["events"]
+                    recursion_tree = build_recursion_tree(events)
+                    trace_writer.extend("recursion_event", events)
+                    yield stage_event("recursion", {"events": events, "tree": recursion_tree})
+                else:
+                    yield stage_event("recursion_error", trace)
+
+        # ---------- STAGE 4: DP LIVE SIMULATION ----------
+        dp_out = {
+            "steps": [],
+            "final_table": None
+        }
+
+        if replay is not None and topic in ("dp", "dp_topdown", "dp_bottomup"):
+            # the steps are in the trace store; the client pages them
+            dp_out = {"steps": None, "final_table": replay["dp_final_table"]}
+
+        if topic in ("dp", "dp_topdown"):
+            yield stage_event("dp_start", {"mode": "top_down"})
+
+            # [10] is the absolute safety fallback when no literal call exists
+            entry_func, dp_args = find_entry_call(code, default_args=[10])
+            trace_meta.update(entry=entry_func, args=dp_args)
+
+            dp_events = trace_dp_runtime(code, entry_func, dp_args) if replay is None else ()
+
+            for step in dp_events:
+                dp_out["steps"].append(step)
+
+                if step["type"] == "dp_update":
+                    dp_out["final_table"] = step["table"]
+
+                trace_writer.append("dp_step", step)
+                yield stage_event("dp_step", step)
+        elif topic == "dp_bottomup":
+            yield stage_event("dp_start", {"mode": "bottom_up"})
+
+            dp_events = trace_dp_bottomup_runtime(code) if replay is None else ()
+
+            for step in dp_events:
+                dp_out["steps"].append(step)
+                dp_out["final_table"] = step.get("table")
+
+                trace_writer.append("dp_step", step)
+                yield stage_event("dp_step", step)
+        else:
+            yield stage_event("dp_skipped", {"reason": "topic not dp"})
+
+        # ---------- STAGE 5: static bug detection ----------
+        issues = debug_code_static(code).get("issues", [])
+        yield stage_event("issues", issues)
+
+        # ---------- STAGE 6: empirical complexity ----------
+        fitted = None
+        if complexity and topic not in ("graph_bfs", "graph_dfs", "dp_bottomup"):
+            yield stage_event("complexity_start", {})
+            fitted = analyze_complexity(code, stdin=user_input)
+            yield stage_event("complexity", fitted)
+
+        # ---------- STAGE 7: teacher explanation (LLM) ----------
+        explanation = None
+        summary = None
+
+        if topic != "graph_dfs" and degraded():
+            # shed the slowest optional stage instead of queueing behind the LLM
+            yield stage_event("explain_skipped", {"reason": "degraded: LLM is overloaded"})
+        elif topic != "graph_dfs":   # 👈 DFS ONLY SKIP
+            yield stage_event("explain_start", {})
+            try:
+                # compress the runtime data to a fixed token budget first
+                # (a replay reuses the summary made from the full steps)
+                summary = (replay or {}).get("summary") or summarize_trace({
+                    "topic": topic,
+                    "classification": classification,
+                    "runtime": runtime,
+                    "analysis": analysis,
+                    "recursion_tree": recursion_tree,
+                    "dp": dp_out,
+                    "issues": issues,
+                    "complexity": _complexity_brief(fitted),
+                })
+                yield stage_event("trace_summary", {k: v for k, v in summary.items() if k != "text"})
+
+                explain_prompt = make_explain_prompt(code, summary["text"])
+                explanation = call_llm(explain_prompt)
+                yield stage_event("explanation", explanation)
+            except Exception as e:
+                yield stage_event("explain_error", {"error": str(e)})
+
+        # ---------- FINAL: done ----------
+        final = {
+            "topic": topic,
+            "classification": classification,
+            "runtime": runtime,
+            "analysis": analysis,
+            "recursion_tree": recursion_tree,
+            "dp": dp_out,
+            "issues": issues,
+            "complexity": fitted,
+        }
+
+        if topic != "graph_dfs" and explanation:
+            final["explanation"] = explanation
+
+        index = trace_writer.commit(trace_meta, replay={
+            "recursion_tree": recursion_tree,
+            "dp_final_table": dp_out["final_table"],
+            "summary": summary,
+        })
+        if index is not None:
+            final["trace_id"] = index["trace_id"]
+            yield stage_event("trace", {k: index[k] for k in ("trace_id", "steps", "kinds", "bytes")})
+
+        yield stage_event("done", final)
+
+    except Exception as exc:
+        # generic error
+        yield stage_event("error", {"error": str(exc)})
+    finally:
+        # abandoned or failed runs leave nothing behind
+        trace_writer.close()
+
+
+_DONE = object()
+
+
+async def aiter_pipeline(
+    code: str, user_input: str = "", complexity: Optional[bool] = None, paged: bool = False
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Async view of iter_pipeline: every stage runs in a worker thread
+    so sandbox runs, tracers and LLM calls never block the event loop.
+    """
+    events = iter_pipeline(code, user_input, complexity, paged)
+    while True:
+        event = await asyncio.to_thread(next, events, _DONE)
+        if event is _DONE:
+            return
+        yield event
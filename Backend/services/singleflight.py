@@ -0,0 +1,84 @@
+# services/singleflight.py
+import asyncio
+import os
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+# set DECAPSULE_SINGLE_FLIGHT=0 to give every request its own pipeline run
+SINGLE_FLIGHT_ENABLED = os.getenv("DECAPSULE_SINGLE_FLIGHT", "1") != "0"
+
+
+class _Flight:
+    """One in-flight computation and the events it has produced so far."""
+
+    def __init__(self):
+        self.events: List[Any] = []
+        self.done = False
+        self.subscribers = 0
+        self.changed = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+
+
+class SingleFlight:
+    """
+    Request coalescing for async event streams.
+    The first subscriber for a key starts the producer; everyone who
+    subscribes while it is still running attaches to the same run and
+    receives every event from the beginning (late joiners replay the buffer).
+    When the last subscriber leaves, the run is cancelled.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def _produce(self, key: str, flight: _Flight, events: AsyncIterator[Any]):
+        try:
+            async for event in events:
+                async with flight.changed:
+                    flight.events.append(event)
+                    flight.changed.notify_all()
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            async with flight.changed:
+                flight.done = True
+                flight.changed.notify_all()
+
+    async def subscribe(self, key: str, factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """
+        Yield the events of the computation identified by key.
+        factory is only called if no identical computation is running.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._produce(key, flight, factory()))
+
+        flight.subscribers += 1
+        sent = 0
+        try:
+            while True:
+                async with flight.changed:
+                    await flight.changed.wait_for(lambda: len(flight.events) > sent or flight.done)
+                    pending = flight.events[sent:]
+                    finished = flight.done
+
+                for event in pending:
+                    yield event
+                sent += len(pending)
+
+                if finished and sent >= len(flight.events):
+                    return
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                # nobody is listening any more: stop after the current stage
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+
+
+pipeline_flights = SingleFlight()
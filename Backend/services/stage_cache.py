@@ -0,0 +1,260 @@
+# services/stage_cache.py
+import functools
+import hashlib
+import json
+import marshal
+import os
+import sqlite3
+import sys
+import threading
+import time
+import types
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from services.workers import WEB_WORKERS, shared_path
+
+# in-memory LRU size (entries, across all stages)
+STAGE_CACHE_SIZE = int(os.getenv("DECAPSULE_STAGE_CACHE_SIZE", "512"))
+
+# optional SQLite file; when set, entries survive restarts.
+# with several workers it defaults to a shared file so they reuse each other's work
+# ("" disables it explicitly)
+STAGE_CACHE_PATH = os.getenv(
+    "DECAPSULE_STAGE_CACHE_PATH",
+    shared_path("decapsule_stage_cache.sqlite3") if WEB_WORKERS > 1 else None
+)
+
+# how long a writer waits for a sibling process holding the SQLite lock
+STAGE_CACHE_BUSY_TIMEOUT = 0.5
+
+# upper bound for the on-disk table (entries)
+STAGE_CACHE_DISK_SIZE = int(os.getenv("DECAPSULE_STAGE_CACHE_DISK_SIZE", "20000"))
+
+_MISSING = object()
+
+# marshal's format can change between interpreter versions, and workers of
+# different versions may share one SQLite file: the tag is part of every key
+_CODEC_TAG = f"marshal{marshal.version}-py{sys.version_info[0]}{sys.version_info[1]}"
+
+
+class StageCache:
+    """
+    Size-bounded LRU of marshal-encoded stage outputs.
+    marshal keeps int dict keys, tuples and sets as they were (a JSON round
+    trip would turn a memo table {3: 2} into {"3": 2}), every hit decodes a
+    fresh copy, and the same bytes can go straight to the optional disk layer.
+    """
+
+    def __init__(self, max_entries: int = STAGE_CACHE_SIZE, path: Optional[str] = STAGE_CACHE_PATH):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+        self._conn = None
+        if path:
+            # workers start together: be patient while creating the table,
+            # then short waits on the request path
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS stage_cache "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(f"PRAGMA busy_timeout = {int(STAGE_CACHE_BUSY_TIMEOUT * 1000)}")
+
+    def _count(self, stage: str, field: str):
+        counters = self.stats.setdefault(stage, {"hits": 0, "misses": 0})
+        counters[field] += 1
+
+    def get(self, stage: str, key: str) -> Any:
+        with self._lock:
+            blob = self._entries.get(key)
+            if blob is not None:
+                self._entries.move_to_end(key)
+            elif self._conn is not None:
+                blob = self._disk_get(key)
+                if blob is not None:
+                    self._remember(key, blob)
+
+            self._count(stage, "hits" if blob is not None else "misses")
+
+        return _MISSING if blob is None else marshal.loads(blob)
+
+    def put(self, key: str, blob: bytes):
+        with self._lock:
+            self._remember(key, blob)
+            if self._conn is not None:
+                self._disk_put(key, blob)
+
+    # the disk layer is best effort: when sibling workers hold the write
+    # lock for too long, we skip the write instead of stalling the request
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        try:
+            row = self._conn.execute("SELECT value FROM stage_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE stage_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.OperationalError:
+            return None
+        return row[0] if row is not None and isinstance(row[0], bytes) else None
+
+    def _disk_put(self, key: str, blob: bytes):
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO stage_cache (key, value, accessed_at) VALUES (?, ?, ?)",
+                (key, sqlite3.Binary(blob), time.time())
+            )
+            self._puts += 1
+            if self._puts % 64 == 0:
+                self._trim_disk()
+        except sqlite3.OperationalError:
+            pass
+
+    def preload(self, limit: Optional[int] = None) -> int:
+        """Pull the most recently used disk entries into memory. Returns the count."""
+        if self._conn is None:
+            return 0
+        limit = self.max_entries if limit is None else min(limit, self.max_entries)
+        try:
+            rows = self._conn.execute(
+                "SELECT key, value FROM stage_cache ORDER BY accessed_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        except sqlite3.OperationalError:
+            return 0
+        # JSON text rows from older versions are never looked up again; the trim drops them
+        rows = [(key, blob) for key, blob in rows if isinstance(blob, bytes)]
+        with self._lock:
+            # oldest first, so the most recent entries end up at the LRU's hot end
+            for key, blob in reversed(rows):
+                if key not in self._entries:
+                    self._remember(key, blob)
+        return len(rows)
+
+    def _remember(self, key: str, blob: bytes):
+        self._entries[key] = blob
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _trim_disk(self):
+        self._conn.execute(
+            "DELETE FROM stage_cache WHERE key IN ("
+            "SELECT key FROM stage_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (STAGE_CACHE_DISK_SIZE,)
+        )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM stage_cache")
+
+
+stage_cache = StageCache()
+
+
+# sources under this directory count as engine dependencies
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _project_file(path: Any) -> Optional[str]:
+    if not isinstance(path, str) or not path.endswith(".py"):
+        return None
+    path = os.path.abspath(path)
+    return path if path.startswith(_PROJECT_ROOT + os.sep) and os.path.isfile(path) else None
+
+
+def _dependency_files(module_name: str) -> Dict[str, None]:
+    """
+    Source files an engine module depends on: the module itself, the project
+    modules it imports (directly or through them), and the worker scripts it
+    names in module-level constants (e.g. _WORKER_PATH) to run in a subprocess.
+    """
+    files: Dict[str, None] = {}
+    seen = set()
+    pending = [module_name]
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        module = sys.modules.get(name)
+        path = _project_file(getattr(module, "__file__", None))
+        if path is None:
+            continue
+        files[path] = None
+        for value in list(vars(module).values()):
+            if isinstance(value, types.ModuleType):
+                pending.append(value.__name__)
+            elif isinstance(value, str):
+                worker = _project_file(value)
+                if worker is not None:
+                    files[worker] = None
+            else:
+                owner = getattr(value, "__module__", None)
+                if isinstance(owner, str):
+                    pending.append(owner)
+    return files
+
+
+def _module_fingerprint(func: Callable) -> str:
+    """
+    Hash of the engine's source file and everything it depends on
+    (_dependency_files), so editing an engine, a helper module it imports or
+    the worker script it runs invalidates its entries.
+    """
+    __import__(func.__module__, fromlist=["__name__"])
+    files = _dependency_files(func.__module__)
+    if not files:
+        return "nosource"
+    digest = hashlib.sha1()
+    try:
+        for path in sorted(files):
+            with open(path, "rb") as f:
+                digest.update(os.path.relpath(path, _PROJECT_ROOT).encode("utf-8"))
+                digest.update(f.read())
+    except OSError:
+        return "nosource"
+    return digest.hexdigest()[:12]
+
+
+def cached_stage(name: str, version: str = "1", cacheable: Optional[Callable[[Any], bool]] = None):
+    """
+    Memoize a deterministic engine function.
+    - name: stage name used for stats and the cache key
+    - version: bump by hand when the meaning of the output changes; edits to
+      the engine's sources and its dependencies are picked up on their own
+    - cacheable: optional predicate; results it rejects (e.g. timeouts) are not stored
+    The effective version key is name + version + dependency source hash + codec.
+    """
+    def decorator(func: Callable) -> Callable:
+        version_key = f"{name}:{version}:{_module_fingerprint(func)}:{_CODEC_TAG}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                raw = json.dumps([version_key, args, kwargs], sort_keys=True, default=repr)
+            except (TypeError, ValueError):
+                return func(*args, **kwargs)
+            key = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+            cached = stage_cache.get(name, key)
+            if cached is not _MISSING:
+                return cached
+
+            result = func(*args, **kwargs)
+            if cacheable is not None and not cacheable(result):
+                return result
+            try:
+                stage_cache.put(key, marshal.dumps(result))
+            except ValueError:
+                pass  # outputs holding objects marshal can't encode are simply not cached
+            return result
+
+        wrapper.version_key = version_key
+        return wrapper
+
+    return decorator
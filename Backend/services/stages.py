@@ -0,0 +1,96 @@
+# services/stages.py
+# Pipeline views of the engines:
+# - deterministic engines are memoized (pure functions of code + args);
+#   LLM calls and plain sandbox runs (time / randomness) stay uncached
+# - every expensive call runs inside its admission pool; cache hits don't
+#   take a slot because the pool wraps the uncached function
+# - cache keys hash each engine's sources together with the project modules
+#   it imports and the worker scripts it runs (services/stage_cache.py)
+from engines.classifier import classify_code as _classify_code
+from engines.recursion_engine import trace_recursion_runtime as _trace_recursion_runtime
+from engines.dp_engine import simulate_lis_dp as _simulate_lis_dp, simulate_lis_patience as _simulate_lis_patience
+from engines.debugger import debug_code_static as _debug_code_static
+from engines.dp_runtime_tracer import trace_dp_runtime as _trace_dp_runtime
+from engines.dp_bottomup_runtime_tracer import trace_dp_bottomup_runtime as _trace_dp_bottomup_runtime
+from engines.graph_runtime_tracer import trace_graph_runtime as _trace_graph_runtime
+from engines.graph_dfs_runtime_tracer import trace_dfs_runtime as _trace_dfs_runtime
+from engines.array_engine import analyze_array_code as _analyze_array_code
+from engines.string_engine import analyze_string_code as _analyze_string_code
+from engines.complexity_engine import analyze_complexity as _analyze_complexity
+
+from ml import groq_client
+from sandbox import sandbox_runner
+
+from services.admission import pooled, pools
+from services.stage_cache import cached_stage
+
+
+def _recursion_trace_ok(result) -> bool:
+    # timeouts depend on machine load, never pin them in the cache
+    return result.get("error") not in ("timeout", "execution_failed")
+
+
+def _runtime_analysis_ok(result) -> bool:
+    # array/string engines fall back to static analysis and keep the trace error
+    return _recursion_trace_ok(result.get("runtime_error") or {})
+
+
+classify_code = cached_stage("classify_code")(_classify_code)
+# the recursion tracer spawns a subprocess, so it shares the sandbox pool
+trace_recursion_runtime = cached_stage("trace_recursion_runtime", cacheable=_recursion_trace_ok)(
+    pooled("sandbox")(_trace_recursion_runtime)
+)
+trace_dp_runtime = cached_stage("trace_dp_runtime")(pooled("tracer")(_trace_dp_runtime))
+trace_dp_bottomup_runtime = cached_stage("trace_dp_bottomup_runtime")(pooled("tracer")(_trace_dp_bottomup_runtime))
+trace_graph_runtime = cached_stage("trace_graph_runtime", version="2")(pooled("tracer")(_trace_graph_runtime))
+trace_dfs_runtime = cached_stage("trace_dfs_runtime", version="2")(pooled("tracer")(_trace_dfs_runtime))
+# runs the snippet in the array trace worker (a subprocess): sandbox pool
+analyze_array_code = cached_stage("analyze_array_code", version="1", cacheable=_runtime_analysis_ok)(
+    pooled("sandbox")(_analyze_array_code)
+)
+# same for the string trace worker
+analyze_string_code = cached_stage("analyze_string_code", version="3", cacheable=_runtime_analysis_ok)(
+    pooled("sandbox")(_analyze_string_code)
+)
+# timings depend on the machine, but the fitted class is what gets reused
+analyze_complexity = cached_stage("analyze_complexity", version="1", cacheable=_recursion_trace_ok)(
+    pooled("sandbox")(_analyze_complexity)
+)
+simulate_lis_dp = cached_stage("simulate_lis_dp")(_simulate_lis_dp)
+simulate_lis_patience = cached_stage("simulate_lis_patience")(_simulate_lis_patience)
+debug_code_static = cached_stage("debug_code_static", version="2")(_debug_code_static)
+
+
+def run_in_sandbox(code: str, stdin: str, watchdog: bool = None, profile: bool = False, exact: bool = False):
+    with pools["sandbox"].slot():
+        return sandbox_runner.run_in_sandbox(code, stdin, watchdog, profile, exact)
+
+
+def traced_runtime(analysis: dict, code: str, stdin: str) -> dict:
+    """
+    The `runtime` result (stdout / stderr / exit_code, like run_in_sandbox)
+    of a program an array or string trace worker has already run: its
+    captured stdout and exception are reused instead of running it again.
+    The sandbox only runs the code when the worker could not.
+    """
+    if analysis.get("mode") != "runtime":
+        if (analysis.get("runtime_error") or {}).get("error") == "timeout":
+            return {"error": "Timeout: infinite loop detected"}
+        return run_in_sandbox(code, stdin)
+
+    exception = analysis.get("exception")
+    stderr, exit_code = "", 0
+    if exception is not None:
+        message = exception["message"]
+        if exception["type"] != "SystemExit":
+            stderr, exit_code = f"line {exception['line']}: {exception['type']}: {message}\n", 1
+        elif message.lstrip("-").isdigit():
+            exit_code = int(message)
+        elif message not in ("", "None"):
+            stderr, exit_code = message + "\n", 1
+    return {"stdout": analysis.get("stdout", ""), "stderr": stderr, "exit_code": exit_code, "traced": True}
+
+
+def call_llm(prompt: str, json_mode: bool = False):
+    with pools["llm"].slot():
+        return groq_client.call_groq(prompt, json_mode)
@@ -0,0 +1,293 @@
+# services/trace_store.py
+# On-disk store for runtime traces (recursion events, DP steps, graph steps,
+# execution steps), so clients page through a trace with GET /trace/{id}
+# instead of receiving it whole, and a reload never re-runs the tracers.
+#
+# One directory per trace under TRACE_DIR:
+#   seg-000000.ndjson.gz   gzip'ed NDJSON, one {"kind", "data"} step per line,
+#   seg-000001.ndjson.gz   TRACE_SEGMENT_STEPS steps per segment
+#   index.json             steps, per-kind counts, segment table, summary
+# A writer fills a private temp directory and renames it into place after
+# index.json is written, so a trace is either complete or absent, and two
+# workers recording the same trace never see each other's partial files.
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from services.workers import shared_path
+
+# traces live next to the other shared files, so every worker can serve them
+TRACE_DIR = os.getenv("DECAPSULE_TRACE_DIR", shared_path("decapsule_traces"))
+
+# steps per compressed segment: a range read decompresses only its segments
+TRACE_SEGMENT_STEPS = int(os.getenv("DECAPSULE_TRACE_SEGMENT_STEPS", "500"))
+
+# traces older than this are purged on startup
+TRACE_TTL_SECONDS = int(os.getenv("DECAPSULE_TRACE_TTL", str(24 * 3600)))
+
+# and again by each worker at most this often (seconds), after a commit
+TRACE_PURGE_INTERVAL = int(os.getenv("DECAPSULE_TRACE_PURGE_INTERVAL", "3600"))
+
+# most steps one range request returns
+TRACE_MAX_RANGE = int(os.getenv("DECAPSULE_TRACE_MAX_RANGE", "1000"))
+
+# decompressed segments kept in memory for repeated page reads
+_SEGMENT_CACHE_SIZE = 32
+
+_TRACE_ID = re.compile(r"^[0-9a-f]{16,64}$")
+
+INDEX_FILE = "index.json"
+
+
+def valid_trace_id(trace_id: str) -> bool:
+    return bool(_TRACE_ID.match(trace_id))
+
+
+def trace_key(*parts: Any) -> str:
+    """Trace id derived from what produced the trace, so a rerun finds it stored."""
+    raw = json.dumps(parts, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TraceWriter:
+    """
+    Appends steps of one trace; commit() publishes it. Only the current
+    segment is held in memory. A writer for a trace that is already stored
+    records nothing, and commit() returns the stored index.
+    """
+
+    def __init__(self, store: "TraceStore", trace_id: str):
+        self.store = store
+        self.trace_id = trace_id
+        self.existing = store.get_index(trace_id)
+        self.tmp_dir: Optional[str] = None
+        self.buffer: List[str] = []
+        self.segments: List[Dict[str, Any]] = []
+        self.kinds: Dict[str, int] = {}
+        self.segment_kinds: Dict[str, int] = {}
+        self.steps = 0
+        self.raw_bytes = 0
+        self.closed = False
+
+    def append(self, kind: str, step: Any):
+        if self.existing is not None or self.closed:
+            return
+        self.buffer.append(json.dumps({"kind": kind, "data": step}, ensure_ascii=False, default=str))
+        self.kinds[kind] = self.kinds.get(kind, 0) + 1
+        self.segment_kinds[kind] = self.segment_kinds.get(kind, 0) + 1
+        self.steps += 1
+        if len(self.buffer) >= TRACE_SEGMENT_STEPS:
+            self._flush()
+
+    def extend(self, kind: str, steps: Iterable[Any]):
+        for step in steps:
+            self.append(kind, step)
+
+    def _flush(self):
+        if not self.buffer:
+            return
+        if self.tmp_dir is None:
+            os.makedirs(self.store.root, exist_ok=True)
+            self.tmp_dir = os.path.join(self.store.root, f".{self.trace_id}.{uuid.uuid4().hex[:8]}.tmp")
+            os.makedirs(self.tmp_dir)
+        name = f"seg-{len(self.segments):06d}.ndjson.gz"
+        raw = ("\n".join(self.buffer) + "\n").encode("utf-8")
+        path = os.path.join(self.tmp_dir, name)
+        # level 6: most of the size win of 9 at a fraction of the CPU
+        with gzip.open(path, "wb", compresslevel=6) as f:
+            f.write(raw)
+        self.segments.append({
+            "file": name,
+            "first": self.steps - len(self.buffer),
+            "count": len(self.buffer),
+            "kinds": self.segment_kinds,
+            "bytes": os.path.getsize(path),
+        })
+        self.raw_bytes += len(raw)
+        self.buffer = []
+        self.segment_kinds = {}
+
+    def commit(
+        self, summary: Optional[Dict[str, Any]] = None, replay: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Publish the trace; returns its index (None when no step was recorded).
+        replay: what a producer needs to answer a rerun without its steps;
+        kept in the index but not shown by GET /trace/{id}.
+        """
+        if self.existing is not None:
+            return self.existing
+        if self.closed:
+            return None
+        self._flush()
+        self.closed = True
+        if not self.segments:
+            return None
+        index = {
+            "trace_id": self.trace_id,
+            "created_at": time.time(),
+            "steps": self.steps,
+            "kinds": self.kinds,
+            "bytes": sum(s["bytes"] for s in self.segments),
+            "raw_bytes": self.raw_bytes,
+            "segment_steps": TRACE_SEGMENT_STEPS,
+            "segments": self.segments,
+            "summary": summary or {},
+        }
+        if replay is not None:
+            index["replay"] = replay
+        with open(os.path.join(self.tmp_dir, INDEX_FILE), "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        try:
+            os.rename(self.tmp_dir, self.store.path(self.trace_id))
+        except OSError:
+            # another worker published the same trace first
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
+            return self.store.get_index(self.trace_id)
+        self.store.purge_if_due()
+        return index
+
+    def close(self):
+        """Drop an uncommitted trace (the producer failed or was abandoned)."""
+        if not self.closed:
+            self.closed = True
+            if self.tmp_dir is not None:
+                shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+class TraceStore:
+    def __init__(self, root: str = TRACE_DIR):
+        self.root = root
+        self._segments: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_purge = time.monotonic()
+
+    def path(self, trace_id: str) -> str:
+        return os.path.join(self.root, trace_id)
+
+    def writer(self, trace_id: str) -> TraceWriter:
+        return TraceWriter(self, trace_id)
+
+    def get_index(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        if not valid_trace_id(trace_id):
+            return None
+        try:
+            with open(os.path.join(self.path(trace_id), INDEX_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _segment_lines(self, trace_id: str, name: str) -> List[str]:
+        key = f"{trace_id}/{name}"
+        with self._lock:
+            lines = self._segments.get(key)
+            if lines is not None:
+                self._segments.move_to_end(key)
+                return lines
+        with gzip.open(os.path.join(self.path(trace_id), name), "rt", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        with self._lock:
+            self._segments[key] = lines
+            while len(self._segments) > _SEGMENT_CACHE_SIZE:
+                self._segments.popitem(last=False)
+        return lines
+
+    def get_steps(
+        self,
+        index: Dict[str, Any],
+        start: int = 0,
+        count: int = 100,
+        kind: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Steps [start, start + count) as {"i", "kind", "data"}. With `kind`,
+        positions count only steps of that kind and `i` stays the position
+        in the whole trace. Only the segments covering the range are read.
+        """
+        count = max(0, min(count, TRACE_MAX_RANGE))
+        start = max(0, start)
+        out: List[Dict[str, Any]] = []
+        seen = 0  # steps matching `kind` in the segments before this one
+        for segment in index["segments"]:
+            if len(out) >= count:
+                break
+            in_segment = segment["count"] if kind is None else segment["kinds"].get(kind, 0)
+            if seen + in_segment <= start:
+                seen += in_segment
+                continue
+            lines = self._segment_lines(index["trace_id"], segment["file"])
+            for offset, line in enumerate(lines):
+                step = json.loads(line)
+                if kind is not None and step["kind"] != kind:
+                    continue
+                if seen >= start:
+                    out.append({"i": segment["first"] + offset, **step})
+                    if len(out) >= count:
+                        break
+                seen += 1
+        return out
+
+    def purge_expired(self, ttl: int = TRACE_TTL_SECONDS) -> int:
+        """Delete traces older than ttl and temp directories of dead writers."""
+        cutoff = time.time() - ttl
+        removed = 0
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return 0
+        for name in names:
+            path = os.path.join(self.root, name)
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            # a temp dir an hour old belongs to a crashed writer
+            stale_tmp = name.endswith(".tmp") and mtime < time.time() - 3600
+            if mtime < cutoff or stale_tmp:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        with self._lock:
+            self._segments.clear()
+        return removed
+
+    def purge_if_due(self):
+        """Purge in the background when this worker last did so TRACE_PURGE_INTERVAL ago."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_purge < TRACE_PURGE_INTERVAL:
+                return
+            self._last_purge = now
+        threading.Thread(target=self.purge_expired, name="trace-purge", daemon=True).start()
+
+
+def record_trace(
+    trace_id: str, kind: str, steps: Iterable[Any], summary: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """Store a finished list of steps in one go; returns the trace index."""
+    writer = get_trace_store().writer(trace_id)
+    try:
+        writer.extend(kind, steps)
+        return writer.commit(summary)
+    finally:
+        writer.close()
+
+
+_store: Optional[TraceStore] = None
+_store_lock = threading.Lock()
+
+
+def get_trace_store() -> TraceStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = TraceStore()
+    return _store
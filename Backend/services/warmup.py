@@ -0,0 +1,68 @@
+# services/warmup.py
+# Startup work, run from the FastAPI lifespan before a worker accepts traffic:
+# - once per boot (the leader worker): purge expired jobs and traces and orphaned
+#   user-code temp files, resume pending ones
+# - every worker: pull hot stage-cache entries into memory, load the /analyze
+#   topic model, run the static engines and one sandbox process so the first
+#   real request isn't the slow one
+import os
+import time
+from typing import Any, Dict
+
+from ml.topic_model import load_topic_model
+from services.job_runner import resume_pending_jobs
+from services.stage_cache import stage_cache
+from services.trace_store import get_trace_store
+from sandbox.sandbox_runner import purge_orphan_code_files
+from services.workers import boot_leader
+
+# "0" skips the per-worker warm-up (one-time boot work still runs)
+WARMUP_ENABLED = os.getenv("DECAPSULE_WARMUP", "1") == "1"
+
+# build the Groq client before ready; costs ~the SDK import time at startup
+WARMUP_LLM = os.getenv("DECAPSULE_WARMUP_LLM", "0") == "1"
+
+WARMUP_SNIPPET = """
+def fib(n):
+    if n <= 1:
+        return n
+    return fib(n - 1) + fib(n - 2)
+
+print(fib(5))
+"""
+
+
+def _timed(timings: Dict[str, float], name: str, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    timings[name] = round((time.perf_counter() - start) * 1000, 2)
+    return result
+
+
+def warm_up() -> Dict[str, Any]:
+    """Run the startup work. Returns what was done and how long it took (ms)."""
+    # stages is imported here so it also picks up engines patched by the bench app
+    from services import stages
+    from ml.groq_client import get_client
+
+    timings: Dict[str, float] = {}
+    report: Dict[str, Any] = {"pid": os.getpid(), "timings_ms": timings}
+
+    with boot_leader() as leader:
+        report["leader"] = leader
+        if leader:
+            report["resumed_jobs"] = _timed(timings, "resume_jobs", resume_pending_jobs)
+            report["purged_traces"] = _timed(timings, "purge_traces", get_trace_store().purge_expired)
+            report["purged_code_files"] = _timed(timings, "purge_code_files", purge_orphan_code_files)
+
+    if not WARMUP_ENABLED:
+        return report
+
+    report["preloaded_cache_entries"] = _timed(timings, "stage_cache", stage_cache.preload)
+    report["topic_model"] = _timed(timings, "topic_model", load_topic_model) is not None
+    _timed(timings, "classify_code", stages.classify_code, WARMUP_SNIPPET)
+    _timed(timings, "debug_code_static", stages.debug_code_static, WARMUP_SNIPPET)
+    _timed(timings, "sandbox", stages.run_in_sandbox, WARMUP_SNIPPET, "")
+    if WARMUP_LLM:
+        _timed(timings, "llm_client", get_client)
+    return report
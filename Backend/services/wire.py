@@ -0,0 +1,209 @@
+# services/wire.py
+# Negotiated wire formats for the large analysis payloads.
+#
+# Body encoding (`?encoding=` or the Accept header):
+#   json      application/json, the default
+#   columnar  application/vnd.decapsule.columnar+json: lists of same-shaped dicts
+#             (DP steps, graph steps, recursion events) is sent as one array
+#             per key, so "type", "table", "queue" ... appear once per list
+#   msgpack   application/msgpack, when the msgpack package is installed
+# Content coding (Accept-Encoding), for responses >= COMPRESS_MIN_BYTES:
+#   br (when the brotli package is installed), then gzip
+# SSE streams get the same coding as one compressed stream flushed after
+# every frame: each event still reaches the client immediately, and keys
+# repeated across events compress against the frames before them.
+import gzip
+import json
+import os
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+try:
+    import msgpack
+except ImportError:  # optional: msgpack is only offered when installed
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# smaller bodies are sent uncompressed: the framing costs more than it saves
+COMPRESS_MIN_BYTES = int(os.getenv("DECAPSULE_COMPRESS_MIN_BYTES", "1024"))
+# "0" sends SSE streams uncompressed whatever the client accepts
+SSE_COMPRESSION = os.getenv("DECAPSULE_SSE_COMPRESSION", "1") != "0"
+# gzip 6 / brotli 5: most of the size win for a fraction of the top levels' CPU;
+# a lower gzip level trades bytes for CPU on very large DP table streams
+GZIP_LEVEL = int(os.getenv("DECAPSULE_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = 5
+
+# lists shorter than this stay as they are
+COLUMNAR_MIN_ROWS = 4
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "columnar": "application/vnd.decapsule.columnar+json",
+    "msgpack": "application/msgpack",
+}
+
+
+def available_encodings() -> List[str]:
+    return [name for name in MEDIA_TYPES if name != "msgpack" or msgpack is not None]
+
+
+def available_codings() -> List[str]:
+    return (["br"] if brotli is not None else []) + ["gzip"]
+
+
+# ---------- columnar form ----------
+
+def to_columnar(value: Any) -> Any:
+    """
+    Lists of at least COLUMNAR_MIN_ROWS dicts that all have the same keys
+    become {"__columnar__": rows, "columns": {key: [values]}}. Mixed-shape
+    lists (e.g. memo tables that grow step by step) stay rows: filling their
+    gaps costs more than the repeated keys. Applied recursively, also inside
+    columns; from_columnar() reverses it.
+    """
+    if isinstance(value, dict):
+        return {k: to_columnar(v) for k, v in value.items()}
+    if isinstance(value, list):
+        if len(value) >= COLUMNAR_MIN_ROWS and _same_keys(value):
+            keys = list(value[0])
+            return {
+                "__columnar__": len(value),
+                "columns": {key: to_columnar([row[key] for row in value]) for key in keys},
+            }
+        return [to_columnar(v) for v in value]
+    return value
+
+
+def _same_keys(rows: List[Any]) -> bool:
+    first = rows[0]
+    if type(first) is not dict:
+        return False
+    keys = first.keys()
+    return all(type(row) is dict and row.keys() == keys for row in rows)
+
+
+def from_columnar(value: Any) -> Any:
+    if isinstance(value, list):
+        return [from_columnar(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if "__columnar__" not in value:
+        return {k: from_columnar(v) for k, v in value.items()}
+    rows: List[Dict[str, Any]] = [{} for _ in range(value["__columnar__"])]
+    for key, column in value["columns"].items():
+        for row, item in zip(rows, from_columnar(column)):
+            row[key] = item
+    return rows
+
+
+# ---------- negotiation ----------
+
+def negotiate_encoding(request: Request, streaming: bool = False) -> str:
+    """`?encoding=` first, then the Accept header; json when nothing matches."""
+    allowed = [e for e in available_encodings() if not (streaming and e == "msgpack")]
+    asked = request.query_params.get("encoding")
+    if asked in allowed:
+        return asked
+    accept = request.headers.get("accept", "")
+    for name in ("msgpack", "columnar"):
+        if name in allowed and MEDIA_TYPES[name] in accept:
+            return name
+    return "json"
+
+
+def negotiate_coding(request: Request) -> Optional[str]:
+    """br or gzip from Accept-Encoding (q=0 excludes), or None."""
+    accepted = {}
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    for coding in available_codings():
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+# ---------- encoding ----------
+
+def encode_body(payload: Any, encoding: str = "json") -> bytes:
+    if encoding == "columnar":
+        payload = to_columnar(payload)
+    elif encoding == "msgpack":
+        return msgpack.packb(payload, default=str)
+    # same compact form as FastAPI's JSONResponse
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def encoded_response(request: Request, payload: Any) -> Response:
+    """A negotiated-encoding, negotiated-coding response for a JSON-able payload."""
+    encoding = negotiate_encoding(request)
+    body = encode_body(payload, encoding)
+    headers = {"Vary": "Accept, Accept-Encoding", "X-Decapsule-Encoding": encoding}
+    coding = negotiate_coding(request)
+    if coding is not None and len(body) >= COMPRESS_MIN_BYTES:
+        body = compress(body, coding)
+        headers["Content-Encoding"] = coding
+    return Response(body, media_type=MEDIA_TYPES[encoding], headers=headers)
+
+
+class FrameCompressor:
+    """One compressed stream, flushed at every frame boundary."""
+
+    def __init__(self, coding: str):
+        self.coding = coding
+        if coding == "br":
+            self._br = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            # wbits 31: gzip header and trailer
+            self._z = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def frame(self, data: bytes) -> bytes:
+        if self.coding == "br":
+            return self._br.process(data) + self._br.flush()
+        return self._z.compress(data) + self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.coding == "br":
+            return self._br.finish()
+        return self._z.flush(zlib.Z_FINISH)
+
+
+async def _compressed_frames(frames: AsyncIterator[str], coding: str) -> AsyncIterator[bytes]:
+    compressor = FrameCompressor(coding)
+    try:
+        async for frame in frames:
+            yield compressor.frame(frame.encode("utf-8"))
+    finally:
+        # the generator's own cleanup (e.g. leaving a shared run) runs first
+        await frames.aclose()
+    yield compressor.finish()
+
+
+def sse_response(request: Request, frames: AsyncIterator[str], encoding: str = "json") -> StreamingResponse:
+    """text/event-stream response, compressed per frame when the client accepts it."""
+    headers = {"Vary": "Accept, Accept-Encoding", "X-Decapsule-Encoding": encoding}
+    coding = negotiate_coding(request) if SSE_COMPRESSION else None
+    if coding is not None:
+        headers["Content-Encoding"] = coding
+        frames = _compressed_frames(frames, coding)
+    return StreamingResponse(frames, media_type="text/event-stream", headers=headers)
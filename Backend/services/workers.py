@@ -0,0 +1,134 @@
+# services/workers.py
+# Coordination between uvicorn worker processes on one machine:
+# - WEB_WORKERS: how many processes share the machine (uvicorn --workers)
+# - ProcessSlots: machine-wide semaphore built on flock'ed lock files
+# - boot_leader(): tells the first worker of a fresh boot to run one-time startup work
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, run as a single worker
+    fcntl = None
+
+# same variable the Procfile passes to uvicorn --workers
+WEB_WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+# directory for lock files and shared SQLite files
+SHARED_DIR = os.getenv("DECAPSULE_SHARED_DIR", tempfile.gettempdir())
+
+# how often a waiting process re-checks the slot files
+SLOT_POLL_INTERVAL = 0.01
+
+
+def shared_path(filename: str) -> str:
+    return os.path.join(SHARED_DIR, filename)
+
+
+class ProcessSlots:
+    """
+    Counting semaphore shared by every process on the machine.
+    Slot i is an exclusive flock on <name>.<i>.lock. The kernel drops the
+    lock when a process dies, so a crashed worker never leaks a slot.
+    """
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self._local = threading.local()
+        self._paths = [shared_path(f"decapsule_{name}.{i}.lock") for i in range(limit)]
+
+    def _try_acquire(self) -> Optional[int]:
+        for path in self._paths:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except OSError:
+                os.close(fd)
+        return None
+
+    def acquire(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            fd = self._try_acquire()
+            if fd is not None:
+                self._local.fd = fd
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(SLOT_POLL_INTERVAL)
+
+    def release(self):
+        fd = self._local.fd
+        self._local.fd = None
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def in_use(self) -> int:
+        """Slots currently held by any process (best effort snapshot)."""
+        busy = 0
+        for path in self._paths:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            except OSError:
+                busy += 1
+            finally:
+                os.close(fd)
+        return busy
+
+    @contextmanager
+    def slot(self, timeout: float):
+        if not self.acquire(timeout):
+            raise TimeoutError(f"no free {self.name} slot")
+        try:
+            yield
+        finally:
+            self.release()
+
+
+def process_slots(name: str, limit: int) -> Optional[ProcessSlots]:
+    """Machine-wide slots when several workers run and flock is available."""
+    if fcntl is None or WEB_WORKERS <= 1 or limit <= 0:
+        return None
+    return ProcessSlots(name, limit)
+
+
+_boot_fd: Optional[int] = None
+
+
+@contextmanager
+def boot_leader():
+    """
+    Yields True in exactly one worker per boot: the first process to start
+    while no sibling is alive. That worker holds the boot file exclusively
+    until its block ends; every worker then keeps a shared lock on it for
+    its lifetime, so a worker respawned next to live siblings gets False
+    and does not redo startup work (e.g. re-queue jobs they are running).
+    """
+    global _boot_fd
+    if fcntl is None or _boot_fd is not None:
+        yield fcntl is None
+        return
+
+    fd = os.open(shared_path("decapsule_boot.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        leader = True
+    except OSError:
+        # a sibling is alive; wait until the leader has finished its startup
+        fcntl.flock(fd, fcntl.LOCK_SH)
+        leader = False
+    _boot_fd = fd
+
+    try:
+        yield leader
+    finally:
+        if leader:
+            fcntl.flock(fd, fcntl.LOCK_SH)